@@ -1,10 +1,21 @@
 # Configuración mínima para el nuevo flujo del mBot
 
 # Conexión
-MBOT_CONNECTION_TYPE = "usb"  # "usb" o "bluetooth" (usb recomendado para simplificar)
-MBOT_BLUETOOTH_ADDRESS = None
-MBOT_PORT = None
+MBOT_CONNECTION_TYPE = "usb"  # "usb", "bluetooth" o "hid" (dongle 2.4G; usb recomendado para simplificar)
+MBOT_BLUETOOTH_ADDRESS = None  # Opcional: se prueba antes de escanear (la última buena queda en caché)
+MBOT_PORT = None  # Opcional: se prueba primero; si no, se sondean todos los puertos USB
 MBOT_BAUDRATE = 115200
+# Ritmo de escritura por BLE: intervalo de conexión (s) y escrituras por evento;
+# junto con el MTU negociado dan los bytes por segundo (ver ble_link_budget)
+MBOT_BLE_CONNECTION_INTERVAL = 0.020
+MBOT_BLE_PACKETS_PER_EVENT = 2
+# Grabar todo el tráfico con el robot para analizarlo o reproducirlo (tools/wire_trace.py)
+MBOT_TRACE_PATH = None  # p. ej. "mbot_trace.bin"
+
+# Flota de varios robots (src/core/mbot_fleet.py); vacío = un solo robot
+# Ej.: [{"name": "rojo", "connection_type": "usb", "port": "/dev/ttyUSB0"},
+#       {"name": "azul", "connection_type": "bluetooth", "ble_address": "AA:BB:CC:DD:EE:FF"}]
+MBOT_FLEET = []
 
 # Sensores ultrasónicos (puedes ajustar puertos/slots según tu cableado)
 SENSOR_PORTS = {
@@ -13,6 +24,19 @@ SENSOR_PORTS = {
     "right": None,
 }
 
+# Sondeo de sensores en segundo plano: Hz por sensor ({} = leer bajo demanda)
+SENSOR_POLL_RATES = {"front": 20.0, "left": 10.0, "right": 10.0}
+SENSOR_BUFFER_SIZE = 64   # muestras guardadas por sensor
+SENSOR_MAX_AGE = 0.5      # segundos; una muestra más vieja se ignora
+
+# Los comandos que no cambian el estado del robot no se reenvían; cada tantos
+# segundos se repite igualmente el último por seguridad (None = nunca)
+COMMAND_REFRESH_INTERVAL = 1.0
+
+# Periodo del bucle de control: una orden o una parada se atiende como
+# mucho un tick después
+CONTROL_TICK = 0.05
+
 # Exploración constante estilo Roomba
 EXPLORATION_SETTINGS = {
     "forward_speed": 90,
@@ -46,6 +70,7 @@ WAKE_WORD = "eme bot"
 VOICE_LANGUAGE = "es-ES"
 WAKE_POLL_INTERVAL = 4.0   # segundos entre intentos de detectar el wake word
 COMMAND_TIMEOUT = 4.0      # segundos máximos para escuchar la orden tras despertar
+COMMAND_WAIT_MARGIN = 2.0  # además, lo que puede tardar en reconocerse; luego sigue solo
 
 # Debug sencillo
 DEBUG_MODE = True
@@ -3,10 +3,16 @@
 Copia este archivo como `config.py` y ajusta los valores para tu robot.
 """
 
-MBOT_CONNECTION_TYPE = "usb"  # "usb" o "ble"
-MBOT_BLUETOOTH_ADDRESS = None  # Requerido solo si usas BLE
-MBOT_PORT = None               # Usa algo como "/dev/tty.usbmodemXXXX" si deseas fijarlo
+MBOT_CONNECTION_TYPE = "usb"  # "usb", "bluetooth" o "hid" (dongle 2.4G)
+MBOT_BLUETOOTH_ADDRESS = None  # Opcional: se prueba antes de escanear (la última buena queda en caché)
+MBOT_PORT = None               # Usa algo como "/dev/tty.usbmodemXXXX" si deseas fijarlo (si no, se sondean los USB)
 MBOT_BAUDRATE = 115200
+# Ritmo de escritura por BLE: intervalo de conexión (s) y escrituras por evento;
+# junto con el MTU negociado dan los bytes por segundo (ver ble_link_budget)
+MBOT_BLE_CONNECTION_INTERVAL = 0.020
+MBOT_BLE_PACKETS_PER_EVENT = 2
+MBOT_TRACE_PATH = None         # "mbot_trace.bin" graba el tráfico para reproducirlo con tools/wire_trace.py
+MBOT_FLEET = []                # Varios robots: [{"name": "rojo", "connection_type": "usb", "port": "..."}, ...]
 
 SENSOR_PORTS = {
     "front": {"port": 1, "slot": 3},  # Sensor ultrasónico frontal
@@ -14,6 +20,13 @@ SENSOR_PORTS = {
     "right": None,
 }
 
+SENSOR_POLL_RATES = {"front": 20.0, "left": 10.0, "right": 10.0}  # Hz por sensor; {} = leer bajo demanda
+SENSOR_BUFFER_SIZE = 64
+SENSOR_MAX_AGE = 0.5
+COMMAND_REFRESH_INTERVAL = 1.0  # s; reenvío periódico de comandos repetidos (None = nunca, 0 = siempre)
+
+CONTROL_TICK = 0.05  # s por tick del bucle de control
+
 EXPLORATION_SETTINGS = {
     "forward_speed": 90,
     "turn_speed": 80,
@@ -42,6 +55,7 @@ VOICE_ENABLED = True
 WAKE_WORD = "eme bot"
 VOICE_LANGUAGE = "es-ES"
 WAKE_POLL_INTERVAL = 4.0
-COMMAND_TIMEOUT = 4.0
+COMMAND_TIMEOUT = 4.0      # segundos máximos para escuchar la orden tras despertar
+COMMAND_WAIT_MARGIN = 2.0  # además, lo que puede tardar en reconocerse; luego sigue solo
 
 DEBUG_MODE = True
@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 """Nuevo flujo simplificado del mBot."""
 
-import random
+import argparse
+import queue
 import signal
 import sys
 import time
+from typing import Optional
 
 from config import (
     COMMAND_TIMEOUT,
+    COMMAND_WAIT_MARGIN,
+    CONTROL_TICK,
     EXPLORATION_SETTINGS,
     FOLLOW_SETTINGS,
     VOICE_ENABLED,
@@ -16,64 +20,121 @@ from config import (
     WAKE_WORD,
 )
 from src.core.command_parser import Command, command_from_text
-from src.core.mbot_controller import MBotController
-
-try:
-    from src.core.voice_interface import VoiceInterface
-except RuntimeError:
-    VoiceInterface = None  # type: ignore
+from src.core.control_runtime import ControlRuntime, describe
+from src.core.drive_modes import ExploreMode, FollowMode
+from src.core.startup_profile import StartupProfiler
+from src.core.voice_interface import WAKE, VoiceInterface
 
 
 class MBotExplorer:
-    def __init__(self):
-        self.controller = MBotController()
+    def __init__(self, profiler=None, controller=None, voice_enabled=VOICE_ENABLED, handle_signals=True):
+        profiler = profiler or StartupProfiler()
+        # El controlador se importa aquí (y SpeechRecognition al crear la voz):
+        # así el transporte (bleak, hidapi) solo se carga si de verdad se usa
+        if controller is None:
+            with profiler.phase("importar controlador"):
+                from src.core.mbot_controller import MBotController
+            with profiler.phase("conectar mBot"):
+                controller = MBotController()
+        self.controller = controller
         self.mode = Command.EXPLORE
-        self.awaiting_command = False
-        self._last_sound = 0.0
+        self.explore = ExploreMode(controller, EXPLORATION_SETTINGS)
+        self.follow = FollowMode(controller, FOLLOW_SETTINGS)
+        self.runtime: Optional[ControlRuntime] = None
+        self._shut_down = False
+        # Tras «EME BOT» el robot espera quieto la orden hasta este instante
+        self._listening_until: Optional[float] = None
+        # Órdenes de texto desde otros hilos; se atienden al empezar cada tick
+        self._commands = queue.SimpleQueue()
         self.voice = None
-        if VOICE_ENABLED and VoiceInterface:
-            try:
-                self.voice = VoiceInterface(WAKE_WORD, VOICE_LANGUAGE, WAKE_POLL_INTERVAL, COMMAND_TIMEOUT)
-            except RuntimeError as exc:
-                print(f"⚠️ Voz deshabilitada: {exc}")
+        if voice_enabled:
+            with profiler.phase("voz"):
+                self.voice = self._start_voice()
         else:
             print("ℹ️ Voz deshabilitada por configuración.")
 
-        signal.signal(signal.SIGINT, self._handle_signal)
-        signal.signal(signal.SIGTERM, self._handle_signal)
+        if handle_signals:
+            signal.signal(signal.SIGINT, self._handle_signal)
+            signal.signal(signal.SIGTERM, self._handle_signal)
+
+    def _start_voice(self):
+        try:
+            return VoiceInterface(WAKE_WORD, VOICE_LANGUAGE, WAKE_POLL_INTERVAL, COMMAND_TIMEOUT)
+        except RuntimeError as exc:
+            print(f"⚠️ Voz deshabilitada: {exc}")
+            return None
 
     def _handle_signal(self, *_):
         self.shutdown()
         sys.exit(0)
 
     def run(self):
+        """Bucle de control a ritmo fijo sobre el runtime asyncio.
+
+        El muestreo de sensores, el buzzer y la voz tienen sus propios hilos;
+        cada tick solo recoge lo que han dejado, sin esperar nunca.
+        """
         print("🤖 Iniciando modo exploración autónomo")
+        self.runtime = ControlRuntime()
+        self.runtime.every("control", 1.0 / CONTROL_TICK, self.step)
+        if self.voice:
+            self.voice.start()
         try:
-            while True:
-                self._maybe_listen()
-                self._run_mode_step()
+            self.runtime.run()
         except KeyboardInterrupt:
+            pass
+        finally:
+            # Salga como salga (request_exit, Ctrl+C o un error) el robot queda
+            # parado y los hilos de sensores, sonidos y voz terminan
             self.shutdown()
 
+    def request_exit(self):
+        """Termina ``run`` desde cualquier hilo."""
+        if self.runtime:
+            self.runtime.stop()
+
+    def step(self):
+        """Un tick: órdenes y voz pendientes y un paso del modo actual. Nunca espera a nada."""
+        while True:
+            try:
+                text = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            self._process_command_text(text)
+        self._handle_voice_events()
+        self._run_mode_step()
+
+    def submit_command(self, text):
+        """Encola una orden de texto desde cualquier hilo; se atiende en el tick siguiente."""
+        self._commands.put(text)
+
     # ------------------------------------------------------------------
-    def _maybe_listen(self):
+    def _handle_voice_events(self):
+        """Atiende lo que ha oído el hilo de voz desde el último tick."""
         if not self.voice:
             return
-
-        if self.awaiting_command:
-            command_text = self.voice.listen_for_command()
-            self._process_command_text(command_text)
-            self.awaiting_command = False
+        for event in self.voice.poll_events():
+            if event.kind == WAKE:
+                print("👂 'EME BOT' detectado. Esperando instrucción...")
+                self._listening_until = time.monotonic() + COMMAND_TIMEOUT + COMMAND_WAIT_MARGIN
+                self.controller.stop()
+                self.controller.flash_leds((0, 0, 255), 0.2)
+            else:
+                self._process_command_text(event.text)
+        if self._listening_until is not None and time.monotonic() >= self._listening_until:
+            print("⌛ No llegó ninguna orden. Sigo igual.")
+            self._stop_listening()
+
+    def _stop_listening(self):
+        """Deja de esperar la orden; el modo retoma desde el principio (la maniobra se cortó)."""
+        if self._listening_until is None:
             return
-
-        heard = self.voice.listen_for_wake_word()
-        if heard:
-            print("👂 'EME BOT' detectado. Esperando instrucción...")
-            self.controller.stop()
-            self.controller.flash_leds((0, 0, 255), 0.2)
-            self.awaiting_command = True
+        self._listening_until = None
+        self.explore.reset()
+        self.follow.reset()
 
     def _process_command_text(self, text):
+        self._stop_listening()
         if not text:
             print("❓ No entendí la orden. Sigo igual.")
             return
@@ -84,89 +145,66 @@ class MBotExplorer:
             return
 
         print(f"🎯 Nuevo modo: {command.value}")
+        # Una orden nueva corta el baile y la maniobra que estuvieran en marcha
+        self.controller.choreography.cancel()
         self.mode = command
-        if command == Command.DANCE:
-            # Ejecutamos inmediatamente y volvemos a explorar
+        if command == Command.STOP:
+            self.controller.stop()
+        elif command == Command.EXPLORE:
+            self.explore.reset()
+        elif command == Command.FOLLOW:
+            self.follow.reset()
+        elif command == Command.DANCE:
+            # El baile va en segundo plano; al acabar se vuelve a explorar
             self.controller.perform_dance()
+            self.explore.reset()
             self.mode = Command.EXPLORE
 
     # ------------------------------------------------------------------
     def _run_mode_step(self):
-        if self.mode == Command.EXPLORE:
-            self._explore_step()
+        if self._listening_until is not None:
+            return  # quieto hasta que llegue la orden o venza la espera
+        if self.controller.choreography.controls_motors:
+            self._watch_choreography()
+        elif self.mode == Command.EXPLORE:
+            self.explore.tick()
         elif self.mode == Command.FOLLOW:
-            self._follow_step()
+            self.follow.tick()
         elif self.mode == Command.STOP:
             self.controller.stop()
-            time.sleep(0.1)
 
-    def _explore_step(self):
-        settings = EXPLORATION_SETTINGS
+    def _watch_choreography(self):
+        """Mientras baila solo vigilamos el sensor: un obstáculo corta el baile."""
         distance = self.controller.read_distance("front")
-
-        if distance is None:
-            self.controller.drive_forward(settings["forward_speed"])
-            time.sleep(0.2)
-            return
-
-        if distance < settings["obstacle_distance_cm"]:
-            self.controller.stop()
-            self.controller.play_random_sound()
-            self.controller.drive_backward(settings["turn_speed"])
-            time.sleep(settings["reverse_time"])
-            direction = self._random_turn_direction()
-            if direction == "left":
-                self.controller.turn_left(settings["turn_speed"])
-            else:
-                self.controller.turn_right(settings["turn_speed"])
-            time.sleep(settings["turn_time"])
+        if distance is not None and distance < EXPLORATION_SETTINGS["obstacle_distance_cm"]:
+            print("🛑 Obstáculo: corto el baile")
             self.controller.stop()
-        else:
-            self.controller.drive_forward(settings["forward_speed"])
-            now = time.time()
-            if now - self._last_sound > settings["sound_every_seconds"]:
-                self.controller.play_random_sound()
-                self._last_sound = now
-        time.sleep(0.1)
-
-    def _follow_step(self):
-        settings = FOLLOW_SETTINGS
-        front = self.controller.read_distance("front")
-        left = self.controller.read_distance("left")
-        right = self.controller.read_distance("right")
-
-        if front is None:
-            self.controller.stop()
-            time.sleep(0.2)
-            return
-
-        if front < settings["min_distance_cm"]:
-            self.controller.stop()
-        elif front > settings["max_distance_cm"]:
-            self.controller.stop()
-        else:
-            self.controller.drive_forward(settings["forward_speed"])
-
-        if left and not right:
-            self.controller.turn_left(settings["turn_speed"])
-            time.sleep(0.1)
-        elif right and not left:
-            self.controller.turn_right(settings["turn_speed"])
-            time.sleep(0.1)
-        time.sleep(0.1)
-
-    def _random_turn_direction(self):
-        return random.choice(["left", "right"])
 
     def shutdown(self):
+        if self._shut_down:
+            return
+        self._shut_down = True
         print("� Apagando mBot...")
+        if self.runtime:
+            for line in describe(self.runtime.stats()):
+                print(f"⏱️ {line}")
         self.controller.shutdown()
         if self.voice:
             self.voice.close()
 
 
-def main():
-    explorer = MBotExplorer()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="mBot en modo exploración autónomo")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="muestra cuánto tarda en arrancar cada subsistema",
+    )
+    args = parser.parse_args(argv)
+
+    profiler = StartupProfiler(enabled=args.profile_startup)
+    explorer = MBotExplorer(profiler)
+    profiler.report()
     explorer.run()
 
 
@@ -0,0 +1,126 @@
+"""Secuencias del buzzer tocadas en segundo plano."""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterable, Optional, Tuple
+
+
+class BuzzerSequencer:
+    """Hilo que toca secuencias ``(frecuencia, ms)`` sin bloquear a quien las pide.
+
+    Cada nota sale en su plazo absoluto (inicio + duración de las anteriores),
+    así que la secuencia no se alarga aunque un envío se retrase. Una
+    secuencia nueva sustituye a la que está sonando; frecuencia 0 es un
+    silencio. El hilo solo se crea con la primera secuencia.
+    """
+
+    def __init__(self, buzz: Callable[[int, int], None]):
+        self._buzz = buzz
+        self._cond = threading.Condition()
+        self._notes: deque = deque()
+        self._next_at = 0.0
+        self._silence = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.notes_played = 0
+        self.sequences_played = 0
+        self.preempted = 0
+        self.max_lateness = 0.0
+
+    # ------------------------------------------------------------------
+    def play(self, sequence: Iterable[Tuple[int, int]]):
+        """Empieza ``sequence`` ya, cortando la anterior; vuelve al instante."""
+        notes = deque((int(frequency), int(duration)) for frequency, duration in sequence)
+        with self._cond:
+            if self._closed:
+                return
+            if self._is_playing(time.monotonic()):
+                self.preempted += 1
+            self._notes = notes
+            self._next_at = time.monotonic()
+            self._silence = False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="buzzer-sequencer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        """Descarta lo pendiente y calla el buzzer si estaba sonando."""
+        with self._cond:
+            now = time.monotonic()
+            if self._is_playing(now):
+                self._silence = True
+            self._notes.clear()
+            self._next_at = min(self._next_at, now)
+            self._cond.notify()
+
+    @property
+    def playing(self) -> bool:
+        with self._cond:
+            return self._is_playing(time.monotonic())
+
+    def _is_playing(self, now) -> bool:
+        return bool(self._notes) or now < self._next_at
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que termine lo que suena; ``False`` si vence ``timeout``."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                remaining = self._next_at - time.monotonic()
+                if not self._notes and remaining <= 0:
+                    return True
+                if self._notes:
+                    remaining += sum(duration for _, duration in self._notes) / 1000.0
+            if deadline is not None:
+                if time.monotonic() >= deadline:
+                    return False
+                remaining = min(remaining, deadline - time.monotonic())
+            time.sleep(max(remaining, 0.001))
+
+    def close(self, timeout: float = 1.0):
+        self.cancel()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "notes_played": self.notes_played,
+            "sequences_played": self.sequences_played,
+            "preempted": self.preempted,
+            "max_lateness_ms": self.max_lateness * 1000,
+        }
+
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._silence and not self._closed and not self._note_due():
+                    timeout = self._next_at - time.monotonic() if self._notes else None
+                    self._cond.wait(timeout)
+                if self._silence:
+                    self._silence = False
+                    frequency, duration = 0, 0
+                elif self._closed:
+                    return
+                else:
+                    frequency, duration = self._notes.popleft()
+                    now = time.monotonic()
+                    self.max_lateness = max(self.max_lateness, now - self._next_at)
+                    self._next_at += duration / 1000.0
+                    if not self._notes:
+                        self.sequences_played += 1
+                    if not frequency:
+                        continue  # silencio: solo avanza el plazo
+                    self.notes_played += 1
+            try:
+                self._buzz(frequency, duration)
+            except Exception as exc:
+                print(f"⚠️ Error en el buzzer: {exc}")
+
+    def _note_due(self) -> bool:
+        return bool(self._notes) and self._next_at <= time.monotonic()
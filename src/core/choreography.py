@@ -0,0 +1,244 @@
+"""Coreografías: fotogramas clave en pistas de motores, LEDs y buzzer.
+
+Una ``Timeline`` se edita con instantes relativos al inicio y se compila
+antes de tocarla: cada instante queda como una tanda de tramas ya
+codificadas, con su canal, lista para ``send_frames``. Durante la
+reproducción no se codifica nada.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..protocols import codec
+
+Keyframe = namedtuple("Keyframe", "at track value")
+# ``frames``: [(trama, canal)] para send_frames; ``calls``: [(método, args)]
+# para transportes sin send_frames; ``state``: pista -> estado tras el paso
+# (None si no se sabe, p. ej. un tono con duración)
+CompiledStep = namedtuple("CompiledStep", "at frames calls state")
+CompiledTimeline = namedtuple("CompiledTimeline", "name steps cleanup duration")
+
+# Índice 0 = todos los LEDs de la placa
+ONBOARD_LEDS = (1, 2)
+
+
+class Timeline:
+    """Coreografía editable; los métodos devuelven ``self`` para encadenar."""
+
+    def __init__(self, name: str = "coreografía"):
+        self.name = name
+        self.keyframes: List[Keyframe] = []
+
+    def move(self, at: float, left_speed: int, right_speed: int) -> "Timeline":
+        self.keyframes.append(Keyframe(at, "move", (int(left_speed), int(right_speed))))
+        return self
+
+    def led(self, at: float, index: int, red: int, green: int, blue: int) -> "Timeline":
+        self.keyframes.append(Keyframe(at, ("led", index), (int(red), int(green), int(blue))))
+        return self
+
+    def buzz(self, at: float, frequency: int, duration: int = 0) -> "Timeline":
+        self.keyframes.append(Keyframe(at, "buzzer", (int(frequency), int(duration))))
+        return self
+
+    def melody(self, at: float, sequence: Iterable[Tuple[int, int]]) -> "Timeline":
+        """Notas ``(frecuencia, ms)`` seguidas a partir de ``at`` (frecuencia 0 = silencio)."""
+        for frequency, duration in sequence:
+            if frequency:
+                self.buzz(at, frequency, duration)
+            at += duration / 1000.0
+        return self
+
+    @property
+    def duration(self) -> float:
+        end = 0.0
+        for keyframe in self.keyframes:
+            length = keyframe.value[1] / 1000.0 if keyframe.track == "buzzer" else 0.0
+            end = max(end, keyframe.at + length)
+        return end
+
+    def compile(self) -> CompiledTimeline:
+        steps: Dict[float, Dict] = {}
+        for keyframe in sorted(self.keyframes, key=lambda k: k.at):
+            # En un mismo instante, el último fotograma de cada pista manda
+            steps.setdefault(keyframe.at, {})[keyframe.track] = keyframe.value
+
+        tracks = {keyframe.track for keyframe in self.keyframes}
+        cleanup = {}
+        if "move" in tracks:
+            cleanup["move"] = (0, 0)
+        if any(isinstance(track, tuple) for track in tracks):
+            cleanup[("led", 0)] = (0, 0, 0)
+        if "buzzer" in tracks:
+            cleanup["buzzer"] = (0, 0)
+
+        return CompiledTimeline(
+            self.name,
+            [_compile_step(at, values) for at, values in sorted(steps.items())],
+            _compile_step(0.0, cleanup),
+            self.duration,
+        )
+
+
+def _compile_step(at: float, values: Dict) -> CompiledStep:
+    frames, calls, state = [], [], {}
+    for track, value in values.items():
+        if track == "move":
+            frames.append((codec.encode_move(*value), "move"))
+            calls.append(("doMove", value))
+            state["move"] = value
+        elif track == "buzzer":
+            frequency, duration = value
+            frames.append((codec.encode_buzzer(frequency, duration), "buzzer"))
+            calls.append(("doBuzzer", value))
+            state["buzzer"] = None if duration else frequency
+        else:
+            index = track[1]
+            channel = ("led", codec.ONBOARD_LED_PORT, codec.ONBOARD_LED_SLOT, index)
+            frames.append((codec.encode_rgb_led_onboard(index, *value), channel))
+            calls.append(("doRGBLedOnBoard", (index,) + value))
+            for i in (ONBOARD_LEDS if index == 0 else (index,)):
+                state[("led", i)] = value
+    return CompiledStep(at, frames, calls, state)
+
+
+class ChoreographyPlayer:
+    """Un único hilo que toca coreografías compiladas con plazos absolutos.
+
+    ``send(step)`` entrega cada paso al transporte. ``cancel()`` es síncrono:
+    al volver ya ha salido la limpieza (motores parados, LEDs apagados) y
+    ningún paso pendiente llegará después.
+    """
+
+    def __init__(self, send: Callable[[CompiledStep], None]):
+        self._send = send
+        self._cond = threading.Condition()
+        # Serializa envíos del hilo y limpiezas de cancel()
+        self._send_lock = threading.Lock()
+        self._current: Optional[CompiledTimeline] = None
+        self._next_step = 0
+        self._started_at = 0.0
+        self._generation = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.steps_played = 0
+        self.timelines_played = 0
+        self.cancelled = 0
+        self.max_lateness = 0.0
+
+    # ------------------------------------------------------------------
+    def play(self, timeline: CompiledTimeline):
+        """Empieza ``timeline`` ya, cancelando la que sonara; vuelve al instante."""
+        self.cancel()
+        with self._cond:
+            if self._closed or not timeline.steps:
+                return
+            self._current = timeline
+            self._next_step = 0
+            self._started_at = time.monotonic()
+            self._generation += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="choreography", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self, motors_only: bool = False) -> bool:
+        """Corta lo que suena y envía su limpieza; ``False`` si no había nada.
+
+        Con ``motors_only`` solo se corta si la coreografía mueve los motores:
+        un destello de LEDs o una melodía siguen sonando.
+        """
+        with self._cond:
+            timeline = self._current
+            if timeline is None or (motors_only and "move" not in timeline.cleanup.state):
+                return False
+            self._current = None
+            self._generation += 1
+            self.cancelled += 1
+            self._cond.notify_all()
+        with self._send_lock:
+            self._deliver(timeline.cleanup)
+        return True
+
+    @property
+    def playing(self) -> bool:
+        return self._current is not None
+
+    @property
+    def controls_motors(self) -> bool:
+        """Si lo que suena mueve los motores (un destello de LEDs no cuenta)."""
+        timeline = self._current
+        return timeline is not None and "move" in timeline.cleanup.state
+
+    @property
+    def name(self) -> Optional[str]:
+        timeline = self._current
+        return timeline.name if timeline else None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que termine o se cancele; ``False`` si vence ``timeout``."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._current is None, timeout)
+
+    def close(self, timeout: float = 1.0):
+        self.cancel()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "steps_played": self.steps_played,
+            "timelines_played": self.timelines_played,
+            "cancelled": self.cancelled,
+            "max_lateness_ms": self.max_lateness * 1000,
+        }
+
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._step_due():
+                    timeline = self._current
+                    timeout = None
+                    if timeline is not None:
+                        timeout = self._started_at + timeline.steps[self._next_step].at - time.monotonic()
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+                timeline = self._current
+                step = timeline.steps[self._next_step]
+                generation = self._generation
+                self.max_lateness = max(self.max_lateness, time.monotonic() - self._started_at - step.at)
+                self._next_step += 1
+                finished = self._next_step == len(timeline.steps)
+
+            with self._send_lock:
+                # Un cancel() entre medias gana: su limpieza ya salió
+                if generation != self._generation:
+                    continue
+                self._deliver(step)
+                self.steps_played += 1
+
+            if finished:
+                with self._cond:
+                    if generation == self._generation:
+                        self._current = None
+                        self.timelines_played += 1
+                        self._cond.notify_all()
+
+    def _step_due(self) -> bool:
+        timeline = self._current
+        if timeline is None or self._next_step >= len(timeline.steps):
+            return False
+        return self._started_at + timeline.steps[self._next_step].at <= time.monotonic()
+
+    def _deliver(self, step: CompiledStep):
+        try:
+            self._send(step)
+        except Exception as exc:
+            print(f"⚠️ Error en la coreografía: {exc}")
@@ -0,0 +1,157 @@
+"""Runtime asyncio para el bucle de control: tareas independientes a ritmo fijo.
+
+Cada tarea periódica tiene plazos absolutos (``inicio + n * periodo``): lo
+que tarde un paso no desplaza a los siguientes. Si un paso se come uno o
+más plazos se cuenta como desbordamiento y se salta al siguiente plazo
+futuro sin perder la fase. Lo que bloquea (voz, sensores, buzzer) vive en
+sus propios hilos; aquí los pasos solo recogen lo que esos hilos dejan.
+"""
+
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional
+
+from ..protocols.metrics import LatencyHistogram
+
+
+class PeriodicStats:
+    """Periodo real, jitter de arranque y duración de cada paso de una tarea."""
+
+    def __init__(self, period: float):
+        self.period = period
+        self.ticks = 0
+        self.overruns = 0
+        self.missed_ticks = 0
+        self.jitter = LatencyHistogram()
+        self.step_time = LatencyHistogram()
+        self._last_start: Optional[float] = None
+        self._period_total = 0.0
+        self._period_min = float("inf")
+        self._period_max = 0.0
+
+    def record(self, deadline: float, started: float, finished: float):
+        self.ticks += 1
+        self.jitter.record(max(0.0, started - deadline))
+        self.step_time.record(finished - started)
+        if self._last_start is not None:
+            period = started - self._last_start
+            self._period_total += period
+            self._period_min = min(self._period_min, period)
+            self._period_max = max(self._period_max, period)
+        self._last_start = started
+
+    def advance(self, deadline: float, started: float, finished: float) -> float:
+        """Anota un paso y devuelve el siguiente plazo de la rejilla.
+
+        Si el paso se comió uno o más plazos cuenta un desbordamiento y salta
+        al siguiente plazo futuro sin perder la fase.
+        """
+        self.record(deadline, started, finished)
+        deadline += self.period
+        if finished > deadline:
+            missed = int((finished - deadline) // self.period) + 1
+            self.overruns += 1
+            self.missed_ticks += missed
+            deadline += missed * self.period
+        return deadline
+
+    def snapshot(self) -> dict:
+        periods = self.ticks - 1
+        return {
+            "rate_hz": 1.0 / self.period,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "missed_ticks": self.missed_ticks,
+            "period_ms": {
+                "target": self.period * 1000,
+                "avg": self._period_total / periods * 1000 if periods > 0 else 0.0,
+                "min": self._period_min * 1000 if periods > 0 else 0.0,
+                "max": self._period_max * 1000,
+            },
+            "jitter": self.jitter.snapshot(),
+            "step": self.step_time.snapshot(),
+        }
+
+
+class ControlRuntime:
+    """Event loop propio con tareas periódicas.
+
+    ``every`` registra una función a ritmo fijo. ``run`` bloquea hasta
+    ``stop``, que se puede llamar desde cualquier hilo.
+    """
+
+    def __init__(self):
+        self._periodic: Dict[str, Callable] = {}
+        self.stats_by_task: Dict[str, PeriodicStats] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+        self.errors = 0
+
+    def every(self, name: str, rate_hz: float, step: Callable):
+        """Llama ``step()`` ``rate_hz`` veces por segundo (si es corrutina, se espera)."""
+        self._periodic[name] = step
+        self.stats_by_task[name] = PeriodicStats(1.0 / rate_hz)
+
+    # ------------------------------------------------------------------
+    def run(self):
+        asyncio.run(self._main())
+
+    def stop(self):
+        loop, stop = self._loop, self._stop
+        if loop and stop and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(stop.set)
+            except RuntimeError:
+                pass  # el loop ya terminó
+
+    def wait_started(self, timeout: Optional[float] = None) -> bool:
+        return self._started.wait(timeout)
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: stats.snapshot() for name, stats in self.stats_by_task.items()}
+
+    # ------------------------------------------------------------------
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        tasks: List[asyncio.Task] = [
+            asyncio.create_task(self._run_periodic(name, step), name=name)
+            for name, step in self._periodic.items()
+        ]
+        self._started.set()
+        try:
+            await self._stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_periodic(self, name, step):
+        loop = asyncio.get_running_loop()
+        stats = self.stats_by_task[name]
+        deadline = loop.time()
+        while True:
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            started = loop.time()
+            try:
+                result = step()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as exc:
+                self.errors += 1
+                print(f"⚠️ Error en la tarea {name}: {exc}")
+            deadline = stats.advance(deadline, started, loop.time())
+
+
+def describe(stats: Dict[str, dict]) -> List[str]:
+    """Una línea legible por tarea periódica."""
+    lines = []
+    for name, task in stats.items():
+        lines.append(
+            f"{name}: {task['rate_hz']:.0f} Hz, periodo medio {task['period_ms']['avg']:.1f} ms, "
+            f"jitter p99 {task['jitter']['p99_ms']:.2f} ms, {task['overruns']} desbordamientos"
+        )
+    return lines
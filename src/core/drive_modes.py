@@ -0,0 +1,108 @@
+"""Modos autónomos como máquinas de estados que avanzan un tick cada vez.
+
+Ningún ``tick`` duerme: las maniobras (retroceder, girar) son estados con
+plazo que se comprueban en cada llamada, así que una orden o una parada
+de emergencia se atienden en el tick siguiente.
+"""
+
+import random
+import time
+from typing import Optional
+
+CRUISE = "cruise"
+REVERSE = "reverse"
+TURN = "turn"
+TRACK = "track"
+
+
+class ExploreMode:
+    """Explorar estilo Roomba: avanza, y ante un obstáculo retrocede y gira."""
+
+    def __init__(self, controller, settings: dict, rng: Optional[random.Random] = None):
+        self.controller = controller
+        self.settings = settings
+        self.rng = rng or random.Random()
+        self.state = CRUISE
+        self.until = 0.0
+        self._last_sound = 0.0
+
+    def reset(self):
+        self.state = CRUISE
+        self.until = 0.0
+
+    def tick(self, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        settings = self.settings
+        controller = self.controller
+
+        if self.state == REVERSE:
+            if now >= self.until:
+                if self.rng.choice(["left", "right"]) == "left":
+                    controller.turn_left(settings["turn_speed"])
+                else:
+                    controller.turn_right(settings["turn_speed"])
+                self._enter(TURN, now + settings["turn_time"])
+            return
+
+        if self.state == TURN:
+            if now >= self.until:
+                controller.stop()
+                self._enter(CRUISE, now)
+            return
+
+        distance = controller.read_distance("front")
+        if distance is not None and distance < settings["obstacle_distance_cm"]:
+            controller.stop()
+            controller.play_random_sound()
+            controller.drive_backward(settings["turn_speed"])
+            self._enter(REVERSE, now + settings["reverse_time"])
+            return
+
+        controller.drive_forward(settings["forward_speed"])
+        if distance is not None and now - self._last_sound > settings["sound_every_seconds"]:
+            controller.play_random_sound()
+            self._last_sound = now
+
+    def _enter(self, state, until):
+        self.state = state
+        self.until = until
+
+
+class FollowMode:
+    """Seguir a alguien: mantiene la distancia delante y corrige hacia el lado que lo ve."""
+
+    def __init__(self, controller, settings: dict, correction_time: float = 0.1):
+        self.controller = controller
+        self.settings = settings
+        self.correction_time = correction_time
+        self.state = TRACK
+        self.until = 0.0
+
+    def reset(self):
+        self.state = TRACK
+        self.until = 0.0
+
+    def tick(self, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        if self.state == TURN:
+            if now < self.until:
+                return
+            self.state = TRACK
+
+        settings = self.settings
+        controller = self.controller
+        distances = controller.read_distances(("front", "left", "right"))
+        front, left, right = distances["front"], distances["left"], distances["right"]
+
+        if front is None or not settings["min_distance_cm"] <= front <= settings["max_distance_cm"]:
+            controller.stop()
+        else:
+            controller.drive_forward(settings["forward_speed"])
+
+        if front is not None and bool(left) != bool(right):
+            if left:
+                controller.turn_left(settings["turn_speed"])
+            else:
+                controller.turn_right(settings["turn_speed"])
+            self.state = TURN
+            self.until = now + self.correction_time
@@ -2,11 +2,24 @@
 
 import random
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from ..protocols.mbot_original_protocol import MBotOriginalProtocol
+from .buzzer_sequencer import BuzzerSequencer
+from .choreography import ONBOARD_LEDS, ChoreographyPlayer, CompiledStep, Timeline
+from .sensor_poller import SensorPoller
 from config import (
+    COMMAND_REFRESH_INTERVAL,
+    MBOT_BAUDRATE,
+    MBOT_BLE_CONNECTION_INTERVAL,
+    MBOT_BLE_PACKETS_PER_EVENT,
+    MBOT_BLUETOOTH_ADDRESS,
     MBOT_CONNECTION_TYPE,
+    MBOT_PORT,
+    MBOT_TRACE_PATH,
+    SENSOR_BUFFER_SIZE,
+    SENSOR_MAX_AGE,
+    SENSOR_POLL_RATES,
     SENSOR_PORTS,
     SOUND_LIBRARY,
 )
@@ -34,18 +47,41 @@ class _SimulatedMBot:
 class MBotController:
     """Controlador simplificado con utilidades para mover y leer sensores."""
 
-    def __init__(self, connection_type: str = MBOT_CONNECTION_TYPE):
+    def __init__(self, connection_type: str = MBOT_CONNECTION_TYPE, mbot=None):
+        """``mbot`` permite inyectar un transporte ya conectado (p. ej. de una flota)."""
         self.connection_type = connection_type
         self.is_simulation = False
         self.sensor_ports: Dict[str, Optional[Dict[str, int]]] = SENSOR_PORTS
         self._last_distance_cache: Dict[str, float] = {}
         self._last_distance_timestamp: Dict[str, float] = {}
         self._sound_index = 0
+        self.poller: Optional[SensorPoller] = None
+        # Último estado enviado al robot: clave -> (estado, instante)
+        self._shadow: Dict[object, tuple] = {}
+        self._command_stats = {kind: {"sent": 0, "suppressed": 0} for kind in ("move", "led", "buzzer")}
+        # Las melodías suenan en su propio hilo; el bucle de control no espera
+        self.sounds = BuzzerSequencer(self.buzz)
+        # Bailes y destellos: un hilo los toca; stop() los corta al instante
+        self.choreography = ChoreographyPlayer(self._send_step)
+
+        if mbot is not None:
+            self.mbot = mbot
+            self.connection_type = getattr(mbot, "connection_type", connection_type)
+            return
 
         try:
             print(f"🔗 Intentando conectar mBot ({connection_type})...")
-            self.mbot = MBotOriginalProtocol(connection_type)
+            self.mbot = MBotOriginalProtocol(
+                connection_type,
+                ble_address=MBOT_BLUETOOTH_ADDRESS,
+                port=MBOT_PORT,
+                baudrate=MBOT_BAUDRATE,
+                trace_path=MBOT_TRACE_PATH,
+                ble_connection_interval=MBOT_BLE_CONNECTION_INTERVAL,
+                ble_packets_per_event=MBOT_BLE_PACKETS_PER_EVENT,
+            )
             print(f"✅ mBot conectado via {self.mbot.connection_type}")
+            self.start_polling()
         except Exception as exc:  # pragma: no cover - hardware fallback
             print(f"❌ No se pudo conectar al mBot: {exc}")
             print("💡 Usando modo simulación.")
@@ -56,7 +92,8 @@ class MBotController:
     # Movimientos básicos
     # ------------------------------------------------------------------
     def drive(self, left_speed: int, right_speed: int):
-        self.mbot.doMove(left_speed, right_speed)
+        if self._changes_state("move", ("move",), (left_speed, right_speed)):
+            self.mbot.doMove(left_speed, right_speed)
 
     def drive_forward(self, speed: int):
         self.drive(speed, speed)
@@ -71,11 +108,118 @@ class MBotController:
         self.drive(speed, -speed)
 
     def stop(self):
+        """Para los motores y corta la coreografía que los estuviera moviendo.
+
+        Un destello de LEDs sigue hasta el final (p. ej. el aviso de que ha
+        oído «EME BOT»); para cortarlo, ``choreography.cancel()``.
+        """
+        self.choreography.cancel(motors_only=True)
         self.drive(0, 0)
 
+    # ------------------------------------------------------------------
+    # Estado en sombra
+    # ------------------------------------------------------------------
+    def _changes_state(self, kind: str, keys, state) -> bool:
+        """Apunta ``state`` como enviado si cambia algo (o toca refrescar).
+
+        Devuelve ``False`` cuando todas las ``keys`` ya tienen ese estado desde
+        hace menos de COMMAND_REFRESH_INTERVAL: el comando no cambiaría nada.
+        """
+        now = time.monotonic()
+        stats = self._command_stats[kind]
+        if all(self._is_current(key, state, now) for key in keys):
+            stats["suppressed"] += 1
+            return False
+        for key in keys:
+            self._shadow[key] = (state, now)
+        stats["sent"] += 1
+        return True
+
+    def _is_current(self, key, state, now) -> bool:
+        shadow = self._shadow.get(key)
+        if shadow is None or shadow[0] != state:
+            return False
+        return COMMAND_REFRESH_INTERVAL is None or now - shadow[1] < COMMAND_REFRESH_INTERVAL
+
+    def _send_step(self, step: CompiledStep):
+        """Entrega un paso de coreografía y anota en la sombra lo que deja."""
+        sender = getattr(self.mbot, "send_frames", None)
+        if sender:
+            sender(step.frames)
+        else:
+            for method, args in step.calls:
+                getattr(self.mbot, method)(*args)
+        now = time.monotonic()
+        for key, state in step.state.items():
+            if state is None:
+                self._shadow.pop(key, None)
+            else:
+                self._shadow[key] = (state, now)
+
+    def forget_sent_state(self):
+        """Olvida lo enviado (p. ej. tras reiniciar el robot): el siguiente comando sale seguro."""
+        self._shadow.clear()
+
+    def command_stats(self) -> Dict[str, dict]:
+        """Comandos enviados y suprimidos por repetidos, por tipo y en total."""
+        stats = {kind: dict(counts) for kind, counts in self._command_stats.items()}
+        stats["total"] = {
+            "sent": sum(counts["sent"] for counts in self._command_stats.values()),
+            "suppressed": sum(counts["suppressed"] for counts in self._command_stats.values()),
+        }
+        return stats
+
+    # ------------------------------------------------------------------
+    # LEDs y buzzer
+    # ------------------------------------------------------------------
+    def set_led(self, index: int, red: int, green: int, blue: int):
+        """Color de un LED de la placa (``index`` 0 = todos)."""
+        keys = [("led", i) for i in (ONBOARD_LEDS if index == 0 else (index,))]
+        if self._changes_state("led", keys, (red, green, blue)):
+            self.mbot.doRGBLedOnBoard(index, red, green, blue)
+
+    def buzz(self, frequency: int, duration: int = 0):
+        """Tono de ``duration`` ms (0 = continuo; frecuencia 0 = silencio).
+
+        Un tono con duración es un evento y siempre suena; solo se suprime
+        repetir el tono continuo (o el silencio) que ya está sonando.
+        """
+        if duration:
+            # Tras un tono con duración no sabemos si sigue sonando
+            self._shadow.pop("buzzer", None)
+            self._command_stats["buzzer"]["sent"] += 1
+            self.mbot.doBuzzer(frequency, duration)
+        elif self._changes_state("buzzer", ("buzzer",), frequency):
+            self.mbot.doBuzzer(frequency)
+
     # ------------------------------------------------------------------
     # Sensores
     # ------------------------------------------------------------------
+    def start_polling(self, rates: Optional[Dict[str, float]] = None) -> Optional[SensorPoller]:
+        """Muestrea los sensores en segundo plano (Hz por sensor, SENSOR_POLL_RATES por defecto).
+
+        Mientras el sondeo está activo, ``read_distance`` devuelve la última
+        muestra sin tocar el puerto.
+        """
+        if not hasattr(self.mbot, "get_ultrasonic_distances"):
+            return None
+        self.stop_polling()
+        poller = SensorPoller(self.mbot, self.sensor_ports, SENSOR_POLL_RATES if rates is None else rates,
+                              SENSOR_BUFFER_SIZE)
+        self.poller = poller.start()
+        return self.poller
+
+    def stop_polling(self):
+        if self.poller:
+            self.poller.stop()
+            self.poller = None
+
+    def subscribe_distance(self, sensor: str, callback):
+        """``callback(sensor, distancia, timestamp)`` con cada muestra; devuelve la baja."""
+        if not self.poller:
+            raise RuntimeError("El sondeo de sensores no está activo")
+        return self.poller.subscribe(sensor, callback)
+
     def read_distance(self, sensor: str = "front", freshness: float = 0.2) -> Optional[float]:
         """Lee la distancia en cm para el sensor dado."""
 
@@ -83,6 +227,10 @@ class MBotController:
         if not port_config:
             return None
 
+        if self.poller and self.poller.polls(sensor):
+            sample = self.poller.latest(sensor, max_age=SENSOR_MAX_AGE)
+            return sample.value if sample else None
+
         now = time.time()
         if (
             sensor in self._last_distance_timestamp
@@ -104,13 +252,89 @@ class MBotController:
             self._last_distance_timestamp[sensor] = now
         return distance
 
+    def read_distances(self, sensors, freshness: float = 0.2) -> Dict[str, Optional[float]]:
+        """Lee varios sensores a la vez: todas las peticiones viajan juntas.
+
+        Con el protocolo USB el coste es aproximadamente un único viaje de ida
+        y vuelta en lugar de uno por sensor.
+        """
+
+        now = time.time()
+        results: Dict[str, Optional[float]] = {}
+        to_read = []
+        for sensor in sensors:
+            port_config = self.sensor_ports.get(sensor)
+            if not port_config:
+                results[sensor] = None
+            elif self.poller and self.poller.polls(sensor):
+                results[sensor] = self.read_distance(sensor)
+            elif (
+                sensor in self._last_distance_timestamp
+                and now - self._last_distance_timestamp[sensor] < freshness
+            ):
+                results[sensor] = self._last_distance_cache.get(sensor)
+            else:
+                to_read.append(sensor)
+
+        batch_reader = getattr(self.mbot, "get_ultrasonic_distances", None)
+        if to_read and batch_reader:
+            ports = [(self.sensor_ports[s]["port"], self.sensor_ports[s]["slot"]) for s in to_read]
+            try:
+                distances = batch_reader(ports)
+            except NotImplementedError:
+                distances = [None] * len(to_read)
+            for sensor, distance in zip(to_read, distances):
+                results[sensor] = distance
+                if distance is not None:
+                    self._last_distance_cache[sensor] = distance
+                    self._last_distance_timestamp[sensor] = now
+        else:
+            for sensor in to_read:
+                results[sensor] = self.read_distance(sensor, freshness)
+        return results
+
+    def read_sensors(self, queries) -> List:
+        """Lee varios sensores de cualquier tipo en una sola tanda.
+
+        Consultas como en ``MBotOriginalProtocol.read_sensors``, p. ej.
+        ``["line_follower", "light", ("ultrasonic", 1, 3)]``.
+        """
+        queries = list(queries)
+        reader = getattr(self.mbot, "read_sensors", None)
+        if not reader:
+            return [None] * len(queries)
+        try:
+            return reader(queries)
+        except NotImplementedError:
+            return [None] * len(queries)
+
+    def read_line_follower(self, port: int = 2) -> Optional[int]:
+        """0 ambos sensores sobre la línea, 1 solo el izquierdo, 2 solo el derecho, 3 ninguno."""
+        return self.read_sensors([("line_follower", port)])[0]
+
+    def read_light(self, port: Optional[int] = None) -> Optional[float]:
+        return self.read_sensors(["light" if port is None else ("light", port)])[0]
+
+    def read_sound(self, port: int = 3) -> Optional[float]:
+        return self.read_sensors([("sound", port)])[0]
+
+    def is_button_pressed(self) -> Optional[bool]:
+        return self.read_sensors(["button"])[0]
+
     # ------------------------------------------------------------------
     # Sonidos
     # ------------------------------------------------------------------
-    def play_sound_sequence(self, sequence):
-        for frequency, duration in sequence:
-            self.mbot.doBuzzer(int(frequency), int(duration))
-            time.sleep(duration / 1000.0)
+    def play_sound_sequence(self, sequence, wait: bool = False):
+        """Toca ``[(frecuencia, ms), ...]`` en segundo plano, cortando lo que sonara.
+
+        Vuelve al instante salvo con ``wait=True``.
+        """
+        self.sounds.play(sequence)
+        if wait:
+            self.sounds.wait()
+
+    def stop_sounds(self):
+        self.sounds.cancel()
 
     def play_random_sound(self):
         if not SOUND_LIBRARY:
@@ -121,34 +345,42 @@ class MBotController:
     # ------------------------------------------------------------------
     # Acciones especiales
     # ------------------------------------------------------------------
-    def perform_dance(self):
+    def dance_timeline(self) -> Timeline:
+        """El mini baile del comando 'bailar', con colores y melodía al azar."""
+        timeline = Timeline("baile")
+        at = 0.0
+        for left, right, duration in [(80, -80, 0.5), (-80, 80, 0.5), (90, 90, 0.4), (-70, -70, 0.3)]:
+            timeline.move(at, left, right)
+            timeline.led(at, 0, random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+            timeline.led(at, 1, random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+            at += duration
+        timeline.move(at, 0, 0).led(at, 0, 0, 0, 0)
+        if SOUND_LIBRARY:
+            timeline.melody(at, random.choice(SOUND_LIBRARY))
+        return timeline
+
+    def play_choreography(self, timeline: Timeline, wait: bool = False):
+        """Compila ``timeline`` y la toca en segundo plano, cortando la anterior."""
+        self.choreography.play(timeline.compile())
+        if wait:
+            self.choreography.wait()
+
+    def perform_dance(self, wait: bool = False):
         """Un mini baile reutilizable por el comando 'bailar'."""
         print("💃 Iniciando mini baile...")
-        steps = [
-            (80, -80, 0.5),
-            (-80, 80, 0.5),
-            (90, 90, 0.4),
-            (-70, -70, 0.3),
-        ]
-        for left, right, duration in steps:
-            self.drive(left, right)
-            self.mbot.doRGBLedOnBoard(0, random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-            self.mbot.doRGBLedOnBoard(1, random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-            time.sleep(duration)
-        self.stop()
-        self.mbot.doRGBLedOnBoard(0, 0, 0, 0)
-        self.mbot.doRGBLedOnBoard(1, 0, 0, 0)
-        self.play_random_sound()
+        self.play_choreography(self.dance_timeline(), wait)
 
-    def flash_leds(self, color=(0, 255, 0), duration=0.3):
-        self.mbot.doRGBLedOnBoard(0, *color)
-        self.mbot.doRGBLedOnBoard(1, *color)
-        time.sleep(duration)
-        self.mbot.doRGBLedOnBoard(0, 0, 0, 0)
-        self.mbot.doRGBLedOnBoard(1, 0, 0, 0)
+    def flash_leds(self, color=(0, 255, 0), duration=0.3, wait: bool = False):
+        timeline = Timeline("destello").led(0, 0, *color).led(duration, 0, 0, 0, 0)
+        self.play_choreography(timeline, wait)
 
     # ------------------------------------------------------------------
     def shutdown(self):
+        self.stop_polling()
+        self.sounds.close()
+        self.choreography.close()
+        # La parada final sale siempre, diga lo que diga la sombra
+        self.forget_sent_state()
         self.stop()
         if hasattr(self.mbot, "close"):
             self.mbot.close()
@@ -160,5 +392,5 @@ if __name__ == "__main__":  # pragma: no cover - comprobación manual
     time.sleep(1)
     controller.stop()
     print("Distancia frontal:", controller.read_distance("front"))
-    controller.perform_dance()
+    controller.perform_dance(wait=True)
     controller.shutdown()
@@ -0,0 +1,306 @@
+"""
+Flota de varios mBots multiplexados sobre un único event loop.
+
+Cada robot es un AsyncMBot: su puerto serie se vigila con ``add_reader`` y
+sus notificaciones BLE llegan por bleak, todo en el mismo loop que corre en
+un solo hilo. Por robot no hay hilos ni loops propios, solo corrutinas.
+Hacia fuera cada robot es un MBotController normal, así que los modos
+autónomos funcionan igual con uno que con varios robots.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import wait
+from typing import Dict, Iterable, List, Optional
+
+from ..protocols.async_mbot import AsyncMBot
+from ..protocols.link_setup import usb_candidate_ports
+from ..protocols.mbot_original_protocol import SENSOR_RETRIES, USB_BAUDRATE
+from .mbot_controller import MBotController
+
+FLEET_CONNECT_TIMEOUT = 20.0
+# Margen sobre el timeout del sensor al esperar desde otro hilo
+FLEET_REPLY_MARGIN = 1.0
+# Al apagar, lo que se espera a que salgan las paradas antes de desconectar
+FLEET_STOP_TIMEOUT = 1.0
+
+
+class FleetMBot:
+    """Adaptador síncrono de un AsyncMBot de la flota.
+
+    Ofrece la misma API ``do*``/``get_ultrasonic_*`` que MBotOriginalProtocol
+    para que MBotController lo use tal cual. Los comandos se encolan en el loop
+    sin esperar; las lecturas solo bloquean al hilo que pregunta.
+    """
+
+    def __init__(self, fleet, name, mbot):
+        self.name = name
+        self.connection_type = mbot.connection_type
+        self.firmware_version = mbot.firmware_version
+        self._fleet = fleet
+        self._mbot = mbot
+        self.commands_sent = 0
+        self.command_errors = 0
+        # Comandos encolados en el loop que aún no han salido
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def _command(self, coro):
+        self.commands_sent += 1
+        future = self._fleet.submit(coro)
+        with self._in_flight_lock:
+            self._in_flight.add(future)
+        future.add_done_callback(self._check_command)
+
+    def _check_command(self, future):
+        with self._in_flight_lock:
+            self._in_flight.discard(future)
+        if future.cancelled() or future.exception() is not None or not future.result():
+            self.command_errors += 1
+
+    def flush(self, timeout=FLEET_STOP_TIMEOUT):
+        """Espera a que salgan los comandos ya encolados; devuelve si salieron todos."""
+        with self._in_flight_lock:
+            pending = list(self._in_flight)
+        return not wait(pending, timeout=timeout).not_done
+
+    def _reply_budget(self, timeout, retries):
+        if timeout is not None:
+            return timeout + FLEET_REPLY_MARGIN
+        return self._mbot.rtt.worst_case(retries) + FLEET_REPLY_MARGIN
+
+    # ------------------------------------------------------------------
+    # API compatible con MBotOriginalProtocol
+    # ------------------------------------------------------------------
+    def doMove(self, left_speed, right_speed):
+        self._command(self._mbot.move(left_speed, right_speed))
+
+    def doRGBLedOnBoard(self, index, red, green, blue):
+        self._command(self._mbot.set_led(index, red, green, blue))
+
+    def doBuzzer(self, frequency, duration=0):
+        self._command(self._mbot.buzz(frequency, duration))
+
+    def get_ultrasonic_distance(self, port=1, slot=3, timeout=None, retries=SENSOR_RETRIES):
+        return self._fleet.run(
+            self._mbot.read_ultrasonic(port, slot, timeout, retries), self._reply_budget(timeout, retries)
+        )
+
+    def get_ultrasonic_distances(self, sensors, timeout=None, retries=SENSOR_RETRIES):
+        """Todas las peticiones en una sola escritura, como en MBotOriginalProtocol."""
+        return self.read_sensors([("ultrasonic", port, slot) for port, slot in sensors], timeout, retries)
+
+    def read_sensors(self, queries, timeout=None, retries=SENSOR_RETRIES):
+        queries = list(queries)
+        return self._fleet.run(self._mbot.read_sensors(queries, timeout, retries), self._reply_budget(timeout, retries))
+
+    def close(self):
+        # La parada final tiene que salir antes de desconectar (en BLE perdería la carrera)
+        self.flush()
+        self._fleet.run(self._mbot.close(), FLEET_STOP_TIMEOUT + FLEET_REPLY_MARGIN)
+
+    def metrics(self):
+        """Métricas del AsyncMBot más los comandos encolados desde fuera."""
+        snapshot = self._mbot.metrics_snapshot()
+        snapshot["connection_type"] = self.connection_type
+        snapshot["commands_sent"] = self.commands_sent
+        snapshot["command_errors"] = self.command_errors
+        return snapshot
+
+
+class MBotFleet:
+    """Conecta N robots a la vez y los maneja desde un único loop.
+
+    ``connect`` recibe especificaciones como::
+
+        [{"name": "rojo", "connection_type": "usb", "port": "/dev/ttyUSB0"},
+         {"name": "azul", "connection_type": "ble", "ble_address": "AA:BB:..."}]
+
+    Los USB sin ``port`` se reparten entre los puertos detectados que no haya
+    pedido nadie; los BLE necesitan dirección. ``fleet["rojo"]`` devuelve el
+    MBotController de ese robot.
+    """
+
+    def __init__(self):
+        self.robots: Dict[str, MBotController] = {}
+        self.failed: Dict[str, str] = {}
+        self._transports: Dict[str, FleetMBot] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="mbot-fleet", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    # ------------------------------------------------------------------
+    def submit(self, coro):
+        """Programa ``coro`` en el loop de la flota y devuelve su Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout=None):
+        """Ejecuta ``coro`` en el loop de la flota y espera su resultado."""
+        return self.submit(coro).result(timeout)
+
+    # ------------------------------------------------------------------
+    # Conexión
+    # ------------------------------------------------------------------
+    def connect(self, specs: Iterable[dict], timeout: float = FLEET_CONNECT_TIMEOUT) -> Dict[str, MBotController]:
+        """Conecta todos los robots en paralelo; los que fallan quedan en ``failed``."""
+        prepared = self._prepare(list(specs))
+        results = self.run(self._connect_all(prepared, timeout), timeout + FLEET_REPLY_MARGIN)
+        for spec, result in zip(prepared, results):
+            name = spec["name"]
+            if isinstance(result, AsyncMBot):
+                transport = FleetMBot(self, name, result)
+                controller = MBotController(result.connection_type, mbot=transport)
+                if spec.get("sensor_ports") is not None:
+                    controller.sensor_ports = spec["sensor_ports"]
+                self._transports[name] = transport
+                self.robots[name] = controller
+                print(f"✅ {name} conectado via {result.connection_type}")
+            else:
+                self.failed[name] = result
+                print(f"❌ {name}: {result}")
+        return self.robots
+
+    def _prepare(self, specs: List[dict]) -> List[dict]:
+        claimed = {spec.get("port") for spec in specs if spec.get("port")}
+        free_ports: Optional[List[str]] = None
+        prepared = []
+        names = set(self.robots)
+        for position, spec in enumerate(specs, len(self.robots) + 1):
+            spec = dict(spec)
+            name = spec.setdefault("name", f"mbot{position}")
+            if name in names:
+                raise ValueError(f"Nombre de robot repetido en la flota: {name}")
+            names.add(name)
+
+            connection_type = spec.get("connection_type", "usb")
+            if connection_type == "ble":
+                connection_type = "bluetooth"
+            if connection_type not in ("usb", "bluetooth"):
+                raise ValueError(f"{name}: tipo de conexión no soportado en flota: {connection_type}")
+            spec["connection_type"] = connection_type
+
+            if connection_type == "usb" and not spec.get("port"):
+                if free_ports is None:
+                    free_ports = [port for port in usb_candidate_ports() if port not in claimed]
+                spec["port"] = free_ports.pop(0) if free_ports else None
+            elif connection_type == "bluetooth" and not spec.get("ble_address"):
+                raise ValueError(f"{name}: los robots BLE de una flota necesitan 'ble_address'")
+            prepared.append(spec)
+        return prepared
+
+    async def _connect_all(self, specs, timeout):
+        return await asyncio.gather(*(self._connect_one(spec, timeout) for spec in specs))
+
+    async def _connect_one(self, spec, timeout):
+        if spec["connection_type"] == "usb" and not spec.get("port"):
+            return "no queda ningún puerto USB libre"
+        try:
+            return await asyncio.wait_for(
+                AsyncMBot.connect(
+                    spec["connection_type"],
+                    port=spec.get("port"),
+                    baudrate=spec.get("baudrate", USB_BAUDRATE),
+                    ble_address=spec.get("ble_address"),
+                    discover=False,
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            return "tiempo de conexión agotado"
+        except (ConnectionError, OSError) as exc:
+            return str(exc)
+
+    # ------------------------------------------------------------------
+    # Acceso a los robots
+    # ------------------------------------------------------------------
+    def __getitem__(self, name) -> MBotController:
+        return self.robots[name]
+
+    def __iter__(self):
+        return iter(self.robots.values())
+
+    def __len__(self):
+        return len(self.robots)
+
+    def broadcast(self, method: str, *args, **kwargs):
+        """Llama ``method`` en el controlador de cada robot y devuelve los resultados."""
+        return {name: getattr(robot, method)(*args, **kwargs) for name, robot in self.robots.items()}
+
+    def stop_all(self):
+        self.broadcast("stop")
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+    def metrics(self) -> dict:
+        """Métricas por robot y agregadas de toda la flota."""
+        per_robot = {name: transport.metrics() for name, transport in self._transports.items()}
+        rtt = [transport._mbot.metrics.sensor_rtt for transport in self._transports.values()]
+        replies = sum(h.count for h in rtt)
+
+        started = time.perf_counter()
+        self.run(asyncio.sleep(0), FLEET_REPLY_MARGIN)
+        loop_lag = time.perf_counter() - started
+
+        return {
+            "robots": len(self.robots),
+            "failed": len(self.failed),
+            "commands_sent": sum(m["commands_sent"] for m in per_robot.values()),
+            "command_errors": sum(m["command_errors"] for m in per_robot.values()),
+            "sensor_requests": sum(m["sensor_requests"] for m in per_robot.values()),
+            "sensor_timeouts": sum(m["sensor_timeouts"] for m in per_robot.values()),
+            "rtt_avg_ms": sum(h.total for h in rtt) / replies * 1000 if replies else 0.0,
+            "rtt_max_ms": max((h.max for h in rtt), default=0.0) * 1000,
+            "loop_lag_ms": loop_lag * 1000,
+            "per_robot": per_robot,
+        }
+
+    # ------------------------------------------------------------------
+    def shutdown(self):
+        """Para y desconecta todos los robots y termina el loop de la flota.
+
+        Primero salen las paradas de todos a la vez; luego cada controlador
+        cierra sus hilos (sondeo, melodías, coreografías) y su transporte.
+        """
+        if self._loop.is_closed():
+            return
+        self.stop_all()
+        for transport in self._transports.values():
+            transport.flush()
+        try:
+            for name, controller in self.robots.items():
+                try:
+                    controller.shutdown()
+                except Exception as exc:
+                    print(f"⚠️ {name}: error al apagar: {exc}")
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2.0)
+            self._loop.close()
+        self.robots.clear()
+        self._transports.clear()
+        print("🔌 Flota desconectada")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.shutdown()
+
+
+if __name__ == "__main__":  # pragma: no cover - comprobación manual
+    from config import MBOT_FLEET
+
+    with MBotFleet() as fleet:
+        fleet.connect(MBOT_FLEET)
+        fleet.broadcast("drive_forward", 60)
+        time.sleep(1)
+        fleet.stop_all()
+        print("Distancias:", fleet.broadcast("read_distance", "front"))
+        print("Métricas:", fleet.metrics())
@@ -0,0 +1,208 @@
+"""Muestreo de sensores en segundo plano con buffers circulares por sensor."""
+
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional
+
+SensorSample = namedtuple("SensorSample", "timestamp value")
+
+
+class SensorRing:
+    """Últimas ``capacity`` muestras de un sensor, sin crecer nunca.
+
+    Solo escribe el hilo del poller; cada hueco se sustituye por una tupla
+    completa, así que los lectores de otros hilos no necesitan lock.
+    """
+
+    def __init__(self, capacity: int):
+        self._samples: List[Optional[SensorSample]] = [None] * capacity
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, sample: SensorSample):
+        self._samples[self._next] = sample
+        self._next = (self._next + 1) % len(self._samples)
+        if self._count < len(self._samples):
+            self._count += 1
+
+    def latest(self) -> Optional[SensorSample]:
+        if not self._count:
+            return None
+        return self._samples[self._next - 1]
+
+    def samples(self) -> List[SensorSample]:
+        """Copia de las muestras guardadas, de la más antigua a la más nueva."""
+        start = self._next - self._count
+        return [self._samples[i] for i in range(start, self._next)]
+
+
+class _PolledSensor:
+    def __init__(self, name, port, slot, rate, capacity):
+        self.name = name
+        self.port = port
+        self.slot = slot
+        self.period = 1.0 / rate
+        self.ring = SensorRing(capacity)
+        self.next_due = 0.0
+        self.reads = 0
+        self.misses = 0
+        self.subscribers: List[Callable] = []
+
+
+class SensorPoller:
+    """Hilo que lee cada sensor a su propio ritmo y publica las muestras.
+
+    ``sensors`` mapea nombre -> ``{"port", "slot"}`` y ``rates`` nombre ->
+    Hz. Los sensores que vencen a la vez se piden en una sola tanda con
+    ``get_ultrasonic_distances``; los plazos son absolutos para no derivar.
+    """
+
+    def __init__(self, mbot, sensors: Dict[str, dict], rates: Dict[str, float], capacity: int = 64):
+        self.mbot = mbot
+        self._sensors: Dict[str, _PolledSensor] = {}
+        for name, rate in rates.items():
+            config = sensors.get(name)
+            if config and rate > 0:
+                self._sensors[name] = _PolledSensor(name, config["port"], config["slot"], rate, capacity)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.errors = 0
+
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread or not self._sensors:
+            return self
+        self._stop.clear()
+        now = time.monotonic()
+        for sensor in self._sensors.values():
+            sensor.next_due = now
+        self._thread = threading.Thread(target=self._run, name="sensor-poller", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def polls(self, name: str) -> bool:
+        return self.running and name in self._sensors
+
+    # ------------------------------------------------------------------
+    def _run(self):
+        sensors = list(self._sensors.values())
+        while not self._stop.is_set():
+            now = time.monotonic()
+            due = [sensor for sensor in sensors if sensor.next_due <= now]
+            if due:
+                try:
+                    values = self.mbot.get_ultrasonic_distances([(s.port, s.slot) for s in due])
+                except NotImplementedError as exc:
+                    print(f"⚠️ Sondeo de sensores detenido: {exc}")
+                    return
+                except Exception:
+                    self.errors += 1
+                    values = [None] * len(due)
+                stamp = time.monotonic()
+                for sensor, value in zip(due, values):
+                    sensor.next_due += sensor.period
+                    if sensor.next_due < stamp:
+                        # Nos hemos retrasado: saltamos los plazos perdidos
+                        sensor.next_due = stamp + sensor.period
+                    self._publish(sensor, value, stamp)
+
+            delay = min(sensor.next_due for sensor in sensors) - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+
+    def _publish(self, sensor: _PolledSensor, value, stamp):
+        sensor.reads += 1
+        if value is None:
+            sensor.misses += 1
+            return
+        sample = SensorSample(stamp, value)
+        sensor.ring.append(sample)
+        for callback in sensor.subscribers:
+            try:
+                callback(sensor.name, value, stamp)
+            except Exception as exc:
+                print(f"⚠️ Error en suscriptor de {sensor.name}: {exc}")
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def latest(self, name: str, max_age: Optional[float] = None) -> Optional[SensorSample]:
+        """Última muestra (sin bloquear) o ``None`` si no hay o es más vieja que ``max_age``."""
+        sensor = self._sensors.get(name)
+        sample = sensor.ring.latest() if sensor else None
+        if sample and max_age is not None and time.monotonic() - sample.timestamp > max_age:
+            return None
+        return sample
+
+    def history(self, name: str) -> List[SensorSample]:
+        sensor = self._sensors.get(name)
+        return sensor.ring.samples() if sensor else []
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "reads": sensor.reads,
+                "misses": sensor.misses,
+                "buffered": len(sensor.ring),
+                "rate_hz": 1.0 / sensor.period,
+            }
+            for name, sensor in self._sensors.items()
+        }
+
+    # ------------------------------------------------------------------
+    # Suscripciones
+    # ------------------------------------------------------------------
+    def subscribe(self, name: str, callback: Callable) -> Callable[[], None]:
+        """Llama ``callback(nombre, valor, timestamp)`` con cada muestra nueva.
+
+        Se ejecuta en el hilo del poller, así que debe ser rápido. Devuelve
+        una función que cancela la suscripción.
+        """
+        sensor = self._sensors[name]
+        with self._lock:
+            sensor.subscribers = sensor.subscribers + [callback]
+
+        def unsubscribe():
+            with self._lock:
+                sensor.subscribers = [cb for cb in sensor.subscribers if cb is not callback]
+
+        return unsubscribe
+
+    async def stream(self, name: str, maxsize: int = 16):
+        """Iterador asíncrono de ``SensorSample``; si el consumidor se atrasa se pierden las viejas."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+        def push(sample):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(sample)
+
+        def on_sample(_name, value, stamp):
+            try:
+                loop.call_soon_threadsafe(push, SensorSample(stamp, value))
+            except RuntimeError:
+                pass  # el loop ya se cerró
+
+        unsubscribe = self.subscribe(name, on_sample)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            unsubscribe()
@@ -1,17 +1,44 @@
-"""Implementación mínima de escucha por voz para el modo simplificado."""
+"""Implementación mínima de escucha por voz para el modo simplificado.
 
+La captura y el reconocimiento (que bloquean segundos y van por red)
+corren en un hilo propio; el bucle de control solo recoge eventos de una
+cola acotada con ``poll_events`` sin esperar nunca.
+"""
+
+import queue
+import threading
 import time
-from typing import Optional
+from collections import namedtuple
+from typing import List, Optional
+
+# speech_recognition se importa al crear la interfaz: tarda y puede no estar
+sr = None
+
+# ``kind`` es WAKE o COMMAND; ``text`` es la orden oída (None si no se entendió)
+VoiceEvent = namedtuple("VoiceEvent", "kind text timestamp")
+WAKE = "wake"
+COMMAND = "command"
+
+# Si el control no recoge eventos, los más viejos se descartan
+VOICE_EVENT_QUEUE_SIZE = 8
+# Pausa tras un error del micrófono o del reconocedor antes de reintentar
+VOICE_ERROR_BACKOFF = 1.0
 
-try:
-    import speech_recognition as sr
-except ImportError:  # pragma: no cover - solo ocurre si no está instalado
-    sr = None
+
+def _load_speech_recognition():
+    global sr
+    if sr is None:
+        try:
+            import speech_recognition as sr
+        except ImportError:  # pragma: no cover - solo ocurre si no está instalado
+            return None
+    return sr
 
 
 class VoiceInterface:
-    def __init__(self, wake_word: str, language: str, poll_interval: float, command_timeout: float):
-        if sr is None:
+    def __init__(self, wake_word: str, language: str, poll_interval: float, command_timeout: float,
+                 max_events: int = VOICE_EVENT_QUEUE_SIZE):
+        if _load_speech_recognition() is None:
             raise RuntimeError("SpeechRecognition no está instalado; desactiva VOICE_ENABLED en config.py")
 
         self.wake_word = wake_word.lower()
@@ -22,9 +49,77 @@ class VoiceInterface:
         self.microphone = sr.Microphone()
         self._last_poll = 0.0
 
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=0.3)
+        self.events: queue.Queue = queue.Queue(max_events)
+        self.events_dropped = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Hilo de escucha
+    # ------------------------------------------------------------------
+    def start(self):
+        """Empieza a escuchar en segundo plano (calibra el ruido ambiente al arrancar)."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="voice", daemon=True)
+            self._thread.start()
+        return self
+
+    def poll_events(self) -> List[VoiceEvent]:
+        """Eventos pendientes, del más viejo al más nuevo; nunca bloquea."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _run(self):
+        try:
+            with self.microphone as source:
+                self.recognizer.adjust_for_ambient_noise(source, duration=0.3)
+        except Exception as exc:
+            self.errors += 1
+            print(f"⚠️ No se pudo calibrar el micrófono: {exc}")
+
+        while not self._stop.is_set():
+            try:
+                self._listen_once()
+            except Exception as exc:
+                # Un micrófono que falla no debe dejar la voz muerta en silencio
+                self.errors += 1
+                print(f"⚠️ Error en la escucha por voz: {exc}")
+                if self._stop.wait(VOICE_ERROR_BACKOFF):
+                    return
+
+    def _listen_once(self):
+        wait = self.poll_interval - (time.time() - self._last_poll)
+        if wait > 0 and self._stop.wait(wait):
+            return
+        if not self.listen_for_wake_word() or self._stop.is_set():
+            return
+        self._publish(WAKE)
+        text = self.listen_for_command()
+        if not self._stop.is_set():
+            self._publish(COMMAND, text)
+
+    def _publish(self, kind, text=None):
+        event = VoiceEvent(kind, text, time.monotonic())
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.events_dropped += 1
+                except queue.Empty:
+                    pass
 
+    # ------------------------------------------------------------------
+    # Escucha (bloqueante; la usa el hilo)
+    # ------------------------------------------------------------------
     def ready_to_poll(self) -> bool:
         return (time.time() - self._last_poll) >= self.poll_interval
 
@@ -60,6 +155,9 @@ class VoiceInterface:
             print(f"⚠️ Error reconociendo orden: {exc}")
             return None
 
-    def close(self):
-        # Interface para mantener compatibilidad con el controlador principal
-        pass
\ No newline at end of file
+    def close(self, timeout: float = 0.5):
+        """Para el hilo; si está a mitad de una escucha no se le espera más de ``timeout``."""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
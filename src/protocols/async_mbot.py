@@ -0,0 +1,409 @@
+"""
+Transporte asyncio para el mBot, hermano de MBotOriginalProtocol.
+
+Todo ocurre en el loop del llamante: por USB el descriptor del puerto serie
+se vigila con ``loop.add_reader`` (solo POSIX) y por BLE bleak corre en el
+mismo loop. Así sensores, voz e IA pueden convivir en un único proceso
+asyncio sin hilos intermedios. Comparte con la versión síncrona codec,
+parser, caché de conexión, la contabilidad de peticiones y reintentos
+(pending_requests), la elección de características BLE y los pasos de
+conexión (link_setup: candidatos, handshake USB y caída del enlace BLE).
+"""
+
+import asyncio
+import os
+import time
+
+import serial
+
+from . import codec
+from .connection_cache import store_cached
+from .frame_parser import FrameParser
+from .link_setup import (
+    VersionProbe,
+    ble_candidate_addresses,
+    ble_link_lost,
+    settle_usb_probes,
+    usb_candidate_ports,
+)
+from .metrics import ProtocolMetrics
+from .pending_requests import MISSING, PendingRequests, SensorRead
+from .rtt_estimator import RttEstimator
+from .mbot_original_protocol import (
+    BLE_DEFAULT_MTU,
+    BLE_DIRECT_CONNECT_TIMEOUT,
+    BLE_SCAN_TIMEOUT,
+    BLE_SENSOR_TIMEOUT,
+    BLE_WRITE_CHAR,
+    SENSOR_RETRIES,
+    USB_BAUDRATE,
+    USB_HANDSHAKE_RETRY,
+    USB_HANDSHAKE_TIMEOUT,
+    USB_SENSOR_TIMEOUT,
+    ble_link_settings,
+    is_mbot_advertisement,
+)
+
+
+class AsyncMBot:
+    """mBot con API awaitable: ``move``, ``set_led``, ``buzz`` y ``read_ultrasonic``."""
+
+    def __init__(self):
+        self.connection_type = None
+        self.port = None
+        self.ble_address = None
+        self.firmware_version = None
+        self._loop = None
+        self._serial = None
+        self._fd = None
+        self._write_buffer = bytearray()
+        self._drained = None
+        self._ble_client = None
+        self._ble_lock = None
+        self._ble_write_char = BLE_WRITE_CHAR
+        self._ble_write_response = True
+        self._ble_payload_size = BLE_DEFAULT_MTU - 3
+        self._parser = FrameParser()
+        self.metrics = ProtocolMetrics()
+        self._pending = PendingRequests(self.metrics)
+        self.rtt = RttEstimator(*USB_SENSOR_TIMEOUT)
+
+    @classmethod
+    async def connect(cls, connection_type="usb", port=None, baudrate=USB_BAUDRATE, ble_address=None,
+                      discover=True):
+        """Crea y conecta un mBot; ``connection_type`` como en MBotOriginalProtocol.
+
+        Con ``discover=False`` solo se prueba el ``port``/``ble_address`` dado
+        (sin caché ni escaneo), como necesita una flota con varios robots.
+        """
+        mbot = cls()
+        if connection_type in ("usb", "auto") and await mbot.connect_usb(port, baudrate, discover):
+            return mbot
+        if connection_type in ("bluetooth", "auto") and await mbot.connect_ble(ble_address, discover):
+            return mbot
+        raise ConnectionError("No se pudo conectar al mBot")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    # ------------------------------------------------------------------
+    # USB: add_reader sobre el descriptor del puerto
+    # ------------------------------------------------------------------
+    async def connect_usb(self, port=None, baudrate=USB_BAUDRATE, discover=True):
+        """Sondea los candidatos en paralelo y se queda con el primero que responde."""
+        self._loop = asyncio.get_running_loop()
+        candidates = usb_candidate_ports(port, discover)
+        if not candidates:
+            return False
+
+        idx = self._pending.next_index()
+        probes = [asyncio.ensure_future(self._probe_usb_port(c, baudrate, idx)) for c in candidates]
+        results = []
+        try:
+            for probe in asyncio.as_completed(probes):
+                result = await probe
+                if result is not None:
+                    results.append(result)
+                    if result[2] is not None:
+                        break
+        finally:
+            for probe in probes:
+                probe.cancel()
+            # Un segundo puerto que haya contestado a la vez también entra
+            # en el reparto (y se cierra si no gana)
+            for probe in probes:
+                try:
+                    result = await probe
+                except asyncio.CancelledError:
+                    continue
+                if result is not None and not any(result[1] is other[1] for other in results):
+                    results.append(result)
+
+        winner = settle_usb_probes(results)
+        if winner is None:
+            print(f"🔌 Ningún puerto respondió al handshake ({', '.join(candidates)})")
+            return False
+
+        self.port, self._serial, self.firmware_version = winner
+        self._fd = self._serial.fileno()
+        self._loop.add_reader(self._fd, self._on_serial_readable)
+        self.connection_type = "usb"
+        self.rtt = RttEstimator(*USB_SENSOR_TIMEOUT)
+        if discover:
+            store_cached("usb_port", self.port)
+        print(f"✅ mBot conectado por USB ({self.port}, firmware {self.firmware_version or 'desconocido'})")
+        return True
+
+    async def _probe_usb_port(self, port, baudrate, idx):
+        try:
+            connection = serial.Serial(port, baudrate, timeout=0)
+        except (serial.SerialException, OSError, ValueError):
+            return None
+
+        loop = self._loop
+        probe = VersionProbe(idx, USB_HANDSHAKE_TIMEOUT, USB_HANDSHAKE_RETRY)
+        reply = loop.create_future()
+
+        def on_readable():
+            try:
+                data = connection.read(connection.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError):
+                return
+            version = probe.feed(data)
+            if version is not None and not reply.done():
+                reply.set_result(version)
+
+        fd = connection.fileno()
+        loop.add_reader(fd, on_readable)
+        try:
+            while not probe.expired():
+                if probe.due():
+                    connection.write(probe.request)
+                try:
+                    version = await asyncio.wait_for(asyncio.shield(reply), USB_HANDSHAKE_RETRY)
+                except asyncio.TimeoutError:
+                    continue
+                loop.remove_reader(fd)
+                return port, connection, version
+            if probe.heard:
+                # Contesta en otro formato: candidato de reserva (settle_usb_probes)
+                loop.remove_reader(fd)
+                return port, connection, None
+        except (serial.SerialException, OSError):
+            pass
+        except asyncio.CancelledError:
+            loop.remove_reader(fd)
+            connection.close()
+            raise
+        loop.remove_reader(fd)
+        connection.close()
+        return None
+
+    def _on_serial_readable(self):
+        try:
+            data = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            # Puerto desconectado
+            self._loop.remove_reader(self._fd)
+            self._fail_pending()
+            return
+        self._on_data(data)
+
+    def _write_serial(self, data):
+        """Escribe sin bloquear; lo que no cabe se envía con add_writer."""
+        if self._write_buffer:
+            self._write_buffer += data
+            return
+        try:
+            written = os.write(self._fd, data)
+        except BlockingIOError:
+            written = 0
+        if written < len(data):
+            self._write_buffer += data[written:]
+            self._drained = self._loop.create_future()
+            self._loop.add_writer(self._fd, self._flush_serial)
+
+    def _flush_serial(self):
+        try:
+            written = os.write(self._fd, self._write_buffer)
+        except BlockingIOError:
+            return
+        del self._write_buffer[:written]
+        if not self._write_buffer:
+            self._loop.remove_writer(self._fd)
+            if self._drained and not self._drained.done():
+                self._drained.set_result(None)
+
+    # ------------------------------------------------------------------
+    # BLE: bleak en el loop del llamante
+    # ------------------------------------------------------------------
+    async def connect_ble(self, address=None, discover=True):
+        try:
+            from bleak import BleakClient, BleakScanner
+        except ImportError:
+            print("🔵 Bluetooth LE no disponible")
+            return False
+
+        self._loop = asyncio.get_running_loop()
+        client = None
+        for candidate in ble_candidate_addresses(address, discover):
+            client = BleakClient(candidate, disconnected_callback=self._on_ble_disconnected)
+            try:
+                await client.connect(timeout=BLE_DIRECT_CONNECT_TIMEOUT)
+                self.ble_address = candidate
+                break
+            except Exception:
+                client = None
+
+        if client is None:
+            if not discover:
+                print(f"🔵 mBot BLE {address} no responde")
+                return False
+            device = await BleakScanner.find_device_by_filter(is_mbot_advertisement, timeout=BLE_SCAN_TIMEOUT)
+            if not device:
+                print("🔵 No se encontró mBot BLE")
+                return False
+            client = BleakClient(device, disconnected_callback=self._on_ble_disconnected)
+            await client.connect()
+            self.ble_address = device.address
+
+        self._ble_write_response, notify_char, self._ble_payload_size = ble_link_settings(
+            client, self._ble_write_char
+        )
+        if notify_char:
+            await client.start_notify(notify_char, lambda _sender, data: self._on_data(data))
+
+        self._ble_client = client
+        self._ble_lock = asyncio.Lock()
+        self.connection_type = "bluetooth"
+        self.rtt = RttEstimator(*BLE_SENSOR_TIMEOUT)
+        if discover:
+            store_cached("ble_address", self.ble_address)
+        print(f"✅ mBot conectado por Bluetooth LE ({self.ble_address})")
+        return True
+
+    def _on_ble_disconnected(self, client):
+        """Callback de bleak: el enlace se ha caído (o lo hemos cerrado)"""
+        announce = self.connection_type == "bluetooth"
+        if ble_link_lost(client, self._ble_client, announce,
+                         lambda: self._loop.call_soon_threadsafe(self._fail_pending)):
+            self._ble_client = None
+
+    # ------------------------------------------------------------------
+    # Peticiones y respuestas
+    # ------------------------------------------------------------------
+    def _on_data(self, data):
+        self._parser.feed(data)
+        frame = self._parser.next_frame()
+        while frame:
+            rtt = self._pending.resolve(*frame)
+            if rtt is not None:
+                self.rtt.sample(rtt)
+            frame = self._parser.next_frame()
+
+    def _fail_pending(self):
+        self._pending.fail_all()
+
+    async def _send(self, data, frames=1):
+        metrics = self.metrics
+        start = time.perf_counter()
+        if self.connection_type == "usb" and self._serial:
+            self._write_serial(data)
+            if self._write_buffer:
+                await asyncio.shield(self._drained)
+            metrics.write_time.record(time.perf_counter() - start)
+        elif self.connection_type == "bluetooth" and self._ble_client:
+            # El lock mantiene el orden aunque varias tareas escriban a la vez
+            async with self._ble_lock:
+                size = self._ble_payload_size
+                for offset in range(0, len(data), size):
+                    chunk_start = time.perf_counter()
+                    await self._ble_client.write_gatt_char(
+                        self._ble_write_char,
+                        data[offset:offset + size],
+                        response=self._ble_write_response,
+                    )
+                    metrics.ble_write.record(time.perf_counter() - chunk_start)
+            metrics.write_time.record(time.perf_counter() - start)
+        else:
+            return False
+        metrics.writes += 1
+        metrics.frames_written += frames
+        metrics.bytes_written += len(data)
+        return True
+
+    async def _request_batch(self, requests, timeout):
+        """Una escritura con todas las peticiones y una espera; ``MISSING`` si no llegó."""
+        batch = []
+        frames = bytearray()
+        sent_at = time.perf_counter()
+        for template, args in requests:
+            future = self._loop.create_future()
+            idx = self._pending.register(future, sent_at)
+            batch.append((idx, future))
+            frames += template.build(idx, *args)
+        try:
+            if await self._send(bytes(frames), len(batch)):
+                await asyncio.wait([future for _, future in batch], timeout=timeout)
+            else:
+                # Sin enlace no hay nada que esperar
+                self._fail_pending()
+        finally:
+            for idx, future in batch:
+                if not future.done():
+                    self._pending.forget(idx, future)
+        return [future.result() if not future.cancelled() else MISSING for _, future in batch]
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    async def _command(self, kind, data):
+        start = time.perf_counter()
+        sent = await self._send(data)
+        if sent:
+            self.metrics.commands_queued += 1
+            self.metrics.record_command(kind, time.perf_counter() - start)
+        return sent
+
+    async def move(self, left_speed, right_speed):
+        return await self._command("move", codec.encode_move(left_speed, right_speed))
+
+    async def set_led(self, index, red, green, blue):
+        return await self._command("led", codec.encode_rgb_led_onboard(index, red, green, blue))
+
+    async def buzz(self, frequency, duration=0):
+        return await self._command("buzzer", codec.encode_buzzer(frequency, duration))
+
+    async def read_sensors(self, queries, timeout=None, retries=SENSOR_RETRIES):
+        """Como ``MBotOriginalProtocol.read_sensors``: una escritura y una espera por tanda.
+
+        Plazos y reintentos los decide ``SensorRead``, igual que en la versión
+        síncrona.
+        """
+        read = SensorRead(queries, timeout, retries, self.metrics, self.rtt)
+        batch = read.next_batch()
+        while batch:
+            read.complete(await self._request_batch(*batch))
+            batch = read.next_batch()
+        return read.results
+
+    async def read_sensor(self, kind, *args, timeout=None, retries=SENSOR_RETRIES):
+        return (await self.read_sensors([(kind,) + args], timeout, retries))[0]
+
+    async def read_ultrasonic(self, port=1, slot=3, timeout=None, retries=SENSOR_RETRIES):
+        """Distancia en cm o ``None``; varias lecturas con ``gather`` viajan a la vez."""
+        return await self.read_sensor("ultrasonic", port, slot, timeout=timeout, retries=retries)
+
+    def metrics_snapshot(self):
+        """Contadores e histogramas más el estado del parser, de una vez."""
+        snapshot = self.metrics.snapshot()
+        snapshot["frames_parsed"] = self._parser.frames_parsed
+        snapshot["resync_bytes"] = self._parser.discarded_bytes
+        snapshot["requests_in_flight"] = len(self._pending)
+        snapshot["rtt"] = self.rtt.snapshot()
+        return snapshot
+
+    async def close(self):
+        if self.connection_type == "usb" and self._serial:
+            self._loop.remove_reader(self._fd)
+            if self._write_buffer:
+                self._loop.remove_writer(self._fd)
+            self._serial.close()
+            self._serial = None
+        elif self.connection_type == "bluetooth" and self._ble_client:
+            client = self._ble_client
+            self.connection_type = None
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+            self._ble_client = None
+        self._fail_pending()
+        self.connection_type = None
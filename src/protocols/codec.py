@@ -0,0 +1,173 @@
+"""
+Codificador común de tramas ``0xff 0x55`` para todos los transportes.
+
+Cada comando es una plantilla con la cabecera fija precalculada y los campos
+variables empaquetados con un único ``struct.Struct`` (little-endian, como
+espera el firmware). ``build`` devuelve la trama lista para enviar y
+``pack_into`` la escribe directamente en un buffer ya reservado.
+
+Formato: ``ff 55 <len> <idx> <acción> <dispositivo> <datos...>`` donde
+``len`` cuenta todos los bytes que van detrás de él. Las respuestas del
+firmware son ``ff 55 <len> <idx> <tipo> <valor...>``.
+"""
+
+import struct
+
+HEADER = b"\xff\x55"
+
+# Acciones
+ACTION_GET = 0x01
+ACTION_RUN = 0x02
+
+# Dispositivos del firmware de Makeblock
+DEVICE_VERSION = 0x00
+DEVICE_ULTRASONIC = 0x01
+DEVICE_LIGHT = 0x03
+DEVICE_JOYSTICK = 0x05  # movimiento de los dos motores a la vez
+DEVICE_SOUND = 0x07
+DEVICE_RGBLED = 0x08
+DEVICE_MOTOR = 0x0a
+DEVICE_SERVO = 0x0b
+DEVICE_LINE_FOLLOWER = 0x11
+DEVICE_BUTTON_INNER = 0x1f  # botón de la placa
+DEVICE_TONE = 0x22
+
+# Tipos de valor en las respuestas
+TYPE_BYTE = 1
+TYPE_FLOAT = 2
+TYPE_SHORT = 3
+TYPE_STRING = 4
+
+# Puerto/slot de los LEDs de la placa
+ONBOARD_LED_PORT = 0x07
+ONBOARD_LED_SLOT = 0x02
+# Sensores de la placa (mismos puertos que la librería original)
+ONBOARD_LIGHT_PORT = 0x08
+ONBOARD_BUTTON_PORT = 0x07
+
+
+class FrameTemplate:
+    """Comando de escritura (acción RUN) con cabecera fija y campos empaquetados."""
+
+    def __init__(self, device, fields, prefix=b""):
+        body = struct.calcsize("<" + fields) + len(prefix)
+        head = HEADER + bytes([body + 3, 0x00, ACTION_RUN, device]) + bytes(prefix)
+        self.head = head
+        self._struct = struct.Struct("<%ds%s" % (len(head), fields))
+        self.size = self._struct.size
+
+    def build(self, *values):
+        return self._struct.pack(self.head, *values)
+
+    def pack_into(self, buffer, offset, *values):
+        """Escribe la trama en ``buffer[offset:]`` y devuelve el siguiente offset."""
+        self._struct.pack_into(buffer, offset, self.head, *values)
+        return offset + self.size
+
+
+class RequestTemplate:
+    """Petición de lectura (acción GET); el índice se parchea en cada envío."""
+
+    def __init__(self, device, fields=""):
+        body = struct.calcsize("<" + fields)
+        self._head = HEADER + bytes([body + 3])
+        self._tail = bytes([ACTION_GET, device])
+        self._struct = struct.Struct("<3sB2s%s" % fields)
+        self.size = self._struct.size
+
+    def build(self, idx, *values):
+        return self._struct.pack(self._head, idx, self._tail, *values)
+
+    def pack_into(self, buffer, offset, idx, *values):
+        self._struct.pack_into(buffer, offset, self._head, idx, self._tail, *values)
+        return offset + self.size
+
+
+MOVE = FrameTemplate(DEVICE_JOYSTICK, "hh")
+MOTOR = FrameTemplate(DEVICE_MOTOR, "Bh")
+RGB_LED = FrameTemplate(DEVICE_RGBLED, "6B")
+RGB_LED_ONBOARD = FrameTemplate(DEVICE_RGBLED, "4B", prefix=bytes([ONBOARD_LED_PORT, ONBOARD_LED_SLOT]))
+BUZZER = FrameTemplate(DEVICE_TONE, "hh")
+SERVO = FrameTemplate(DEVICE_SERVO, "3B")
+
+VERSION_REQUEST = RequestTemplate(DEVICE_VERSION)
+ULTRASONIC_REQUEST = RequestTemplate(DEVICE_ULTRASONIC, "BB")
+LINE_FOLLOWER_REQUEST = RequestTemplate(DEVICE_LINE_FOLLOWER, "B")
+LIGHT_REQUEST = RequestTemplate(DEVICE_LIGHT, "B")
+SOUND_REQUEST = RequestTemplate(DEVICE_SOUND, "B")
+# El firmware devuelve ``clave XOR pulsado``; con clave 0 es 1 si está pulsado
+BUTTON_REQUEST = RequestTemplate(DEVICE_BUTTON_INNER, "BB")
+
+# Sensores legibles por nombre: plantilla, argumentos por defecto y tipo Python
+SENSOR_REQUESTS = {
+    "ultrasonic": (ULTRASONIC_REQUEST, (1, 3), float),
+    "line_follower": (LINE_FOLLOWER_REQUEST, (2,), int),
+    "light": (LIGHT_REQUEST, (ONBOARD_LIGHT_PORT,), float),
+    "sound": (SOUND_REQUEST, (3,), float),
+    "button": (BUTTON_REQUEST, (ONBOARD_BUTTON_PORT, 0), bool),
+}
+
+
+def encode_move(left_speed, right_speed):
+    """Velocidades con signo; el motor izquierdo va montado al revés."""
+    return MOVE.build(-left_speed, right_speed)
+
+
+def encode_motor(port, speed):
+    return MOTOR.build(port, speed)
+
+
+def encode_rgb_led(port, slot, index, red, green, blue):
+    return RGB_LED.build(port, slot, index, red, green, blue)
+
+
+def encode_rgb_led_onboard(index, red, green, blue):
+    return RGB_LED_ONBOARD.build(index, red, green, blue)
+
+
+def encode_buzzer(frequency, duration=0):
+    return BUZZER.build(frequency, duration)
+
+
+def encode_servo(port, slot, angle):
+    return SERVO.build(port, slot, angle)
+
+
+def encode_version_request(idx):
+    return VERSION_REQUEST.build(idx)
+
+
+def encode_ultrasonic_request(idx, port, slot):
+    return ULTRASONIC_REQUEST.build(idx, port, slot)
+
+
+def sensor_request(query):
+    """``"light"`` o ``("ultrasonic", 2, 3)`` -> ``(plantilla, argumentos, tipo)``."""
+    if isinstance(query, str):
+        query = (query,)
+    kind, args = query[0], tuple(query[1:])
+    try:
+        template, defaults, convert = SENSOR_REQUESTS[kind]
+    except KeyError:
+        raise ValueError(f"Sensor desconocido: {kind}") from None
+    return template, args + defaults[len(args):], convert
+
+
+# Respuestas (las genera el firmware; aquí sirven al emulador y a los tests)
+_FLOAT_REPLY = struct.Struct("<3sBBf")
+_SHORT_REPLY = struct.Struct("<3sBBh")
+_BYTE_REPLY = struct.Struct("<3sBBB")
+
+
+def encode_reply(idx, value, data_type=TYPE_FLOAT):
+    """Trama de respuesta para ``value`` con el tipo indicado."""
+    if data_type == TYPE_FLOAT:
+        return _FLOAT_REPLY.pack(HEADER + b"\x06", idx, TYPE_FLOAT, value)
+    if data_type == TYPE_SHORT:
+        return _SHORT_REPLY.pack(HEADER + b"\x04", idx, TYPE_SHORT, value)
+    if data_type == TYPE_BYTE:
+        return _BYTE_REPLY.pack(HEADER + b"\x03", idx, TYPE_BYTE, value)
+    if data_type == TYPE_STRING:
+        text = value.encode("ascii")
+        return HEADER + bytes([len(text) + 3, idx, TYPE_STRING, len(text)]) + text
+    raise ValueError(f"Tipo de respuesta desconocido: {data_type}")
@@ -0,0 +1,38 @@
+"""
+Caché local de la última conexión buena (dirección BLE, puerto USB...).
+
+Es un JSON pequeño en el directorio del usuario; si no se puede leer o
+escribir simplemente se ignora y se vuelve al descubrimiento normal.
+"""
+
+import json
+import os
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".mbot_connection.json")
+
+
+def _load():
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_cached(key):
+    """Devuelve el valor guardado para ``key`` o ``None``."""
+    return _load().get(key)
+
+
+def store_cached(key, value):
+    """Guarda ``value`` para ``key`` sin tocar el resto de entradas."""
+    data = _load()
+    if data.get(key) == value:
+        return
+    data[key] = value
+    try:
+        with open(CACHE_PATH, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+    except OSError:
+        pass
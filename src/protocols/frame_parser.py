@@ -0,0 +1,120 @@
+"""
+Parser incremental de tramas ``0xff 0x55`` del firmware del mBot.
+
+Formato de respuesta: ``ff 55 <len> <idx> <tipo> <payload...>`` donde ``len``
+cuenta los bytes que siguen a él. El parser trabaja sobre un buffer
+preasignado con un desplazamiento de lectura: la basura se salta con una
+sola búsqueda de cabecera y los valores se decodifican en su sitio, sin
+copiar la trama.
+"""
+
+import struct
+
+HEADER = b"\xff\x55"
+
+_FLOAT = struct.Struct("<f")
+_SHORT = struct.Struct("<h")
+
+
+def decode_value(data_type, buffer, offset, size):
+    """Decodifica el valor de ``size`` bytes en ``buffer[offset:]`` según su tipo."""
+    if data_type == 1 and size >= 1:
+        return buffer[offset]
+    if data_type == 2 and size >= 4:
+        return _FLOAT.unpack_from(buffer, offset)[0]
+    if data_type == 3 and size >= 2:
+        return _SHORT.unpack_from(buffer, offset)[0]
+    if data_type == 4 and size >= 1:
+        # Cadena: longitud + caracteres (p. ej. la versión del firmware)
+        length = min(buffer[offset], size - 1)
+        return bytes(buffer[offset + 1:offset + 1 + length]).decode("ascii", "replace")
+    return None
+
+
+class FrameParser:
+    """Buffer de recepción con offsets de lectura/escritura.
+
+    Los bytes consumidos no se borran uno a uno: se avanza ``_start`` y solo
+    se compacta (una copia de lo pendiente) cuando falta sitio al final.
+    """
+
+    def __init__(self, capacity=4096):
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self.frames_parsed = 0
+        self.discarded_bytes = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def feed(self, data):
+        """Añade bytes recibidos al buffer."""
+        size = len(data)
+        if not size:
+            return
+        if self._end + size > len(self._buffer):
+            self._make_room(size)
+        self._view[self._end:self._end + size] = data
+        self._end += size
+
+    def _make_room(self, size):
+        pending = self._end - self._start
+        if pending + size > len(self._buffer):
+            capacity = len(self._buffer)
+            while pending + size > capacity:
+                capacity *= 2
+            self._view.release()
+            new_buffer = bytearray(capacity)
+            new_buffer[:pending] = self._buffer[self._start:self._end]
+            self._buffer = new_buffer
+            self._view = memoryview(self._buffer)
+        else:
+            self._view[:pending] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = pending
+
+    def next_frame(self):
+        """Devuelve ``(idx, valor)`` de la siguiente trama completa o ``None``."""
+        buffer = self._buffer
+        while self._end - self._start >= 3:
+            header = buffer.find(HEADER, self._start, self._end)
+            if header < 0:
+                # Conservamos un posible 0xff final que sea media cabecera
+                keep = 1 if buffer[self._end - 1] == 0xff else 0
+                self.discarded_bytes += self._end - self._start - keep
+                self._start = self._end - keep
+                return None
+            if header > self._start:
+                self.discarded_bytes += header - self._start
+                self._start = header
+                if self._end - self._start < 3:
+                    return None
+
+            length = buffer[self._start + 2]
+            if length < 2:
+                # Cabecera falsa: saltamos el 0xff y seguimos buscando
+                self.discarded_bytes += 1
+                self._start += 1
+                continue
+
+            total = length + 3
+            if self._end - self._start < total:
+                return None
+
+            frame_start = self._start
+            self._start += total
+            if self._start == self._end:
+                self._start = self._end = 0
+
+            self.frames_parsed += 1
+            idx = buffer[frame_start + 3]
+            data_type = buffer[frame_start + 4]
+            value = decode_value(data_type, buffer, frame_start + 5, length - 2)
+            return idx, value
+
+        return None
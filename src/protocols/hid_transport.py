@@ -0,0 +1,68 @@
+"""
+Dongle 2.4G de Makeblock por HID (hidapi).
+
+El dongle intercambia informes de 64 bytes: el primero indica cuántos bytes
+útiles lleva el informe y el resto son bytes del protocolo ``0xff 0x55``
+tal cual, sin respetar los límites de trama. Al escribir se antepone el
+ID de informe 0, como hace la librería original.
+"""
+
+HID_VENDOR_ID = 0x0416
+HID_PRODUCT_ID = 0xffff
+HID_REPORT_SIZE = 64
+# Un byte del informe es la longitud
+HID_PAYLOAD_SIZE = HID_REPORT_SIZE - 1
+HID_READ_TIMEOUT_MS = 100
+
+
+def open_hid_device(vendor_id=HID_VENDOR_ID, product_id=HID_PRODUCT_ID):
+    """Abre el dongle; ``None`` si falta hidapi o no está enchufado."""
+    try:
+        import hid
+    except ImportError:
+        print("📡 hidapi no disponible (pip install hidapi)")
+        return None
+
+    device = hid.device()
+    try:
+        device.open(vendor_id, product_id)
+    except (OSError, IOError):
+        return None
+    return device
+
+
+def pack_chunks(frames, size):
+    """Agrupa tramas completas en bloques de hasta ``size`` bytes.
+
+    Una trama solo se parte si no cabe entera en un bloque vacío; el parser
+    del otro lado la recompone.
+    """
+    chunks = []
+    current = bytearray()
+    for frame in frames:
+        if current and len(current) + len(frame) > size:
+            chunks.append(bytes(current))
+            current = bytearray()
+        current += frame
+        while len(current) > size:
+            chunks.append(bytes(current[:size]))
+            del current[:size]
+    if current:
+        chunks.append(bytes(current))
+    return chunks
+
+
+def build_report(chunk):
+    """Informe listo para ``device.write``: ID 0, longitud, datos y relleno."""
+    report = bytearray(HID_REPORT_SIZE + 1)
+    report[1] = len(chunk)
+    report[2:2 + len(chunk)] = chunk
+    return report
+
+
+def report_payload(report):
+    """Bytes útiles de un informe leído (``b""`` si viene vacío)."""
+    if not report:
+        return b""
+    length = min(report[0], len(report) - 1)
+    return bytes(report[1:1 + length])
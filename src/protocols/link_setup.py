@@ -0,0 +1,114 @@
+"""
+Pasos de conexión comunes a MBotOriginalProtocol y AsyncMBot: qué puertos
+y direcciones probar, el handshake de versión por USB y qué hacer cuando
+bleak avisa de que el enlace se ha caído.
+
+Nada aquí hace E/S: cada transporte abre, escribe y lee a su manera (hilos
+o ``add_reader``) y solo delega las decisiones.
+"""
+
+import time
+
+import serial.tools.list_ports
+
+from . import codec
+from .connection_cache import load_cached
+from .frame_parser import FrameParser
+
+
+def usb_candidate_ports(preferred=None, discover=True):
+    """Puerto preferido, último bueno y los que parecen un mBot, sin repetir.
+
+    Con ``discover=False`` solo el preferido (una flota reparte los suyos).
+    """
+    if not discover:
+        return [preferred] if preferred else []
+    candidates = []
+    for port in (preferred, load_cached("usb_port")):
+        if port and port not in candidates:
+            candidates.append(port)
+    for port in serial.tools.list_ports.comports():
+        if "USB" in port.description or "CH340" in port.description:
+            if port.device not in candidates:
+                candidates.append(port.device)
+    return candidates
+
+
+def ble_candidate_addresses(preferred=None, discover=True):
+    """Dirección configurada y última buena conocida, sin repetir."""
+    cached = load_cached("ble_address") if discover else None
+    return list(dict.fromkeys(address for address in (preferred, cached) if address))
+
+
+class VersionProbe:
+    """Handshake de un puerto: repite la petición de versión hasta que conteste.
+
+    Al abrir el puerto la placa se reinicia, así que la petición se reenvía
+    cada ``retry`` segundos hasta ``timeout``. ``feed`` recibe lo leído y
+    devuelve la versión en cuanto llega la respuesta con nuestro índice;
+    ``heard`` dice si el puerto ha enviado algo, aunque no se entienda.
+    """
+
+    def __init__(self, idx, timeout, retry):
+        self.idx = idx
+        self.request = codec.encode_version_request(idx)
+        self.retry = retry
+        self._parser = FrameParser(256)
+        self._deadline = time.monotonic() + timeout
+        self._next_request = 0.0
+        self.heard = False
+
+    def expired(self):
+        return time.monotonic() >= self._deadline
+
+    def due(self):
+        """True si toca (re)enviar la petición; reprograma la siguiente."""
+        now = time.monotonic()
+        if now < self._next_request:
+            return False
+        self._next_request = now + self.retry
+        return True
+
+    def feed(self, data):
+        if data:
+            self.heard = True
+        self._parser.feed(data)
+        frame = self._parser.next_frame()
+        while frame:
+            if frame[0] == self.idx:
+                return frame[1]
+            frame = self._parser.next_frame()
+        return None
+
+
+def settle_usb_probes(results):
+    """Elige entre los ``(puerto, conexión, versión)`` de los sondeos, en orden de llegada.
+
+    Gana el primero que contestó al handshake. Si ninguno lo hizo, el primero
+    que al menos envió datos (versión None): un firmware que responde en otro
+    formato se sigue aceptando, como antes del handshake, pero avisando. Los
+    puertos mudos nunca se eligen. El resto de conexiones se cierran.
+    """
+    answered = [result for result in results if result[2] is not None]
+    chosen = answered[0] if answered else (results[0] if results else None)
+    for result in results:
+        if result is not chosen:
+            result[1].close()
+    if chosen is not None and chosen[2] is None:
+        print(f"⚠️ {chosen[0]} envía datos pero no contesta a la petición de versión: se usa sin verificar")
+    return chosen
+
+
+def ble_link_lost(client, active_client, announce, fail_pending):
+    """Parte común del ``disconnected_callback`` de bleak.
+
+    Devuelve False si ``client`` no es el enlace activo (un intento de
+    conexión directa que falló). Si lo es, avisa cuando ``announce`` y
+    termina ya con None las lecturas en vuelo en vez de agotar su plazo.
+    """
+    if client is not active_client:
+        return False
+    if announce:
+        print("🔵 mBot BLE desconectado")
+    fail_pending()
+    return True
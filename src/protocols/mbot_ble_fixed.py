@@ -6,16 +6,13 @@ mBot BLE con protocolo de parada corregido
 import signal
 import sys
 import asyncio
+import importlib.util
 from time import sleep
 import threading
 import serial
 import serial.tools.list_ports
 
-try:
-    from bleak import BleakScanner, BleakClient
-    BLUETOOTH_AVAILABLE = True
-except ImportError:
-    BLUETOOTH_AVAILABLE = False
+from . import codec
 
 class MBotBLEFixed:
     def __init__(self, connection_type="auto"):
@@ -54,7 +51,8 @@ class MBotBLEFixed:
 
     def _try_bluetooth_connection(self):
         """Conecta por BLE"""
-        if not BLUETOOTH_AVAILABLE:
+        # Solo se comprueba que exista: bleak se importa al conectar
+        if importlib.util.find_spec("bleak") is None:
             print("🔵 Bluetooth LE no disponible")
             return False
 
@@ -90,6 +88,7 @@ class MBotBLEFixed:
 
     async def _async_connect(self):
         """Conexión BLE asíncrona"""
+        from bleak import BleakClient, BleakScanner
         try:
             # Buscar mBot
             devices = await BleakScanner.discover(timeout=10.0)
@@ -216,14 +215,7 @@ class MBotBLEFixed:
     # Métodos corregidos para BLE
     def doMove(self, leftSpeed, rightSpeed):
         """Movimiento con protocolo BLE corregido"""
-        if leftSpeed < 0:
-            leftSpeed = 256 + leftSpeed
-        if rightSpeed < 0:
-            rightSpeed = 256 + rightSpeed
-
-        # Protocolo estándar para movimiento
-        message = bytes([0xff, 0x55, 0x7, 0x0, 0x2, 0x5, leftSpeed & 0xFF, rightSpeed & 0xFF])
-        return self.write(message)
+        return self.write(codec.encode_move(leftSpeed, rightSpeed))
 
     def forceStop(self):
         """PARADA FORZADA - Múltiples métodos"""
@@ -259,25 +251,15 @@ class MBotBLEFixed:
 
     def doRGBLedOnBoard(self, index, red, green, blue):
         """LEDs con limpieza automática"""
-        message = bytes([0xff, 0x55, 0x9, 0x0, 0x2, 0x8, 0x7, 0x2, index, red, green, blue])
-        return self.write(message)
+        return self.write(codec.encode_rgb_led_onboard(index, red, green, blue))
 
     def doBuzzer(self, frequency, duration):
         """Buzzer corregido"""
-        freq_high = (frequency >> 8) & 0xFF
-        freq_low = frequency & 0xFF
-        dur_high = (duration >> 8) & 0xFF
-        dur_low = duration & 0xFF
-
-        message = bytes([0xff, 0x55, 0x7, 0x0, 0x2, 0x22, freq_high, freq_low, dur_high, dur_low])
-        return self.write(message)
+        return self.write(codec.encode_buzzer(frequency, duration))
 
     def doMotor(self, port, speed):
         """Motor individual"""
-        if speed < 0:
-            speed = 256 + speed
-        message = bytes([0xff, 0x55, 0x6, 0x0, 0x2, 0xa, port, speed & 0xFF])
-        return self.write(message)
+        return self.write(codec.encode_motor(port, speed))
 
     def emergencyCleanup(self):
         """Limpieza de emergencia completa"""
@@ -6,18 +6,13 @@ mBot Bluetooth LE Controller - Versión simplificada y estable
 import signal
 import sys
 import asyncio
+import importlib.util
 from time import sleep
 import threading
 import serial
 import serial.tools.list_ports
 
-try:
-    from bleak import BleakScanner, BleakClient
-    BLUETOOTH_AVAILABLE = True
-    print("🔵 Bluetooth LE disponible")
-except ImportError:
-    BLUETOOTH_AVAILABLE = False
-    print("⚠️  Bluetooth LE no disponible - solo USB")
+from . import codec
 
 class MBotBLE:
     def __init__(self, connection_type="auto"):
@@ -59,7 +54,8 @@ class MBotBLE:
 
     def _try_bluetooth_connection(self):
         """Intenta conectar por BLE usando un thread separado"""
-        if not BLUETOOTH_AVAILABLE:
+        # Solo se comprueba que exista: bleak se importa al conectar
+        if importlib.util.find_spec("bleak") is None:
             print("🔵 Bluetooth LE no disponible")
             return False
 
@@ -100,6 +96,7 @@ class MBotBLE:
 
     async def _async_connect(self):
         """Conexión BLE asíncrona"""
+        from bleak import BleakClient
         try:
             # Buscar mBot
             print("🔍 Escaneando dispositivos BLE...")
@@ -136,6 +133,7 @@ class MBotBLE:
 
     async def _find_mbot_ble(self):
         """Busca dispositivos mBot BLE"""
+        from bleak import BleakScanner
         try:
             devices = await BleakScanner.discover(timeout=10.0)
 
@@ -287,47 +285,27 @@ class MBotBLE:
     # Métodos del mBot
     def doMove(self, leftSpeed, rightSpeed):
         """Mueve el robot"""
-        # Convertir a signed byte si es necesario
-        if leftSpeed < 0:
-            leftSpeed = 256 + leftSpeed
-        if rightSpeed < 0:
-            rightSpeed = 256 + rightSpeed
-
-        message = bytes([0xff, 0x55, 0x7, 0x0, 0x2, 0x5, 0xa, leftSpeed & 0xFF, rightSpeed & 0xFF])
-        return self.write(message)
+        return self.write(codec.encode_move(leftSpeed, rightSpeed))
 
     def doRGBLedOnBoard(self, index, red, green, blue):
         """Controla LED RGB de la placa"""
-        message = bytes([0xff, 0x55, 0x9, 0x0, 0x2, 0x8, 0x7, 0x2, index, red, green, blue])
-        return self.write(message)
+        return self.write(codec.encode_rgb_led_onboard(index, red, green, blue))
 
     def doBuzzer(self, frequency, duration):
         """Hace sonar el buzzer"""
-        # Convertir frecuencia a bytes
-        freq_high = (frequency >> 8) & 0xFF
-        freq_low = frequency & 0xFF
-        dur_high = (duration >> 8) & 0xFF
-        dur_low = duration & 0xFF
-
-        message = bytes([0xff, 0x55, 0x8, 0x0, 0x2, 0x22, freq_high, freq_low, dur_high, dur_low])
-        return self.write(message)
+        return self.write(codec.encode_buzzer(frequency, duration))
 
     def doMotor(self, port, speed):
         """Controla un motor específico"""
-        if speed < 0:
-            speed = 256 + speed
-        message = bytes([0xff, 0x55, 0x6, 0x0, 0x2, 0xa, port, speed & 0xFF])
-        return self.write(message)
+        return self.write(codec.encode_motor(port, speed))
 
     def doRGBLed(self, port, slot, index, red, green, blue):
         """Controla LEDs RGB"""
-        message = bytes([0xff, 0x55, 0x9, 0x0, 0x2, 0x8, port, slot, index, red, green, blue])
-        return self.write(message)
+        return self.write(codec.encode_rgb_led(port, slot, index, red, green, blue))
 
     def doServo(self, port, slot, angle):
         """Controla servo motor"""
-        message = bytes([0xff, 0x55, 0x6, 0x0, 0x2, 0xb, port, slot, angle])
-        return self.write(message)
+        return self.write(codec.encode_servo(port, slot, angle))
 
 def test_mbot_ble():
     """Test del mBot BLE"""
@@ -6,38 +6,201 @@ mBot BLE usando EXACTAMENTE los mismos comandos que la librería original
 import signal
 import sys
 import asyncio
+import itertools
 import struct
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
 from time import sleep
 import threading
 import serial
-import serial.tools.list_ports
 
-try:
-    from bleak import BleakScanner, BleakClient
-    BLUETOOTH_AVAILABLE = True
-except ImportError:
-    BLUETOOTH_AVAILABLE = False
+from . import codec
+from .connection_cache import store_cached
+from .frame_parser import FrameParser
+from .hid_transport import (
+    HID_PAYLOAD_SIZE,
+    HID_READ_TIMEOUT_MS,
+    HID_REPORT_SIZE,
+    build_report,
+    open_hid_device,
+    pack_chunks,
+    report_payload,
+)
+from .link_setup import (
+    VersionProbe,
+    ble_candidate_addresses,
+    ble_link_lost,
+    settle_usb_probes,
+    usb_candidate_ports,
+)
+from .metrics import ProtocolMetrics
+from .pending_requests import MISSING, PendingRequests, SensorRead
+from .rtt_estimator import RttEstimator
+from .wire_trace import TRACE_QUEUED, TRACE_RECEIVED, TRACE_SENT, WireRecorder
+
+# bleak tarda cientos de ms en importarse: solo se carga al elegir BLE
+# (ver _load_bleak). None = todavía no se ha intentado.
+BleakScanner = BleakClient = None
+BLUETOOTH_AVAILABLE = None
+
+# Presupuesto de bytes por segundo para espaciar las escrituras
+# (8N1: 10 bits por byte en el cable serie)
+USB_BAUDRATE = 115200
+
+# En BLE el presupuesto sale del enlace: en cada evento de conexión caben
+# unas pocas escrituras de (MTU - 3) bytes. bleak no expone el intervalo de
+# conexión negociado, así que se configura: 20 ms y 2 paquetes por evento
+# son valores conservadores para el módulo BLE 4.0 del mBot y, con el MTU
+# mínimo, dan 2 kB/s. Si ble_write_stats() muestra escrituras que tardan más
+# que un intervalo, súbelo (o baja los paquetes).
+BLE_CONNECTION_INTERVAL = 0.020
+BLE_PACKETS_PER_EVENT = 2
+
+# Handshake USB: al abrir el puerto la placa se reinicia, así que repetimos la
+# petición de versión hasta que el firmware conteste o se acabe el plazo
+USB_HANDSHAKE_TIMEOUT = 4.0
+USB_HANDSHAKE_RETRY = 0.25
+
+# Características del módulo BLE de Makeblock: escritura y notificación (respuestas)
+BLE_WRITE_CHAR = "0000ffe3-0000-1000-8000-00805f9b34fb"
+BLE_NOTIFY_CHAR = "0000ffe2-0000-1000-8000-00805f9b34fb"
+# MTU mínimo de BLE (3 bytes son cabecera ATT)
+BLE_DEFAULT_MTU = 23
+# Tiempo máximo para escanear y conectar, y para cerrar el hilo BLE. Las
+# direcciones conocidas, el escaneo y la conexión posterior se reparten
+# BLE_CONNECT_TIMEOUT menos BLE_SETUP_MARGIN (notificaciones y MTU)
+BLE_CONNECT_TIMEOUT = 15.0
+BLE_SETUP_MARGIN = 1.0
+BLE_SCAN_TIMEOUT = 10.0
+BLE_DIRECT_CONNECT_TIMEOUT = 3.0
+BLE_SHUTDOWN_TIMEOUT = 2.0
+
+# Plazo de los sensores (inicial, mínimo, máximo) derivado del RTT observado;
+# BLE necesita bastante más margen que el cable
+USB_SENSOR_TIMEOUT = (0.1, 0.02, 0.5)
+BLE_SENSOR_TIMEOUT = (0.5, 0.15, 1.5)
+SENSOR_RETRIES = 2
+
+def is_mbot_advertisement(device, _advertisement_data):
+    name = (device.name or "").lower()
+    return 'makeblock' in name or 'mbot' in name
+
+def ble_link_settings(client, write_char=BLE_WRITE_CHAR):
+    """``(escritura con respuesta, característica de notificación, bytes por escritura)``.
+
+    Sin respuesta si la característica de escritura lo permite; para las
+    notificaciones, la conocida de Makeblock si aparece y si no la primera
+    que notifique (None si no hay ninguna).
+    """
+    write_response = True
+    notify_chars = []
+    for service in client.services:
+        for char in service.characteristics:
+            if char.uuid == write_char:
+                write_response = "write-without-response" not in char.properties
+            if "notify" in char.properties:
+                notify_chars.append(char.uuid)
+    notify_chars.sort(key=lambda uuid: uuid != BLE_NOTIFY_CHAR)
+    mtu = getattr(client, "mtu_size", None) or BLE_DEFAULT_MTU
+    return write_response, (notify_chars[0] if notify_chars else None), max(BLE_DEFAULT_MTU, mtu) - 3
+
+def _load_bleak():
+    """Importa bleak la primera vez que se pide BLE; devuelve si está disponible."""
+    global BleakScanner, BleakClient, BLUETOOTH_AVAILABLE
+    if BLUETOOTH_AVAILABLE is None:
+        try:
+            from bleak import BleakScanner, BleakClient
+            BLUETOOTH_AVAILABLE = True
+        except ImportError:
+            BLUETOOTH_AVAILABLE = False
+    return BLUETOOTH_AVAILABLE
+
+def ble_link_budget(payload_size, connection_interval=BLE_CONNECTION_INTERVAL,
+                    packets_per_event=BLE_PACKETS_PER_EVENT):
+    """Bytes por segundo que admite un enlace BLE con ese MTU e intervalo."""
+    return payload_size * packets_per_event / connection_interval
+
+def _command_kind(channel):
+    """Nombre del tipo de comando para las métricas a partir de su canal."""
+    if isinstance(channel, tuple):
+        return "request" if channel[0] == "seq" else channel[0]
+    return channel
 
 class MBotOriginalProtocol:
-    def __init__(self, connection_type="auto"):
+    def __init__(self, connection_type="auto", ble_address=None, port=None, baudrate=USB_BAUDRATE,
+                 trace_path=None, ble_connection_interval=BLE_CONNECTION_INTERVAL,
+                 ble_packets_per_event=BLE_PACKETS_PER_EVENT):
         """
         mBot usando EXACTAMENTE el protocolo original
+
+        ``ble_address`` (p. ej. MBOT_BLUETOOTH_ADDRESS) se prueba antes que la
+        última dirección buena guardada en caché y que el escaneo. Igual con
+        ``port`` (MBOT_PORT) para USB. Con ``trace_path`` se graba todo el
+        tráfico en ese fichero (ver wire_trace). ``ble_connection_interval``
+        y ``ble_packets_per_event`` fijan el ritmo de escritura por BLE junto
+        con el MTU negociado (ver ble_link_budget).
         """
         signal.signal(signal.SIGINT, self.exit)
         self.exiting = False
         self.connection_type = None
         self.serial = None
+        self.port = port
+        self.baudrate = baudrate or USB_BAUDRATE
+        self.firmware_version = None
+
+        # Dongle 2.4G (HID)
+        self.hid_device = None
 
         # BLE attributes
         self.ble_client = None
         self.ble_device = None
-        self.ble_write_char = "0000ffe3-0000-1000-8000-00805f9b34fb"
+        self.ble_address = ble_address
+        self.ble_write_char = BLE_WRITE_CHAR
+        self.ble_notify_char = None
+        self.ble_write_response = True
+        self.ble_payload_size = BLE_DEFAULT_MTU - 3
+        self.ble_connection_interval = ble_connection_interval
+        self.ble_packets_per_event = ble_packets_per_event
         self.ble_connected = False
         self.ble_thread = None
         self.ble_loop = None
-        self._request_index = 1
-        self._serial_buffer = bytearray()
+        # El hilo BLE avisa cuando termina el intento de conexión; _ble_stop
+        # (asyncio.Event del loop BLE) lo despierta para desconectar
+        self._ble_ready = threading.Event()
+        self._ble_stop = None
+        self._ble_task = None
+        self._parser = FrameParser()
+        self._reader_thread = None
+
+        # Cola de salida: un hueco por canal, el comando más nuevo gana
+        self._outbox = {}
+        self._outbox_cond = threading.Condition()
+        self._outbox_seq = itertools.count()
+        self._writer_thread = None
+        self._writer_stop = False
+        self._next_write_at = 0.0
+        self._bytes_per_second = USB_BAUDRATE / 10
+
+        # Contadores e histogramas de latencia (ver metrics_snapshot)
+        self.metrics = ProtocolMetrics()
+        # Peticiones en vuelo: índice -> Future que completa el hilo lector
+        self._pending = PendingRequests(self.metrics)
+        # RTT suavizado de los sensores; se ajusta al transporte al conectar
+        self.rtt = RttEstimator(*USB_SENSOR_TIMEOUT)
+
+        # Envío BLE: tarea emisora en el loop BLE (sus escrituras van a metrics)
+        self._ble_send_queue = None
+        self._ble_sender = None
+
+        # Grabación opcional del tráfico (None = desactivada)
+        self._trace = None
+        if trace_path:
+            self.start_trace(trace_path)
+
+        if connection_type == "ble":
+            connection_type = "bluetooth"
+        if connection_type not in ("auto", "bluetooth", "usb", "hid"):
+            raise ValueError(f"Tipo de conexión desconocido: {connection_type!r}")
 
         print(f"🤖 Iniciando mBot con protocolo ORIGINAL (modo: {connection_type})")
 
@@ -47,6 +210,8 @@ class MBotOriginalProtocol:
                 pass
             elif self._try_usb_connection():
                 pass
+            elif self._try_hid_connection():
+                pass
             else:
                 raise Exception("No se pudo conectar al mBot")
         elif connection_type == "bluetooth":
@@ -55,29 +220,40 @@ class MBotOriginalProtocol:
         elif connection_type == "usb":
             if not self._try_usb_connection():
                 raise Exception("No se pudo conectar por USB")
+        elif connection_type == "hid":
+            if not self._try_hid_connection():
+                raise Exception("No se pudo conectar por el dongle 2.4G")
 
     def _try_bluetooth_connection(self):
         """Conecta por BLE"""
-        if not BLUETOOTH_AVAILABLE:
+        if not _load_bleak():
             print("🔵 Bluetooth LE no disponible")
             return False
 
         try:
             print("🔵 Iniciando conexión Bluetooth LE...")
 
+            self._ble_ready.clear()
             self.ble_thread = threading.Thread(target=self._run_ble_connection, daemon=True)
             self.ble_thread.start()
 
-            # Esperar conexión
-            for _ in range(30):
-                if self.ble_connected:
-                    self.connection_type = "bluetooth"
-                    print("✅ mBot conectado por Bluetooth LE")
-                    return True
-                sleep(0.5)
+            # El hilo BLE marca _ble_ready en cuanto conecta o se rinde
+            if not self._ble_ready.wait(timeout=BLE_CONNECT_TIMEOUT):
+                print("🔵 Timeout en conexión Bluetooth LE")
+                self._abort_ble_connection()
+                return False
 
-            print("🔵 Timeout en conexión Bluetooth LE")
-            return False
+            if not self.ble_connected:
+                return False
+
+            self.connection_type = "bluetooth"
+            self._bytes_per_second = ble_link_budget(
+                self.ble_payload_size, self.ble_connection_interval, self.ble_packets_per_event
+            )
+            self.rtt = RttEstimator(*BLE_SENSOR_TIMEOUT)
+            self._start_writer()
+            print("✅ mBot conectado por Bluetooth LE")
+            return True
 
         except Exception as e:
             print(f"🔵 Error en conexión BLE: {e}")
@@ -88,174 +264,649 @@ class MBotOriginalProtocol:
         try:
             self.ble_loop = asyncio.new_event_loop()
             asyncio.set_event_loop(self.ble_loop)
-            self.ble_loop.run_until_complete(self._async_connect())
+            self._ble_task = self.ble_loop.create_task(self._async_connect())
+            self.ble_loop.run_until_complete(self._ble_task)
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
             print(f"🔵 Error en thread BLE: {e}")
+        finally:
+            self._ble_ready.set()
+
+    def _abort_ble_connection(self):
+        """El intento BLE no terminó a tiempo: se cancela y se espera al hilo.
+
+        Así no conecta más tarde, cuando ya se ha caído a USB o al dongle y
+        sus notificaciones competirían por el mismo parser.
+        """
+        loop, task = self.ble_loop, self._ble_task
+        if loop and task and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # el loop acaba de cerrarse
+        if self.ble_thread and self.ble_thread.is_alive():
+            self.ble_thread.join(timeout=BLE_SHUTDOWN_TIMEOUT)
+        self.ble_connected = False
 
     async def _async_connect(self):
         """Conexión BLE asíncrona"""
+        self._ble_stop = asyncio.Event()
         try:
-            # Buscar mBot
-            devices = await BleakScanner.discover(timeout=10.0)
-            device = None
-
-            for d in devices:
-                name = d.name or ""
-                if 'makeblock' in name.lower() or 'mbot' in name.lower():
-                    device = d
-                    break
-
-            if not device:
+            self.ble_client = await self._connect_ble_client()
+            if not self.ble_client:
                 print("🔵 No se encontró mBot BLE")
                 return
 
-            print(f"🔵 Conectando a {device.name}...")
-
-            # Conectar
-            self.ble_client = BleakClient(device.address)
-            await self.ble_client.connect()
-
-            if not self.ble_client.is_connected:
-                return
+            notify_char = self._configure_link()
+            await self._subscribe_notifications(notify_char)
+            self._ble_send_queue = asyncio.Queue()
+            self._ble_sender = asyncio.ensure_future(self._ble_sender_loop())
 
-            self.ble_device = device
             self.ble_connected = True
+            self._ble_ready.set()
+            store_cached("ble_address", self.ble_address)
 
-            # Mantener conexión
-            while self.ble_connected and not self.exiting:
-                await asyncio.sleep(0.1)
+            # Sin sondeo: dormimos hasta close() o hasta que se caiga el enlace
+            await self._ble_stop.wait()
+            await self._async_shutdown()
 
+        except asyncio.CancelledError:
+            # Intento abortado por tiempo: no dejamos el enlace abierto
+            await self._async_shutdown()
+            raise
         except Exception as e:
             print(f"🔵 Error en conexión: {e}")
+        finally:
+            self.ble_connected = False
+            self._ble_ready.set()
+
+    async def _connect_ble_client(self):
+        """Conecta directamente a una dirección conocida o escanea hasta el primer mBot
+
+        Todos los pasos comparten un plazo, así que el peor caso cabe en
+        BLE_CONNECT_TIMEOUT.
+        """
+        deadline = time.monotonic() + BLE_CONNECT_TIMEOUT - BLE_SETUP_MARGIN
+
+        def time_left(limit=None):
+            left = deadline - time.monotonic()
+            return left if limit is None else min(limit, left)
+
+        for address in ble_candidate_addresses(self.ble_address):
+            if time_left() <= 0:
+                return None
+            print(f"🔵 Conectando a {address}...")
+            client = BleakClient(address, disconnected_callback=self._on_ble_disconnected)
+            try:
+                await client.connect(timeout=time_left(BLE_DIRECT_CONNECT_TIMEOUT))
+            except Exception as e:
+                print(f"🔵 {address} no responde ({e}), probando otra vía")
+                continue
+            if client.is_connected:
+                self.ble_address = address
+                return client
+
+        # El escaneo termina en el primer anuncio que encaje, no a los 10 s
+        if time_left() <= 0:
+            return None
+        device = await BleakScanner.find_device_by_filter(
+            is_mbot_advertisement, timeout=time_left(BLE_SCAN_TIMEOUT)
+        )
+        if not device or time_left() <= 0:
+            return None
+
+        print(f"🔵 Conectando a {device.name}...")
+        client = BleakClient(device, disconnected_callback=self._on_ble_disconnected)
+        await client.connect(timeout=time_left())
+        if not client.is_connected:
+            return None
+        self.ble_device = device
+        self.ble_address = device.address
+        return client
+
+    def _on_ble_disconnected(self, client):
+        """Callback de bleak: el enlace se ha caído (o lo hemos cerrado)"""
+        if ble_link_lost(client, self.ble_client, not self.exiting, self._fail_pending):
+            self.ble_connected = False
+            self._ble_stop.set()
+
+    async def _async_shutdown(self):
+        """Vacía la cola de envío y desconecta desde el propio loop BLE"""
+        if self._ble_send_queue and self.ble_client and self.ble_client.is_connected:
+            try:
+                await asyncio.wait_for(self._ble_send_queue.join(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+        if self._ble_sender:
+            self._ble_sender.cancel()
+        if self.ble_client and self.ble_client.is_connected:
+            try:
+                await self.ble_client.disconnect()
+            except Exception:
+                pass
+
+    def _configure_link(self):
+        """Toma el modo de escritura y el MTU; devuelve la característica de notificación"""
+        self.ble_write_response, notify_char, self.ble_payload_size = ble_link_settings(
+            self.ble_client, self.ble_write_char
+        )
+        mode = "con respuesta" if self.ble_write_response else "sin respuesta"
+        print(f"🔵 Escritura BLE {mode}, {self.ble_payload_size} bytes por escritura")
+        return notify_char
+
+    async def _subscribe_notifications(self, notify_char):
+        """Activa las notificaciones por las que el mBot envía las respuestas"""
+        if notify_char is None:
+            print("🔵 Sin característica de notificación: lectura de sensores no disponible")
+            return
+        try:
+            await self.ble_client.start_notify(notify_char, self._on_ble_notify)
+            self.ble_notify_char = notify_char
+        except Exception as e:
+            print(f"🔵 No se pudieron activar notificaciones: {e}")
+
+    def _on_ble_notify(self, _sender, data):
+        """Los trozos BLE alimentan el mismo parser que el puerto serie"""
+        self._on_bytes_received(data)
 
     def _try_usb_connection(self):
-        """Conecta por USB usando el método original"""
+        """Conecta por USB al primer puerto cuyo firmware responda"""
         try:
             print("🔌 Buscando mBot por USB...")
-            port = self._find_mbot_usb_port()
+            candidates = self._usb_candidate_ports()
 
-            if not port:
+            if not candidates:
                 return False
 
-            self.serial = serial.Serial(port, 115200, timeout=1)
+            found = self._handshake_usb_ports(candidates)
+            if not found:
+                print(f"🔌 Ningún puerto respondió al handshake ({', '.join(candidates)})")
+                return False
+
+            port, connection, version = found
+            self.serial = connection
+            self.port = port
+            self.firmware_version = version
             self.connection_type = "usb"
-            print(f"✅ mBot conectado por USB ({port})")
-            sleep(2)
+            self._bytes_per_second = self.baudrate / 10
+            store_cached("usb_port", port)
+            print(f"✅ mBot conectado por USB ({port}, firmware {version or 'desconocido'})")
+            self._start_reader()
+            self._start_writer()
             return True
 
         except Exception as e:
             print(f"🔌 Error USB: {e}")
             return False
 
-    def _find_mbot_usb_port(self):
-        """Busca puerto USB - MÉTODO ORIGINAL"""
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            if "USB" in port.description or "CH340" in port.description:
-                return port.device
+    def _try_hid_connection(self):
+        """Conecta por el dongle 2.4G si el robot emparejado responde"""
+        print("📡 Buscando dongle 2.4G...")
+        device = open_hid_device()
+        if device is None:
+            return False
+
+        self.hid_device = device
+        self.connection_type = "hid"
+        self._bytes_per_second = self.baudrate / 10
+        self.exiting = False
+        self._start_reader(self._hid_reader_loop)
+        self._start_writer()
+
+        version = self._handshake_hid()
+        if version is None:
+            print("📡 El dongle no obtiene respuesta del robot (¿encendido y emparejado?)")
+            # Solo soltamos el dongle: la traza y el resto siguen para USB/BLE
+            self._stop_writer()
+            self._release_hid()
+            self.connection_type = None
+            return False
+
+        self.firmware_version = version
+        print(f"✅ mBot conectado por dongle 2.4G (firmware {version})")
+        return True
+
+    def _handshake_hid(self):
+        """Repite la petición de versión hasta que el robot conteste o se acabe el plazo"""
+        deadline = time.monotonic() + USB_HANDSHAKE_TIMEOUT
+        while time.monotonic() < deadline:
+            future = self._send_request(codec.VERSION_REQUEST)
+            try:
+                return future.result(timeout=USB_HANDSHAKE_RETRY)
+            except FutureTimeoutError:
+                self._forget_request(future)
         return None
 
-    def __writePackage(self, pack):
-        """Método de escritura ORIGINAL"""
-        if self.connection_type == "usb" and self.serial:
-            self.serial.write(pack)
-            self.serial.flush()
-            sleep(0.01)
-            return True
+    def _release_hid(self):
+        """Cierra el dongle y espera a su hilo lector."""
+        device, self.hid_device = self.hid_device, None
+        # El lector sale en cuanto vence su read con timeout
+        if self._reader_thread and self._reader_thread is not threading.current_thread():
+            self._reader_thread.join(timeout=0.5)
+        if device is not None:
+            try:
+                device.close()
+            except Exception:
+                pass
+        self._fail_pending()
 
-        elif self.connection_type == "bluetooth" and self.ble_connected:
+    def _hid_reader_loop(self):
+        """Lee informes de 64 bytes y pasa sus bytes útiles al parser"""
+        device = self.hid_device
+        while not self.exiting and self.hid_device is device:
             try:
-                future = asyncio.run_coroutine_threadsafe(
-                    self._async_write(pack),
-                    self.ble_loop
-                )
-                result = future.result(timeout=2.0)
-                sleep(0.01)  # Mismo delay que USB
-                return result
-            except:
-                return False
-        return False
+                report = device.read(HID_REPORT_SIZE, HID_READ_TIMEOUT_MS)
+            except (OSError, IOError, ValueError):
+                break
+            data = report_payload(report)
+            if data:
+                self._on_bytes_received(data)
+        self._fail_pending()
+
+    def _usb_candidate_ports(self):
+        return usb_candidate_ports(self.port)
+
+    def _handshake_usb_ports(self, candidates):
+        """Prueba todos los puertos en paralelo; gana el primero que contesta"""
+        cancelled = threading.Event()
+        idx = self._pending.next_index()
+        results = []
+        with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+            probes = [pool.submit(self._probe_usb_port, port, idx, cancelled) for port in candidates]
+            for probe in as_completed(probes):
+                result = probe.result()
+                if result is None:
+                    continue
+                results.append(result)
+                if result[2] is not None:
+                    cancelled.set()
+        return settle_usb_probes(results)
+
+    def _probe_usb_port(self, port, idx, cancelled):
+        """Pide la versión del firmware hasta recibir una trama 0xff 0x55 válida
+
+        Si se agota el plazo pero el puerto envió algo, devuelve versión None
+        (ver settle_usb_probes).
+        """
+        try:
+            # Timeout corto: el hilo lector debe poder salir rápido al cerrar
+            connection = serial.Serial(port, self.baudrate, timeout=0.1)
+        except (serial.SerialException, OSError, ValueError):
+            return None
+
+        probe = VersionProbe(idx, USB_HANDSHAKE_TIMEOUT, USB_HANDSHAKE_RETRY)
+        try:
+            while not cancelled.is_set() and not probe.expired():
+                if probe.due():
+                    connection.write(probe.request)
+                data = connection.read(connection.in_waiting or 1)
+                version = probe.feed(data) if data else None
+                if version is not None:
+                    return port, connection, version
+            if probe.heard and not cancelled.is_set():
+                return port, connection, None
+        except (serial.SerialException, OSError, TypeError):
+            pass
+        connection.close()
+        return None
+
+    def __writePackage(self, pack, channel=None):
+        """Encola un paquete para el hilo escritor.
+
+        Los paquetes con ``channel`` (motores, cada LED, buzzer...) sustituyen
+        al pendiente del mismo canal: solo viaja el estado más reciente. Las
+        peticiones de sensor van sin canal y nunca se descartan.
+        """
+        return self.__writePackages([(pack, channel)])
+
+    def __writePackages(self, items):
+        """Encola varios ``(paquete, canal)`` de golpe: salen en la misma escritura."""
+        if self.connection_type not in ("usb", "bluetooth", "hid") or self._writer_stop:
+            return False
+        if self.connection_type == "bluetooth" and not self.ble_connected:
+            return False
+
+        metrics = self.metrics
+        with self._outbox_cond:
+            queued_at = time.perf_counter()
+            for pack, channel in items:
+                if channel is None:
+                    channel = ("seq", next(self._outbox_seq))
+                elif self._outbox.pop(channel, None) is not None:
+                    metrics.commands_coalesced += 1
+                self._outbox[channel] = (bytes(pack), queued_at)
+            self._outbox_cond.notify()
+        metrics.commands_queued += len(items)
+        trace = self._trace
+        if trace:
+            for pack, _ in items:
+                trace.record(TRACE_QUEUED, pack)
+        return True
+
+    def send_frames(self, items):
+        """Encola tramas ya codificadas ``[(trama, canal), ...]`` en una sola tanda.
+
+        Para comandos preparados de antemano (coreografías). Los canales son
+        los de doMove/doRGBLedOnBoard/doBuzzer y se fusionan igual.
+        """
+        return self.__writePackages(items)
+
+    def _start_writer(self):
+        self._writer_stop = False
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
+
+    def _writer_loop(self):
+        """Vacía la cola en una sola escritura por tanda, respetando el presupuesto de bytes."""
+        while True:
+            with self._outbox_cond:
+                while not self._outbox and not self._writer_stop:
+                    self._outbox_cond.wait()
+                if not self._outbox:
+                    return
+
+            # Mientras esperamos al presupuesto, los comandos nuevos se siguen fusionando
+            delay = self._next_write_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            with self._outbox_cond:
+                batch = list(self._outbox.items())
+                self._outbox.clear()
+
+            sent = self._transmit([frame for _, (frame, _) in batch])
+            self._next_write_at = time.monotonic() + sent / self._bytes_per_second
+            if sent:
+                now = time.perf_counter()
+                for channel, (_, queued_at) in batch:
+                    self.metrics.record_command(_command_kind(channel), now - queued_at)
+
+    def _transmit(self, frames):
+        """Envía una tanda de paquetes y devuelve los bytes escritos."""
+        metrics = self.metrics
+        if self.connection_type == "usb" and self.serial:
+            data = b"".join(frames)
+            start = time.perf_counter()
+            try:
+                self.serial.write(data)
+                self.serial.flush()
+            except (serial.SerialException, OSError, TypeError):
+                metrics.write_errors += 1
+                return 0
+            metrics.write_time.record(time.perf_counter() - start)
+            metrics.writes += 1
+            metrics.frames_written += len(frames)
+            metrics.bytes_written += len(data)
+            trace = self._trace
+            if trace:
+                trace.record(TRACE_SENT, data)
+            return len(data)
+
+        if self.connection_type == "hid" and self.hid_device:
+            # Varias tramas pequeñas comparten informe
+            sent = 0
+            for chunk in pack_chunks(frames, HID_PAYLOAD_SIZE):
+                start = time.perf_counter()
+                try:
+                    self.hid_device.write(build_report(chunk))
+                except (OSError, IOError, ValueError):
+                    metrics.write_errors += 1
+                    return sent
+                metrics.write_time.record(time.perf_counter() - start)
+                metrics.writes += 1
+                metrics.bytes_written += len(chunk)
+                sent += len(chunk)
+                trace = self._trace
+                if trace:
+                    trace.record(TRACE_SENT, chunk)
+            metrics.frames_written += len(frames)
+            return sent
+
+        if self.connection_type == "bluetooth" and self.ble_connected and self._ble_send_queue:
+            chunks = self._pack_ble_chunks(frames)
+            # No esperamos al resultado: la tarea emisora escribe en orden
+            self.ble_loop.call_soon_threadsafe(
+                self._ble_send_queue.put_nowait, (len(frames), chunks)
+            )
+            return sum(len(chunk) for chunk in chunks)
+        return 0
+
+    def _pack_ble_chunks(self, frames):
+        """Agrupa tramas completas en escrituras de hasta ``ble_payload_size`` bytes."""
+        return pack_chunks(frames, self.ble_payload_size)
+
+    async def _ble_sender_loop(self):
+        """Escribe en orden lo que encola el hilo escritor y mide cada escritura."""
+        queue = self._ble_send_queue
+        while True:
+            frame_count, chunks = await queue.get()
+            try:
+                for chunk in chunks:
+                    start = time.perf_counter()
+                    ok = await self._async_write(chunk)
+                    self._record_ble_write(len(chunk), time.perf_counter() - start, ok)
+                    trace = self._trace
+                    if ok and trace:
+                        trace.record(TRACE_SENT, chunk)
+                self.metrics.frames_written += frame_count
+            finally:
+                queue.task_done()
+
+    def _record_ble_write(self, size, latency, ok):
+        metrics = self.metrics
+        if not ok:
+            metrics.write_errors += 1
+            return
+        metrics.ble_write.record(latency)
+        metrics.writes += 1
+        metrics.bytes_written += size
+
+    def ble_write_stats(self):
+        """Vista BLE de ``metrics``: latencia por escritura y profundidad de la cola."""
+        metrics = self.metrics
+        latency = metrics.ble_write
+        return {
+            "writes": latency.count,
+            "frames": metrics.frames_written,
+            "bytes": metrics.bytes_written,
+            "errors": metrics.write_errors,
+            "write_without_response": not self.ble_write_response,
+            "payload_size": self.ble_payload_size,
+            "bytes_per_second": self._bytes_per_second,
+            "avg_latency": latency.total / latency.count if latency.count else 0.0,
+            "p99_latency": latency.percentile(0.99),
+            "max_latency": latency.max,
+            "queue_depth": self._ble_send_queue.qsize() if self._ble_send_queue else 0,
+        }
+
+    def start_trace(self, path):
+        """Empieza a grabar el tráfico (pedido, enviado y recibido) en ``path``."""
+        self.stop_trace()
+        self._trace = WireRecorder(path)
+        return self._trace
+
+    def stop_trace(self):
+        """Cierra la grabación en curso, si la hay."""
+        trace, self._trace = self._trace, None
+        if trace:
+            trace.close()
+
+    @property
+    def coalesced_commands(self):
+        return self.metrics.commands_coalesced
+
+    def metrics_snapshot(self):
+        """Contadores, histogramas y estado del parser y de la cola, de una vez."""
+        snapshot = self.metrics.snapshot()
+        snapshot["frames_parsed"] = self._parser.frames_parsed
+        snapshot["resync_bytes"] = self._parser.discarded_bytes
+        snapshot["requests_in_flight"] = len(self._pending)
+        snapshot["outbox_depth"] = len(self._outbox)
+        snapshot["ble_queue_depth"] = self._ble_send_queue.qsize() if self._ble_send_queue else 0
+        snapshot["rtt"] = self.rtt.snapshot()
+        return snapshot
+
+    def _stop_writer(self, timeout=0.5):
+        """Detiene el hilo escritor después de vaciar lo pendiente."""
+        with self._outbox_cond:
+            self._writer_stop = True
+            self._outbox_cond.notify()
+        if self._writer_thread and self._writer_thread is not threading.current_thread():
+            self._writer_thread.join(timeout=timeout)
 
     async def _async_write(self, data):
         """Escritura BLE asíncrona"""
         try:
             if self.ble_client and self.ble_client.is_connected:
-                await self.ble_client.write_gatt_char(self.ble_write_char, data)
+                await self.ble_client.write_gatt_char(
+                    self.ble_write_char, data, response=self.ble_write_response
+                )
                 return True
             return False
         except:
             return False
 
     # ------------------------------------------------------------------
-    # Lectura simplificada de sensores (solo USB en esta versión)
+    # Lectura de sensores: peticiones en vuelo completadas por el hilo lector
+    # (USB) o por las notificaciones GATT (BLE)
     # ------------------------------------------------------------------
-    def _next_request_index(self):
-        self._request_index = (self._request_index + 1) % 255
-        if self._request_index == 0:
-            self._request_index = 1
-        return self._request_index
-
-    def get_ultrasonic_distance(self, port=1, slot=3, timeout=0.5):
-        if self.connection_type != "usb" or not self.serial:
-            raise NotImplementedError("La lectura del sensor ultrasónico solo está disponible por USB en esta versión simplificada.")
-
-        idx = self._next_request_index()
-        packet = bytearray([0xff, 0x55, 0x04, idx, 0x01, 0x01, port, slot])
-        self.__writePackage(packet)
-        response = self._read_serial_frame(idx, timeout)
-        if not response:
-            return None
-        _, value = response
-        return value
+    def _start_reader(self, target=None):
+        """Arranca el hilo que posee la lectura del transporte."""
+        self._reader_thread = threading.Thread(target=target or self._reader_loop, daemon=True)
+        self._reader_thread.start()
 
-    def _read_serial_frame(self, expected_idx, timeout):
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if self.serial.in_waiting:
-                data = self.serial.read(self.serial.in_waiting)
-                self._serial_buffer.extend(data)
+    def _reader_loop(self):
+        while not self.exiting and self.serial:
+            try:
+                data = self.serial.read(self.serial.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError):
+                break
+            if data:
+                self._on_bytes_received(data)
+        self._fail_pending()
+
+    def _on_bytes_received(self, data):
+        """Todo transporte entrega aquí sus bytes, troceados como sea."""
+        trace = self._trace
+        if trace:
+            trace.record(TRACE_RECEIVED, data)
+        self._parser.feed(data)
+        self._dispatch_frames()
+
+    def _dispatch_frames(self):
+        """Completa los Future de todas las respuestas ya decodificables."""
+        while True:
+            parsed = self._try_parse_frame(None)
+            if not parsed:
+                return
+            rtt = self._pending.resolve(*parsed)
+            if rtt is not None:
+                self.rtt.sample(rtt)
 
-            parsed = self._try_parse_frame(expected_idx)
-            if parsed:
-                return parsed
+    def _fail_pending(self):
+        self._pending.fail_all()
 
-            sleep(0.01)
-        return None
+    def _can_read_sensors(self):
+        if self.connection_type == "usb":
+            return self.serial is not None
+        if self.connection_type == "bluetooth":
+            return self.ble_connected and self.ble_notify_char is not None
+        if self.connection_type == "hid":
+            return self.hid_device is not None
+        return False
 
-    def _try_parse_frame(self, expected_idx):
-        buffer = self._serial_buffer
-        while len(buffer) >= 3:
-            if buffer[0] != 0xff or buffer[1] != 0x55:
-                buffer.pop(0)
-                continue
+    def _send_request(self, template, *args):
+        """Registra un Future para un índice nuevo y envía la petición."""
+        return self._send_requests([(template, args)])[0]
+
+    def _send_requests(self, requests):
+        """Envía varias ``(plantilla, args)`` en una sola escritura; un Future por petición."""
+        if not self._can_read_sensors():
+            raise NotImplementedError("Lectura de sensores no disponible: hace falta USB, dongle 2.4G o BLE con notificaciones.")
+
+        futures = []
+        packs = []
+        sent_at = time.perf_counter()
+        for template, args in requests:
+            future = Future()
+            future.request_index = self._pending.register(future, sent_at)
+            futures.append(future)
+            packs.append((template.build(future.request_index, *args), None))
+        self.__writePackages(packs)
+        return futures
+
+    def _forget_request(self, future):
+        self._pending.forget(future.request_index, future)
+
+    def request_ultrasonic_distance(self, port=1, slot=3):
+        """Pide la distancia sin esperar; devuelve un Future con el valor en cm."""
+        return self._send_request(codec.ULTRASONIC_REQUEST, port, slot)
+
+    def get_ultrasonic_distance(self, port=1, slot=3, timeout=None, retries=SENSOR_RETRIES):
+        return self.get_ultrasonic_distances([(port, slot)], timeout, retries)[0]
+
+    def get_ultrasonic_distances(self, sensors, timeout=None, retries=SENSOR_RETRIES):
+        """Lee varios ultrasonidos con todas las peticiones en vuelo a la vez.
+
+        ``sensors`` es una lista de tuplas ``(port, slot)``; devuelve una lista
+        con la distancia de cada uno (``None`` si no respondió a tiempo).
+        """
+        return self.read_sensors([("ultrasonic", port, slot) for port, slot in sensors], timeout, retries)
 
-            length = buffer[2]
-            total = length + 3
-            if len(buffer) < total:
-                return None
+    def read_sensors(self, queries, timeout=None, retries=SENSOR_RETRIES):
+        """Lee sensores de cualquier tipo en una sola escritura y una sola espera.
 
-            frame = bytes(buffer[:total])
-            del buffer[:total]
+        Cada consulta es un nombre de ``codec.SENSOR_REQUESTS`` o una tupla
+        con sus argumentos: ``["line_follower", "light", ("ultrasonic", 1, 3)]``.
+        Devuelve los valores ya convertidos (``None`` si no llegó respuesta).
+        Plazos y reintentos los decide ``SensorRead``, igual que en AsyncMBot.
+        """
+        read = SensorRead(queries, timeout, retries, self.metrics, self.rtt)
+        batch = read.next_batch()
+        while batch:
+            requests, wait_for = batch
+            futures = self._send_requests(requests)
+            wait(futures, timeout=wait_for)
+            read.complete([self._take_result(future) for future in futures])
+            batch = read.next_batch()
+        return read.results
+
+    def _take_result(self, future):
+        if future.done() and not future.cancelled():
+            return future.result()
+        self._forget_request(future)
+        return MISSING
+
+    def read_sensor(self, kind, *args, timeout=None, retries=SENSOR_RETRIES):
+        return self.read_sensors([(kind,) + args], timeout, retries)[0]
+
+    def get_line_follower(self, port=2, timeout=None):
+        """Estado del siguelíneas: 0 ambos sobre la línea, 1 solo el izquierdo, 2 solo el derecho, 3 ninguno."""
+        return self.read_sensor("line_follower", port, timeout=timeout)
+
+    def get_light(self, port=codec.ONBOARD_LIGHT_PORT, timeout=None):
+        """Nivel de luz (0-1023); por defecto el sensor de la placa."""
+        return self.read_sensor("light", port, timeout=timeout)
+
+    def get_sound_level(self, port=3, timeout=None):
+        return self.read_sensor("sound", port, timeout=timeout)
+
+    def is_button_pressed(self, timeout=None):
+        """Botón de la placa; ``None`` si no hubo respuesta."""
+        return self.read_sensor("button", timeout=timeout)
 
-            idx = frame[3]
+    def _try_parse_frame(self, expected_idx):
+        while True:
+            parsed = self._parser.next_frame()
+            if not parsed:
+                return None
+            idx, value = parsed
             if expected_idx is not None and idx != expected_idx:
                 # Descartar respuestas antiguas
+                self.metrics.stale_replies += 1
                 continue
-
-            data_type = frame[4]
-            payload = frame[5:]
-            value = self._decode_value(data_type, payload)
             return idx, value
-        return None
-
-    def _decode_value(self, data_type, payload):
-        if data_type == 1 and payload:
-            return payload[0]
-        if data_type == 2 and len(payload) >= 4:
-            return struct.unpack('f', payload[:4])[0]
-        if data_type == 3 and len(payload) >= 2:
-            return struct.unpack('h', payload[:2])[0]
-        return None
 
     def short2bytes(self, sval):
         """Conversión ORIGINAL de short a bytes"""
@@ -270,50 +921,59 @@ class MBotOriginalProtocol:
     # MÉTODOS ORIGINALES EXACTOS
     def doMove(self, leftSpeed, rightSpeed):
         """MÉTODO ORIGINAL - Usar velocidades con signo correcto"""
-        self.__writePackage(bytearray([0xff, 0x55, 0x7, 0x0, 0x2, 0x5] + self.short2bytes(-leftSpeed) + self.short2bytes(rightSpeed)))
+        self.__writePackage(codec.encode_move(leftSpeed, rightSpeed), channel="move")
 
     def doRGBLedOnBoard(self, index, red, green, blue):
         """MÉTODO ORIGINAL"""
-        self.__writePackage(bytearray([0xff, 0x55, 0x9, 0x0, 0x2, 0x8, 0x7, 0x2, index, red, green, blue]))
+        self.__writePackage(codec.encode_rgb_led_onboard(index, red, green, blue), channel=("led", 7, 2, index))
 
     def doRGBLed(self, port, slot, index, red, green, blue):
         """MÉTODO ORIGINAL"""
-        self.__writePackage(bytearray([0xff, 0x55, 0x9, 0x0, 0x2, 0x8, port, slot, index, red, green, blue]))
+        self.__writePackage(codec.encode_rgb_led(port, slot, index, red, green, blue), channel=("led", port, slot, index))
 
     def doBuzzer(self, buzzer, time=0):
         """MÉTODO ORIGINAL"""
-        self.__writePackage(bytearray([0xff, 0x55, 0x7, 0x0, 0x2, 0x22] + self.short2bytes(buzzer) + self.short2bytes(time)))
+        self.__writePackage(codec.encode_buzzer(buzzer, time), channel="buzzer")
 
     def doMotor(self, port, speed):
         """MÉTODO ORIGINAL"""
-        self.__writePackage(bytearray([0xff, 0x55, 0x6, 0x0, 0x2, 0xa, port]+self.short2bytes(speed)))
+        self.__writePackage(codec.encode_motor(port, speed), channel=("motor", port))
 
     def doServo(self, port, slot, angle):
         """MÉTODO ORIGINAL"""
-        self.__writePackage(bytearray([0xff, 0x55, 0x6, 0x0, 0x2, 0xb, port, slot, angle]))
+        self.__writePackage(codec.encode_servo(port, slot, angle), channel=("servo", port, slot))
 
     def close(self):
         """Cierra conexión"""
+        # Lo último encolado (normalmente un stop) sale antes de cerrar
+        self._stop_writer()
         self.exiting = True
 
         if self.connection_type == "bluetooth":
+            # El propio hilo BLE vacía la cola, desconecta y termina
+            if self.ble_loop and self._ble_stop and not self.ble_loop.is_closed():
+                self.ble_loop.call_soon_threadsafe(self._ble_stop.set)
+            if self.ble_thread and self.ble_thread.is_alive():
+                self.ble_thread.join(timeout=BLE_SHUTDOWN_TIMEOUT)
             self.ble_connected = False
-            if self.ble_client and self.ble_loop:
-                try:
-                    future = asyncio.run_coroutine_threadsafe(
-                        self.ble_client.disconnect(),
-                        self.ble_loop
-                    )
-                    future.result(timeout=2.0)
-                except:
-                    pass
 
         elif self.connection_type == "usb" and self.serial:
             try:
                 self.serial.close()
             except:
                 pass
+            if self._reader_thread and self._reader_thread is not threading.current_thread():
+                self._reader_thread.join(timeout=0.5)
+
+        elif self.connection_type == "hid" and self.hid_device:
+            self._release_hid()
+
+        if self.connection_type != "bluetooth" and self.ble_thread and self.ble_thread.is_alive():
+            # Un intento BLE que siguió vivo tras caer a USB o al dongle
+            self._abort_ble_connection()
 
+        self._fail_pending()
+        self.stop_trace()
         print("🔌 Conexión cerrada")
 
     def exit(self, signal, frame):
@@ -0,0 +1,115 @@
+"""
+Contadores e histogramas de latencia del protocolo, pensados para ir
+siempre activados.
+
+Registrar una muestra es un ``bisect`` sobre cubos fijos y unas pocas
+sumas; no hay locks ni listas que crezcan. Los contadores se actualizan
+desde varios hilos sin sincronizar: alguna muestra puede perderse en una
+carrera, algo aceptable para estadísticas.
+"""
+
+from bisect import bisect_left
+
+# Límites superiores de los cubos, en segundos (el último cubo es "más de 5 s")
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.0002, 0.0005,
+    0.001, 0.002, 0.005, 0.01, 0.02, 0.05,
+    0.1, 0.2, 0.5, 1.0, 2.0, 5.0,
+)
+
+
+class LatencyHistogram:
+    """Histograma de latencias con cubos logarítmicos fijos."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Cota superior del cubo donde cae el percentil ``fraction`` (0..1)."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                break
+        if bucket < len(LATENCY_BUCKETS):
+            return min(LATENCY_BUCKETS[bucket], self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p90_ms": self.percentile(0.90) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            # (límite en ms, muestras); None = por encima del último límite
+            "buckets": [
+                (LATENCY_BUCKETS[i] * 1000 if i < len(LATENCY_BUCKETS) else None, count)
+                for i, count in enumerate(self.counts) if count
+            ],
+        }
+
+
+class ProtocolMetrics:
+    """Métricas de un transporte: escrituras, comandos, sensores y BLE."""
+
+    def __init__(self):
+        self.commands_queued = 0
+        self.commands_coalesced = 0
+        self.writes = 0
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.write_errors = 0
+        self.sensor_requests = 0
+        self.sensor_replies = 0
+        self.sensor_timeouts = 0
+        self.sensor_retries = 0
+        self.stale_replies = 0
+        # Duración de cada escritura en el transporte
+        self.write_time = LatencyHistogram()
+        # Por tipo de comando: desde que se pide hasta que sale por el cable
+        self.command_latency = {}
+        self.sensor_rtt = LatencyHistogram()
+        self.ble_write = LatencyHistogram()
+
+    def record_command(self, kind, seconds):
+        histogram = self.command_latency.get(kind)
+        if histogram is None:
+            histogram = self.command_latency[kind] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def snapshot(self):
+        """Todas las métricas de golpe como un diccionario plano de tipos básicos."""
+        return {
+            "commands_queued": self.commands_queued,
+            "commands_coalesced": self.commands_coalesced,
+            "writes": self.writes,
+            "frames_written": self.frames_written,
+            "bytes_written": self.bytes_written,
+            "write_errors": self.write_errors,
+            "sensor_requests": self.sensor_requests,
+            "sensor_replies": self.sensor_replies,
+            "sensor_timeouts": self.sensor_timeouts,
+            "sensor_retries": self.sensor_retries,
+            "stale_replies": self.stale_replies,
+            "write_time": self.write_time.snapshot(),
+            "command_latency": {kind: h.snapshot() for kind, h in self.command_latency.items()},
+            "sensor_rtt": self.sensor_rtt.snapshot(),
+            "ble_write": self.ble_write.snapshot(),
+        }
@@ -0,0 +1,126 @@
+"""
+Contabilidad de peticiones de sensor compartida por MBotOriginalProtocol y
+AsyncMBot: índices en vuelo, respuestas que completan su Future y la
+política de reintentos de una lectura por tandas.
+
+Funciona igual con ``concurrent.futures.Future`` (hilo lector) y con
+``asyncio.Future`` (loop del llamante): solo usa ``done``, ``set_result``
+y ``cancel``.
+"""
+
+import threading
+import time
+
+from . import codec
+
+# Marca de "sin respuesta" (distinta de una respuesta con valor None)
+MISSING = object()
+
+
+class PendingRequests:
+    """Índice (1..254) -> ``(Future, instante de envío)`` de cada petición en vuelo."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._entries = {}
+        self._index = 1
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def next_index(self):
+        """Siguiente índice libre; se salta los que siguen en vuelo."""
+        for _ in range(254):
+            self._index = (self._index + 1) % 255
+            if self._index == 0:
+                self._index = 1
+            if self._index not in self._entries:
+                return self._index
+        raise RuntimeError("Demasiadas peticiones de sensor en vuelo")
+
+    def register(self, future, sent_at=None):
+        """Reserva un índice para ``future`` y lo devuelve."""
+        with self._lock:
+            idx = self.next_index()
+            self._entries[idx] = (future, sent_at if sent_at is not None else time.perf_counter())
+        self.metrics.sensor_requests += 1
+        return idx
+
+    def resolve(self, idx, value):
+        """Completa la petición ``idx``; devuelve su RTT o None si nadie la esperaba."""
+        with self._lock:
+            entry = self._entries.pop(idx, None)
+        if entry is None:
+            # Respuesta tardía de una petición que ya expiró
+            self.metrics.stale_replies += 1
+            return None
+        future, sent_at = entry
+        if future.done():
+            return None
+        rtt = time.perf_counter() - sent_at
+        self.metrics.sensor_rtt.record(rtt)
+        self.metrics.sensor_replies += 1
+        future.set_result(value)
+        return rtt
+
+    def forget(self, idx, future):
+        """La petición expiró: se cancela y su índice queda libre."""
+        self.metrics.sensor_timeouts += 1
+        with self._lock:
+            entry = self._entries.get(idx)
+            if entry is not None and entry[0] is future:
+                del self._entries[idx]
+        future.cancel()
+
+    def fail_all(self):
+        """El transporte se ha caído: todas las peticiones terminan con None."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for future, _ in entries:
+            if not future.done():
+                future.set_result(None)
+
+
+class SensorRead:
+    """Una lectura por tandas: qué falta por llegar, cuánto esperar y cuántas veces.
+
+    Sin ``timeout`` el plazo sale del RTT observado y lo que falte se pide
+    otra vez hasta ``retries`` veces; con un ``timeout`` fijo se espera una
+    sola vez. El transporte solo envía cada tanda y devuelve los valores
+    crudos (``MISSING`` si no llegó respuesta).
+    """
+
+    def __init__(self, queries, timeout, retries, metrics, rtt):
+        self.requests = [codec.sensor_request(query) for query in queries]
+        self.results = [None] * len(self.requests)
+        self.missing = list(range(len(self.requests)))
+        self.timeout = timeout
+        self.metrics = metrics
+        self.rtt = rtt
+        self._attempts_left = 1 if timeout is not None else retries + 1
+        self._attempt = 0
+
+    def next_batch(self):
+        """``(peticiones, plazo)`` de la siguiente tanda, o None si ya terminó."""
+        if not self.missing or self._attempts_left <= 0:
+            return None
+        if self._attempt:
+            self.metrics.sensor_retries += len(self.missing)
+        self._attempt += 1
+        self._attempts_left -= 1
+        wait_for = self.timeout if self.timeout is not None else self.rtt.timeout
+        return [self.requests[i][:2] for i in self.missing], wait_for
+
+    def complete(self, values):
+        """Valores crudos de la última tanda, en el orden de ``next_batch``."""
+        still_missing = []
+        for i, value in zip(self.missing, values):
+            if value is MISSING:
+                still_missing.append(i)
+            elif value is not None:
+                self.results[i] = self.requests[i][2](value)
+        self.missing = still_missing
+        if still_missing:
+            self.rtt.on_timeout()
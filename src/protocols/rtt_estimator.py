@@ -0,0 +1,59 @@
+"""
+Plazo de espera de los sensores calculado a partir del RTT observado.
+
+Sigue el estimador de TCP (RFC 6298): media suavizada ``srtt`` y variación
+``rttvar`` con ganancias 1/8 y 1/4; el plazo es ``srtt + 4 * rttvar``,
+acotado a los límites del transporte. Cada timeout duplica el plazo hasta
+la siguiente muestra buena. Como cada reintento usa un índice nuevo, nunca
+se confunde la respuesta de una petición con la de otra (Karn).
+"""
+
+RTT_ALPHA = 1 / 8
+RTT_BETA = 1 / 4
+RTT_K = 4
+MAX_BACKOFF = 8
+
+
+class RttEstimator:
+    """RTT suavizado y plazo de espera de un transporte."""
+
+    def __init__(self, initial, minimum, maximum):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.srtt = None
+        self.rttvar = None
+        self.samples = 0
+        self._backoff = 1
+
+    def sample(self, rtt):
+        """Incorpora un RTT medido (segundos)."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - RTT_BETA) * self.rttvar + RTT_BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - RTT_ALPHA) * self.srtt + RTT_ALPHA * rtt
+        self.samples += 1
+        self._backoff = 1
+
+    def on_timeout(self):
+        """Una respuesta no llegó: el siguiente plazo es el doble."""
+        self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+
+    @property
+    def timeout(self):
+        base = self.initial if self.srtt is None else self.srtt + RTT_K * self.rttvar
+        return min(self.maximum, max(self.minimum, base) * self._backoff)
+
+    def worst_case(self, retries):
+        """Espera máxima posible con ``retries`` reintentos."""
+        return self.maximum * (retries + 1)
+
+    def snapshot(self):
+        return {
+            "srtt_ms": (self.srtt or 0.0) * 1000,
+            "rttvar_ms": (self.rttvar or 0.0) * 1000,
+            "timeout_ms": self.timeout * 1000,
+            "samples": self.samples,
+        }
@@ -0,0 +1,179 @@
+"""
+Grabación y reproducción del tráfico con el mBot a nivel de bytes.
+
+El registro es un fichero binario de solo añadir proyectado en memoria
+(``mmap``): grabar una trama es empaquetar una cabecera y copiar los bytes,
+sin llamadas al sistema salvo cuando hay que ampliar el fichero.
+
+Formato: cabecera ``<8sd>`` (firma y hora de inicio) y después registros
+``<QBH>`` (nanosegundos desde el inicio, dirección, longitud) seguidos de
+los datos. Al cerrar se recorta el fichero; si el proceso muere, la zona sin
+escribir está a cero y la lectura se detiene en el primer registro vacío.
+"""
+
+import mmap
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from .frame_parser import FrameParser
+
+TRACE_MAGIC = b"MBTRACE\x01"
+
+# Direcciones: lo que pidió el programa, lo que salió por el cable y lo recibido
+TRACE_QUEUED = 1
+TRACE_SENT = 2
+TRACE_RECEIVED = 3
+TRACE_DIRECTIONS = {TRACE_QUEUED: "queued", TRACE_SENT: "sent", TRACE_RECEIVED: "received"}
+
+_FILE_HEADER = struct.Struct("<8sd")
+_RECORD = struct.Struct("<QBH")
+_MAX_RECORD = 0xffff
+TRACE_CHUNK_SIZE = 1 << 20
+
+TraceRecord = namedtuple("TraceRecord", "timestamp direction data")
+
+
+class WireRecorder:
+    """Añade tramas con marca de tiempo y dirección a un registro mmap."""
+
+    def __init__(self, path, chunk_size=TRACE_CHUNK_SIZE):
+        self.path = path
+        self.records = 0
+        self._chunk_size = max(chunk_size, _FILE_HEADER.size + _RECORD.size)
+        self._lock = threading.Lock()
+        self._file = open(path, "w+b")
+        self._size = self._chunk_size
+        self._file.truncate(self._size)
+        self._map = mmap.mmap(self._file.fileno(), self._size)
+        self._started = time.monotonic_ns()
+        _FILE_HEADER.pack_into(self._map, 0, TRACE_MAGIC, time.time())
+        self._offset = _FILE_HEADER.size
+
+    @property
+    def bytes_written(self):
+        return self._offset
+
+    def record(self, direction, data):
+        """Graba ``data`` en ``direction``; los bloques grandes se trocean."""
+        view = memoryview(data)
+        with self._lock:
+            if self._map is None:
+                return
+            stamp = time.monotonic_ns() - self._started
+            for start in range(0, max(len(view), 1), _MAX_RECORD):
+                chunk = view[start:start + _MAX_RECORD]
+                end = self._offset + _RECORD.size + len(chunk)
+                if end > self._size:
+                    self._grow(end)
+                _RECORD.pack_into(self._map, self._offset, stamp, direction, len(chunk))
+                self._map[self._offset + _RECORD.size:end] = chunk
+                self._offset = end
+                self.records += 1
+
+    def _grow(self, needed):
+        size = self._size
+        while size < needed:
+            size += self._chunk_size
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._size = size
+
+    def flush(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+
+    def close(self):
+        """Vuelca el registro y recorta el fichero a lo escrito."""
+        with self._lock:
+            if self._map is None:
+                return
+            self._map.flush()
+            self._map.close()
+            self._map = None
+            self._file.truncate(self._offset)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def read_trace(path):
+    """Itera los ``TraceRecord`` de un registro (``timestamp`` en segundos)."""
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if len(data) < _FILE_HEADER.size or data[:len(TRACE_MAGIC)] != TRACE_MAGIC:
+        raise ValueError(f"{path} no es un registro de tráfico del mBot")
+
+    offset = _FILE_HEADER.size
+    while offset + _RECORD.size <= len(data):
+        stamp, direction, size = _RECORD.unpack_from(data, offset)
+        if direction == 0:
+            # Zona sin escribir de un registro que no se cerró
+            return
+        offset += _RECORD.size
+        if offset + size > len(data):
+            return
+        yield TraceRecord(stamp / 1e9, direction, data[offset:offset + size])
+        offset += size
+
+
+def replay(path, sink, direction=TRACE_RECEIVED, speed=1.0):
+    """Entrega a ``sink`` los datos de ``direction`` con su ritmo original.
+
+    ``speed`` acelera (2.0 = el doble de rápido); ``0`` los entrega sin
+    esperas. Los plazos se calculan desde el inicio para no acumular deriva.
+    Devuelve el número de registros entregados.
+    """
+    delivered = 0
+    first = None
+    began = time.monotonic()
+    for record in read_trace(path):
+        if record.direction != direction:
+            continue
+        if speed > 0:
+            if first is None:
+                first = record.timestamp
+            delay = (record.timestamp - first) / speed - (time.monotonic() - began)
+            if delay > 0:
+                time.sleep(delay)
+        sink(record.data)
+        delivered += 1
+    return delivered
+
+
+def replay_into_parser(path, parser=None, speed=0.0):
+    """Reinyecta lo recibido en un FrameParser y devuelve las tramas ``(idx, valor)``."""
+    parser = parser or FrameParser()
+    frames = []
+
+    def feed(data):
+        parser.feed(data)
+        frame = parser.next_frame()
+        while frame:
+            frames.append(frame)
+            frame = parser.next_frame()
+
+    replay(path, feed, TRACE_RECEIVED, speed)
+    return frames
+
+
+def replay_to_port(path, port, speed=1.0, baudrate=115200):
+    """Reenvía lo que salió por el cable a otro puerto (un robot o un emulador)."""
+    import serial
+
+    connection = serial.Serial(port, baudrate, timeout=0)
+    try:
+        def write(data):
+            connection.write(data)
+            connection.flush()
+
+        return replay(path, write, TRACE_SENT, speed)
+    finally:
+        connection.close()
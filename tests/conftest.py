@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from src.protocols import connection_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_connection_cache(monkeypatch, tmp_path):
+    """Cada test usa su propia caché de conexión, nunca la del usuario."""
+    monkeypatch.setattr(connection_cache, "CACHE_PATH", str(tmp_path / "mbot_connection.json"))
+
+
+def _poll(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def wait_for():
+    """``wait_for(condición, timeout)``: sondea hasta que se cumpla; devuelve si llegó a cumplirse."""
+    return _poll
@@ -0,0 +1,117 @@
+"""Dobles compartidos por varios módulos de tests."""
+
+import struct
+import time
+from types import SimpleNamespace
+
+from src.core.voice_interface import VoiceEvent
+from src.protocols.mbot_original_protocol import BLE_NOTIFY_CHAR
+
+WRITE_CHAR = "0000ffe3-0000-1000-8000-00805f9b34fb"
+
+
+class FakeBleakClient:
+    """Cliente BLE falso: responde por notificación a las peticiones de ultrasonido."""
+
+    instances = []
+    mtu_size = 23
+
+    def __init__(self, address_or_device, disconnected_callback=None):
+        self.address = getattr(address_or_device, "address", address_or_device)
+        self.disconnected_callback = disconnected_callback
+        self.is_connected = False
+        self.writes = []
+        self._notify = None
+        self.services = [
+            SimpleNamespace(characteristics=[
+                SimpleNamespace(uuid=BLE_NOTIFY_CHAR, properties=["notify"]),
+                SimpleNamespace(uuid=WRITE_CHAR, properties=["write", "write-without-response"]),
+            ])
+        ]
+        FakeBleakClient.instances.append(self)
+
+    async def connect(self, timeout=10.0):
+        if self.address not in FakeBleakScanner.reachable:
+            raise OSError("dispositivo no encontrado")
+        self.is_connected = True
+
+    async def start_notify(self, _char, callback):
+        self._notify = callback
+
+    async def write_gatt_char(self, _char, data, response=True):
+        self.writes.append((bytes(data), response))
+        pos = 0
+        while pos + 3 <= len(data):
+            frame = data[pos:pos + data[pos + 2] + 3]
+            if frame[4:6] == b"\x01\x01":
+                payload = bytes([frame[3], 0x02]) + struct.pack("<f", 55.0)
+                reply = bytes([0xff, 0x55, len(payload)]) + payload
+                # Respuesta troceada como la entregaría el módulo BLE
+                self._notify(None, reply[:4])
+                self._notify(None, reply[4:])
+            pos += len(frame)
+
+    async def disconnect(self):
+        self.is_connected = False
+        if self.disconnected_callback:
+            self.disconnected_callback(self)
+
+
+class FakeBleakScanner:
+    reachable = {"AA:BB:CC:DD:EE:FF"}
+    scans = 0
+
+    @classmethod
+    async def find_device_by_filter(cls, filterfunc, timeout=10.0):
+        cls.scans += 1
+        for device in [SimpleNamespace(name="Otro", address="11:22:33:44:55:66"),
+                       SimpleNamespace(name="Makeblock_LE", address="AA:BB:CC:DD:EE:FF")]:
+            if filterfunc(device, None):
+                return device
+        return None
+
+
+class FakeChoreography:
+    controls_motors = False
+
+    def cancel(self):
+        return False
+
+
+class FakeController:
+    def __init__(self, distances):
+        self.distances = distances
+        self.calls = []
+        self.choreography = FakeChoreography()
+
+    def read_distance(self, sensor="front"):
+        return self.distances.get(sensor)
+
+    def read_distances(self, sensors):
+        return {sensor: self.distances.get(sensor) for sensor in sensors}
+
+    def __getattr__(self, name):
+        # drive_forward, stop, turn_left... quedan apuntados con sus argumentos
+        return lambda *args: self.calls.append((name,) + args)
+
+
+class ScriptedVoice:
+    """Voz falsa: ``say`` deja eventos para el siguiente ``poll_events``."""
+
+    def __init__(self, *events):
+        self.pending = list(events)
+        self.polls = 0
+
+    def say(self, kind, text=None):
+        self.pending.append(VoiceEvent(kind, text, time.time()))
+
+    def poll_events(self):
+        self.polls += 1
+        events, self.pending = self.pending, []
+        return events
+
+    def start(self):
+        return self
+
+    def close(self):
+        pass
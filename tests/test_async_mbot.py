@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from src.protocols.async_mbot import AsyncMBot
+from tests.fakes import FakeBleakClient, FakeBleakScanner
+from tools.virtual_mbot import VirtualMBot
+
+
+@pytest.fixture
+def firmware():
+    with VirtualMBot(distance=None) as mbot:
+        for port in (1, 2, 3):
+            mbot.set_distance(25.0 + port, port=port)
+        yield mbot
+
+
+def test_async_usb_roundtrip(firmware):
+    async def scenario():
+        mbot = await AsyncMBot.connect("usb", port=firmware.port)
+        async with mbot:
+            assert mbot.firmware_version == firmware.firmware_version
+            await mbot.move(60, 60)
+            await mbot.set_led(0, 0, 255, 0)
+            await mbot.buzz(523, 100)
+            # Tres lecturas en vuelo a la vez
+            values = await asyncio.gather(*(mbot.read_ultrasonic(port, 3) for port in (1, 2, 3)))
+        return values
+
+    values = asyncio.run(scenario())
+    assert values == [pytest.approx(26.0), pytest.approx(27.0), pytest.approx(28.0)]
+    assert (firmware.left_speed, firmware.right_speed) == (60, 60)
+    assert firmware.buzzer == (523, 100)
+
+
+def test_ble_drop_ends_pending_reads_without_waiting(monkeypatch):
+    import sys
+    from types import SimpleNamespace
+
+    class SilentClient(FakeBleakClient):
+        async def write_gatt_char(self, _char, data, response=True):
+            self.writes.append((bytes(data), response))  # el robot no contesta
+
+    monkeypatch.setitem(sys.modules, "bleak", SimpleNamespace(BleakClient=SilentClient, BleakScanner=FakeBleakScanner))
+
+    async def scenario():
+        mbot = await AsyncMBot.connect("bluetooth")
+        read = asyncio.ensure_future(mbot.read_ultrasonic(1, 3, timeout=5.0))
+        await asyncio.sleep(0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await SilentClient.instances[-1].disconnect()  # se cae el enlace
+        value = await read
+        elapsed = loop.time() - start
+        after = await mbot.read_ultrasonic(1, 3, timeout=5.0)
+        await mbot.close()
+        return value, elapsed, after, mbot
+
+    value, elapsed, after, mbot = asyncio.run(scenario())
+    assert value is None and after is None
+    assert elapsed < 0.5
+    assert len(mbot._pending) == 0
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from src.core.buzzer_sequencer import BuzzerSequencer
+from src.core.mbot_controller import MBotController
+
+CHIRP = [(523, 60), (659, 60), (784, 80)]
+
+
+class ToneLog:
+    def __init__(self):
+        self.start = time.monotonic()
+        self.tones = []
+
+    def __call__(self, frequency, duration=0):
+        self.tones.append((time.monotonic() - self.start, frequency, duration))
+
+
+@pytest.fixture
+def sequencer():
+    log = ToneLog()
+    sequencer = BuzzerSequencer(log)
+    sequencer.log = log
+    yield sequencer
+    sequencer.close()
+
+
+def test_notes_go_out_at_their_deadlines_without_blocking():
+    # El primer envío se queda atascado hasta que lo soltemos: si play()
+    # esperase al buzzer, no volvería nunca
+    gate = threading.Event()
+    log = ToneLog()
+
+    def stuck_buzz(frequency, duration=0):
+        gate.wait(1.0)
+        log(frequency, duration)
+
+    sequencer = BuzzerSequencer(stuck_buzz)
+    try:
+        sequencer.play(CHIRP)
+        assert sequencer.playing
+        assert log.tones == []
+        gate.set()
+
+        assert sequencer.wait(timeout=1.0)
+    finally:
+        sequencer.close()
+    offsets = [offset for offset, _, _ in log.tones]
+    assert [tone[1:] for tone in log.tones] == CHIRP
+    assert offsets[1] == pytest.approx(0.06, abs=0.03)
+    assert offsets[2] == pytest.approx(0.12, abs=0.03)
+    assert sequencer.stats()["sequences_played"] == 1
+
+
+def test_new_sequence_preempts_and_rests_are_silent(sequencer):
+    sequencer.play(CHIRP)
+    time.sleep(0.03)
+    sequencer.play([(0, 40), (392, 50)])
+    assert sequencer.wait(timeout=1.0)
+
+    assert [tone[1:] for tone in sequencer.log.tones] == [(523, 60), (392, 50)]
+    assert sequencer.log.tones[-1][0] == pytest.approx(0.07, abs=0.03)
+    assert sequencer.preempted == 1
+
+
+def test_cancel_silences_and_drops_pending_notes(sequencer):
+    sequencer.play(CHIRP)
+    time.sleep(0.03)
+    sequencer.cancel()
+    assert not sequencer.playing
+    time.sleep(0.2)
+    assert [tone[1:] for tone in sequencer.log.tones] == [(523, 60), (0, 0)]
+
+
+class QuietMBot:
+    connection_type = "usb"
+
+    def __init__(self):
+        self.tones = []
+
+    def doMove(self, left_speed, right_speed):
+        pass
+
+    def doBuzzer(self, frequency, duration=0):
+        self.tones.append((frequency, duration))
+
+
+def test_control_loop_keeps_its_rate_while_the_robot_talks():
+    mbot = QuietMBot()
+    controller = MBotController(mbot=mbot)
+    try:
+        start = time.perf_counter()
+        controller.play_sound_sequence(CHIRP)
+        ticks = 0
+        while controller.sounds.playing:
+            controller.drive_forward(90)
+            ticks += 1
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+    finally:
+        controller.shutdown()
+
+    assert mbot.tones[:3] == CHIRP
+    # ~200 ms de melodía a 100 Hz de bucle
+    assert ticks >= 0.5 * elapsed / 0.01
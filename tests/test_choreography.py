@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from src.core.choreography import ChoreographyPlayer, Timeline
+from src.core.mbot_controller import MBotController
+from src.protocols import codec
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tools.virtual_mbot import VirtualMBot
+
+
+def wiggle():
+    return (
+        Timeline("meneo")
+        .move(0.0, 80, -80).led(0.0, 0, 255, 0, 0)
+        .move(0.1, -80, 80).led(0.1, 1, 0, 255, 0)
+        .move(0.2, 0, 0).buzz(0.2, 523, 50)
+    )
+
+
+class StepLog:
+    def __init__(self):
+        self.start = time.monotonic()
+        self.steps = []
+
+    def __call__(self, step):
+        self.steps.append((time.monotonic() - self.start, step))
+
+
+def test_compiles_to_ready_frames_grouped_by_instant():
+    compiled = wiggle().compile()
+    assert [step.at for step in compiled.steps] == [0.0, 0.1, 0.2]
+    first = compiled.steps[0]
+    assert first.frames == [
+        (codec.encode_move(80, -80), "move"),
+        (codec.encode_rgb_led_onboard(0, 255, 0, 0), ("led", codec.ONBOARD_LED_PORT, codec.ONBOARD_LED_SLOT, 0)),
+    ]
+    assert first.state == {"move": (80, -80), ("led", 1): (255, 0, 0), ("led", 2): (255, 0, 0)}
+    assert compiled.steps[2].state["buzzer"] is None
+    assert compiled.duration == pytest.approx(0.25)
+    assert compiled.cleanup.state == {
+        "move": (0, 0), ("led", 1): (0, 0, 0), ("led", 2): (0, 0, 0), "buzzer": 0,
+    }
+
+
+def test_steps_are_sent_at_their_deadlines():
+    log = StepLog()
+    player = ChoreographyPlayer(log)
+    try:
+        player.play(wiggle().compile())
+        assert player.playing and player.controls_motors
+        assert player.wait(timeout=1.0)
+    finally:
+        player.close()
+
+    offsets = [offset for offset, _ in log.steps]
+    assert offsets == [pytest.approx(at, abs=0.03) for at in (0.0, 0.1, 0.2)]
+    assert player.stats()["timelines_played"] == 1
+
+
+def test_cancel_sends_cleanup_and_nothing_after():
+    log = StepLog()
+    player = ChoreographyPlayer(log)
+    try:
+        player.play(wiggle().compile())
+        time.sleep(0.05)
+        assert player.cancel()
+        assert not player.playing
+        time.sleep(0.25)
+    finally:
+        player.close()
+
+    assert len(log.steps) == 2
+    assert log.steps[-1][1].state["move"] == (0, 0)
+    assert not player.cancel()
+
+
+def test_stop_cuts_a_dance_on_the_wire():
+    with VirtualMBot() as firmware:
+        controller = MBotController(mbot=MBotOriginalProtocol("usb", port=firmware.port))
+        try:
+            controller.perform_dance()
+            time.sleep(0.15)
+            assert (firmware.left_speed, firmware.right_speed) == (80, -80)
+
+            start = time.perf_counter()
+            controller.stop()
+            assert time.perf_counter() - start < 0.02
+            stopped_at = time.monotonic()
+            time.sleep(0.6)
+            moves = [args for stamp, device, args in firmware.commands
+                     if device == codec.DEVICE_JOYSTICK and stamp > stopped_at]
+            # Tras stop() solo llega la parada: ningún paso pendiente del baile
+            assert moves in ([], [codec.encode_move(0, 0)[6:]])
+            assert (firmware.left_speed, firmware.right_speed) == (0, 0)
+            # La sombra sabe que está parado: stop() no repitió el comando
+            assert controller.command_stats()["move"]["sent"] == 0
+        finally:
+            controller.shutdown()
+
+
+def test_flash_survives_stop_while_stopped():
+    with VirtualMBot() as firmware:
+        controller = MBotController(mbot=MBotOriginalProtocol("usb", port=firmware.port))
+        led = (codec.ONBOARD_LED_PORT, codec.ONBOARD_LED_SLOT, 0)
+        try:
+            controller.stop()
+            controller.flash_leds((0, 0, 255), 0.2)
+            # El modo STOP repite stop() en cada tick: el destello no se corta
+            for _ in range(3):
+                controller.stop()
+                time.sleep(0.05)
+            assert controller.choreography.playing
+            assert firmware.leds.get(led) == (0, 0, 255)
+            assert controller.choreography.wait(timeout=1.0)
+            deadline = time.monotonic() + 0.5
+            while firmware.leds.get(led) != (0, 0, 0) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert firmware.leds.get(led) == (0, 0, 0)
+
+            # Una cancelación explícita sí lo corta
+            controller.flash_leds((255, 0, 0), 1.0)
+            assert controller.choreography.cancel()
+            assert not controller.choreography.playing
+        finally:
+            controller.shutdown()
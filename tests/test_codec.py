@@ -0,0 +1,64 @@
+import pytest
+
+from src.protocols import codec
+from src.protocols.mbot_ble_fixed import MBotBLEFixed
+from src.protocols.mbot_ble_simple import MBotBLE
+
+
+def test_move_golden_bytes():
+    # Izquierdo invertido, shorts little-endian
+    assert codec.encode_move(100, 100) == bytes.fromhex("ff55070002059cff6400")
+    assert codec.encode_move(0, 0) == bytes.fromhex("ff550700020500000000")
+    assert codec.encode_move(-80, 80) == bytes.fromhex("ff550700020550005000")
+
+
+def test_command_golden_bytes():
+    assert codec.encode_rgb_led_onboard(0, 255, 0, 0) == bytes.fromhex("ff5509000208070200ff0000")
+    assert codec.encode_rgb_led(3, 1, 2, 10, 20, 30) == bytes.fromhex("ff55090002080301020a141e")
+    assert codec.encode_buzzer(440, 500) == bytes.fromhex("ff5507000222b801f401")
+    assert codec.encode_motor(9, -100) == bytes.fromhex("ff550600020a099cff")
+    assert codec.encode_servo(1, 2, 90) == bytes.fromhex("ff550600020b01025a")
+
+
+def test_request_golden_bytes():
+    assert codec.encode_ultrasonic_request(7, 1, 3) == bytes.fromhex("ff55050701010103")
+    assert codec.encode_version_request(200) == bytes.fromhex("ff5503c80100")
+
+
+def test_length_byte_counts_following_bytes():
+    frames = [
+        codec.encode_move(1, 2),
+        codec.encode_rgb_led_onboard(1, 2, 3, 4),
+        codec.encode_buzzer(1, 2),
+        codec.encode_motor(9, 1),
+        codec.encode_servo(1, 2, 3),
+        codec.encode_ultrasonic_request(1, 1, 3),
+        codec.encode_version_request(1),
+    ]
+    for frame in frames:
+        assert frame[2] == len(frame) - 3
+
+
+def test_pack_into_preallocated_buffer():
+    buffer = bytearray(codec.MOVE.size + codec.BUZZER.size)
+    offset = codec.MOVE.pack_into(buffer, 0, -50, 50)
+    offset = codec.BUZZER.pack_into(buffer, offset, 523, 180)
+    assert offset == len(buffer)
+    assert bytes(buffer) == codec.encode_move(50, 50) + codec.encode_buzzer(523, 180)
+
+
+@pytest.mark.parametrize("cls", [MBotBLE, MBotBLEFixed])
+def test_ble_transports_share_the_codec(cls):
+    mbot = cls.__new__(cls)
+    sent = []
+    mbot.write = sent.append
+    mbot.doMove(-90, 90)
+    mbot.doRGBLedOnBoard(1, 0, 0, 255)
+    mbot.doBuzzer(659, 120)
+    mbot.doMotor(10, 0)
+    assert sent == [
+        codec.encode_move(-90, 90),
+        codec.encode_rgb_led_onboard(1, 0, 0, 255),
+        codec.encode_buzzer(659, 120),
+        codec.encode_motor(10, 0),
+    ]
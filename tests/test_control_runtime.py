@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from src.core.control_runtime import ControlRuntime, PeriodicStats
+from src.core.voice_interface import COMMAND, WAKE, VoiceEvent
+from tests.fakes import FakeController, ScriptedVoice
+
+
+def run_for(runtime, seconds):
+    thread = threading.Thread(target=runtime.run, daemon=True)
+    thread.start()
+    assert runtime.wait_started(1.0)
+    time.sleep(seconds)
+    runtime.stop()
+    thread.join(timeout=1.0)
+    assert not thread.is_alive()
+    return runtime.stats()
+
+
+def simulate(stats, steps):
+    """Reloj falso: cada paso es ``(retraso al despertar, duración)``; devuelve los arranques."""
+    deadline, now, starts = 0.0, 0.0, []
+    for lateness, duration in steps:
+        started = max(now, deadline) + lateness
+        now = started + duration
+        starts.append(started)
+        deadline = stats.advance(deadline, started, now)
+    return starts, deadline
+
+
+def test_deadlines_stay_on_the_grid_despite_late_wakeups():
+    stats = PeriodicStats(0.01)
+    starts, deadline = simulate(stats, [(0.0, 0.002), (0.004, 0.001), (0.0, 0.002), (0.009, 0.0005)])
+
+    # Un despertar tardío no desplaza los plazos siguientes
+    assert starts == pytest.approx([0.0, 0.014, 0.02, 0.039])
+    assert deadline == pytest.approx(0.04)
+    snapshot = stats.snapshot()
+    assert snapshot["ticks"] == 4
+    assert snapshot["overruns"] == 0
+    assert snapshot["jitter"]["max_ms"] == pytest.approx(9.0)
+
+
+def test_overruns_are_counted_and_phase_is_kept():
+    stats = PeriodicStats(0.01)
+    # Cada paso tarda 25 ms: se come dos plazos de 10 ms
+    starts, deadline = simulate(stats, [(0.0, 0.025)] * 4)
+
+    assert starts == pytest.approx([0.0, 0.03, 0.06, 0.09])
+    assert deadline == pytest.approx(0.12)
+    assert stats.overruns == 4
+    assert stats.missed_ticks == 8
+    assert stats.snapshot()["period_ms"]["avg"] == pytest.approx(30.0)
+
+
+def test_runtime_ticks_on_the_wall_clock():
+    """Humo con reloj real: márgenes que aguantan una máquina cargada."""
+    starts = []
+
+    def slow_step():
+        starts.append(time.monotonic())
+        time.sleep(0.025)
+
+    runtime = ControlRuntime()
+    runtime.every("control", 100.0, lambda: None)
+    runtime.every("lento", 100.0, slow_step)
+    began = time.monotonic()
+    stats = run_for(runtime, 0.3)
+    elapsed = time.monotonic() - began
+
+    control, slow = stats["control"], stats["lento"]
+    assert control["ticks"] >= 3
+    # Nunca corre por delante de la rejilla: como mucho un plazo por periodo
+    assert control["ticks"] + control["missed_ticks"] <= elapsed / 0.01 + 1
+    assert slow["ticks"] >= 2
+    assert slow["overruns"] == slow["ticks"] == len(starts)
+    assert slow["missed_ticks"] >= 2 * slow["overruns"]
+
+
+def test_explorer_drains_voice_events_without_waiting():
+    from main import MBotExplorer
+
+    controller = FakeController({"front": 100.0})
+    explorer = MBotExplorer(controller=controller, voice_enabled=False, handle_signals=False)
+    explorer.voice = ScriptedVoice(VoiceEvent(WAKE, None, 0.0), VoiceEvent(COMMAND, "para", 0.0))
+    thread = threading.Thread(target=explorer.run, daemon=True)
+    thread.start()
+    time.sleep(0.3)
+    stats = explorer.runtime.stats()["control"]
+    explorer.request_exit()
+    thread.join(timeout=1.0)
+
+    assert stats["overruns"] == 0
+    assert explorer.voice.polls >= stats["ticks"] >= 4
+    assert ("flash_leds", (0, 0, 255), 0.2) in controller.calls
+    assert ("stop",) in controller.calls
+    # Al salir del bucle el controlador se apaga (motores parados, hilos fuera)
+    assert controller.calls[-1] == ("shutdown",)
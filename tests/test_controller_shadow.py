@@ -0,0 +1,92 @@
+import time
+
+from src.core import mbot_controller
+from src.core.mbot_controller import MBotController
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tools.virtual_mbot import VirtualMBot
+
+
+class RecordingMBot:
+    connection_type = "usb"
+
+    def __init__(self):
+        self.calls = []
+
+    def doMove(self, left_speed, right_speed):
+        self.calls.append(("move", left_speed, right_speed))
+
+    def doRGBLedOnBoard(self, index, red, green, blue):
+        self.calls.append(("led", index, red, green, blue))
+
+    def doBuzzer(self, frequency, duration=0):
+        self.calls.append(("buzzer", frequency, duration))
+
+
+def test_repeated_drive_and_stop_are_sent_once():
+    mbot = RecordingMBot()
+    controller = MBotController(mbot=mbot)
+    for _ in range(10):
+        controller.drive_forward(90)
+    for _ in range(10):
+        controller.stop()
+    controller.turn_left(80)
+
+    assert mbot.calls == [("move", 90, 90), ("move", 0, 0), ("move", -80, 80)]
+    assert controller.command_stats()["move"] == {"sent": 3, "suppressed": 18}
+
+
+def test_refresh_interval_resends_identical_state(monkeypatch):
+    monkeypatch.setattr(mbot_controller, "COMMAND_REFRESH_INTERVAL", 0.05)
+    mbot = RecordingMBot()
+    controller = MBotController(mbot=mbot)
+    controller.drive_forward(90)
+    controller.drive_forward(90)
+    time.sleep(0.06)
+    controller.drive_forward(90)
+    assert len(mbot.calls) == 2
+
+    controller.forget_sent_state()
+    controller.drive_forward(90)
+    assert len(mbot.calls) == 3
+
+
+def test_leds_and_buzzer_shadow():
+    mbot = RecordingMBot()
+    controller = MBotController(mbot=mbot)
+    controller.set_led(0, 0, 0, 255)
+    controller.set_led(1, 0, 0, 255)   # ya estaba por el índice 0
+    controller.set_led(2, 255, 0, 0)
+    controller.set_led(0, 255, 0, 0)   # el LED 1 sigue azul
+    controller.set_led(0, 255, 0, 0)
+
+    controller.buzz(0)
+    controller.buzz(0)
+    controller.buzz(440, 200)
+    controller.buzz(440, 200)          # dos pitidos son dos pitidos
+    controller.buzz(0)
+
+    assert mbot.calls == [
+        ("led", 0, 0, 0, 255),
+        ("led", 2, 255, 0, 0),
+        ("led", 0, 255, 0, 0),
+        ("buzzer", 0, 0),
+        ("buzzer", 440, 200),
+        ("buzzer", 440, 200),
+        ("buzzer", 0, 0),
+    ]
+    stats = controller.command_stats()
+    assert stats["led"] == {"sent": 3, "suppressed": 2}
+    assert stats["buzzer"] == {"sent": 4, "suppressed": 1}
+    assert stats["total"] == {"sent": 7, "suppressed": 3}
+
+
+def test_suppressed_commands_never_reach_the_wire():
+    with VirtualMBot() as firmware:
+        controller = MBotController(mbot=MBotOriginalProtocol("usb", port=firmware.port))
+        try:
+            for _ in range(50):
+                controller.drive_forward(90)
+            assert controller.mbot.metrics.commands_queued == 1
+        finally:
+            controller.shutdown()
+        assert (firmware.left_speed, firmware.right_speed) == (0, 0)
@@ -0,0 +1,66 @@
+import random
+
+from src.core.command_parser import Command
+from src.core.drive_modes import CRUISE, REVERSE, TURN, ExploreMode, FollowMode
+from tests.fakes import FakeController
+
+SETTINGS = {
+    "forward_speed": 90,
+    "turn_speed": 80,
+    "reverse_time": 0.4,
+    "turn_time": 0.7,
+    "obstacle_distance_cm": 25.0,
+    "sound_every_seconds": 8.0,
+}
+FOLLOW = {"min_distance_cm": 15.0, "max_distance_cm": 45.0, "forward_speed": 75, "turn_speed": 70}
+
+
+def test_obstacle_maneuver_advances_without_blocking():
+    controller = FakeController({"front": 10.0})
+    mode = ExploreMode(controller, SETTINGS, rng=random.Random(1))
+
+    mode.tick(now=0.0)
+    assert mode.state == REVERSE
+    assert controller.calls == [("stop",), ("play_random_sound",), ("drive_backward", 80)]
+
+    controller.calls.clear()
+    mode.tick(now=0.2)  # sigue retrocediendo: no se manda nada
+    assert controller.calls == [] and mode.state == REVERSE
+
+    mode.tick(now=0.4)
+    assert mode.state == TURN
+    assert controller.calls[0][0] in ("turn_left", "turn_right")
+
+    controller.distances["front"] = 100.0
+    mode.tick(now=1.1)
+    assert mode.state == CRUISE and controller.calls[-1] == ("stop",)
+    mode.tick(now=1.15)
+    assert controller.calls[-1] == ("drive_forward", 90)
+
+
+def test_follow_corrects_towards_the_side_that_sees_you():
+    controller = FakeController({"front": 30.0, "left": 20.0, "right": None})
+    mode = FollowMode(controller, FOLLOW, correction_time=0.1)
+    mode.tick(now=0.0)
+    assert controller.calls == [("drive_forward", 75), ("turn_left", 70)]
+    mode.tick(now=0.05)
+    assert len(controller.calls) == 2  # corrigiendo aún
+    controller.distances.update(front=60.0, left=None)
+    mode.tick(now=0.1)
+    assert controller.calls[-1] == ("stop",)
+
+
+def test_stop_command_takes_effect_mid_maneuver():
+    from main import MBotExplorer
+
+    controller = FakeController({"front": 10.0})
+    explorer = MBotExplorer(controller=controller, voice_enabled=False, handle_signals=False)
+    explorer.step()
+    assert explorer.explore.state == REVERSE
+
+    explorer.submit_command("para")
+    controller.calls.clear()
+    explorer.step()
+    assert explorer.mode == Command.STOP
+    assert controller.calls[0] == ("stop",)
+    assert not any(call[0].startswith(("turn", "drive")) for call in controller.calls)
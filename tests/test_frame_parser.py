@@ -0,0 +1,59 @@
+import struct
+
+import pytest
+
+from src.protocols.frame_parser import FrameParser
+
+
+def _float_frame(idx, value):
+    payload = bytes([idx, 0x02]) + struct.pack("<f", value)
+    return bytes([0xff, 0x55, len(payload)]) + payload
+
+
+def test_frame_split_across_feeds():
+    parser = FrameParser()
+    frame = _float_frame(7, 12.5)
+    parser.feed(frame[:4])
+    assert parser.next_frame() is None
+    parser.feed(frame[4:])
+    idx, value = parser.next_frame()
+    assert idx == 7
+    assert value == pytest.approx(12.5)
+    assert len(parser) == 0
+
+
+def test_resyncs_after_noise_and_counts_discarded_bytes():
+    parser = FrameParser()
+    noise = bytes([0x01, 0x02, 0xff, 0x03, 0x55, 0xff, 0x55, 0x00])
+    parser.feed(noise + _float_frame(3, 99.0) + b"\x10\x20")
+    idx, value = parser.next_frame()
+    assert (idx, value) == (3, pytest.approx(99.0))
+    assert parser.next_frame() is None
+    assert parser.discarded_bytes == len(noise)
+
+
+def test_trailing_half_header_is_kept():
+    parser = FrameParser()
+    frame = _float_frame(9, 1.0)
+    parser.feed(b"\x00\x00" + frame[:1])
+    assert parser.next_frame() is None
+    parser.feed(frame[1:])
+    assert parser.next_frame()[0] == 9
+
+
+def test_buffer_compacts_and_grows():
+    parser = FrameParser(capacity=16)
+    frames = [_float_frame(i, float(i)) for i in range(1, 40)]
+    decoded = []
+    for frame in frames:
+        parser.feed(frame)
+        parsed = parser.next_frame()
+        if parsed:
+            decoded.append(parsed[0])
+    parser.feed(b"".join(frames))
+    while True:
+        parsed = parser.next_frame()
+        if not parsed:
+            break
+        decoded.append(parsed[0])
+    assert decoded == list(range(1, 40)) * 2
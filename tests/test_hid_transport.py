@@ -0,0 +1,125 @@
+import time
+
+import pytest
+import serial
+
+from src.protocols import codec, mbot_original_protocol
+from src.protocols.hid_transport import (
+    HID_PAYLOAD_SIZE,
+    HID_REPORT_SIZE,
+    build_report,
+    pack_chunks,
+    report_payload,
+)
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tools.virtual_mbot import VirtualMBot
+
+
+class FakeDongle:
+    """Dongle HID que pasa los informes al mBot virtual por su PTY."""
+
+    def __init__(self, port):
+        self.link = serial.Serial(port, 115200, timeout=0)
+        self.reports = []
+        self.closed = False
+
+    def write(self, report):
+        assert len(report) == HID_REPORT_SIZE + 1 and report[0] == 0
+        self.reports.append(bytes(report))
+        self.link.write(report_payload(bytes(report[1:])))
+        return len(report)
+
+    def read(self, size, timeout_ms):
+        if self.closed:
+            raise ValueError("cerrado")
+        self.link.timeout = timeout_ms / 1000
+        data = self.link.read(1)
+        if data:
+            data += self.link.read(min(self.link.in_waiting, size - 2))
+        return [len(data)] + list(data) if data else []
+
+    def close(self):
+        self.closed = True
+        self.link.close()
+
+
+@pytest.fixture
+def dongle(monkeypatch):
+    with VirtualMBot(distance=42.0) as firmware:
+        firmware.set_sensor(codec.DEVICE_LINE_FOLLOWER, 2, 3)
+        device = FakeDongle(firmware.port)
+        monkeypatch.setattr(mbot_original_protocol, "open_hid_device", lambda: device)
+        device.firmware = firmware
+        yield device
+
+
+def test_small_frames_share_a_report():
+    frames = [bytes(10)] * 7 + [bytes(70)]
+    chunks = pack_chunks(frames, HID_PAYLOAD_SIZE)
+    assert [len(chunk) for chunk in chunks] == [60, 10, 63, 7]
+    assert b"".join(chunks) == b"".join(frames)
+
+    report = build_report(b"\xff\x55\x02")
+    assert len(report) == HID_REPORT_SIZE + 1
+    assert report[:5] == b"\x00\x03\xff\x55\x02" and not any(report[5:])
+    assert report_payload(report[1:]) == b"\xff\x55\x02"
+    assert report_payload([]) == b""
+
+
+def test_connects_and_reads_sensors_over_hid(dongle):
+    mbot = MBotOriginalProtocol("hid")
+    try:
+        assert mbot.connection_type == "hid"
+        assert mbot.firmware_version == dongle.firmware.firmware_version
+        assert mbot.get_ultrasonic_distance(1) == pytest.approx(42.0)
+        assert mbot.read_sensors(["line_follower", ("ultrasonic", 1, 3)]) == [3, pytest.approx(42.0)]
+    finally:
+        mbot.close()
+    assert dongle.closed and mbot.hid_device is None
+
+
+def test_motor_and_led_commands_travel_in_one_report(dongle):
+    mbot = MBotOriginalProtocol("hid")
+    try:
+        reports_before = len(dongle.reports)
+        with mbot._outbox_cond:
+            # Con el lock tomado el escritor no puede vaciar la cola a medias
+            mbot.doMove(120, -80)
+            mbot.doRGBLedOnBoard(0, 10, 20, 30)
+        deadline = time.monotonic() + 1.0
+        while (dongle.firmware.left_speed, dongle.firmware.right_speed) != (120, -80):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert len(dongle.reports) == reports_before + 1
+    finally:
+        mbot.close()
+
+
+def test_no_dongle_means_no_connection(monkeypatch):
+    monkeypatch.setattr(mbot_original_protocol, "open_hid_device", lambda: None)
+    with pytest.raises(Exception, match="dongle"):
+        MBotOriginalProtocol("hid")
+
+
+def test_silent_dongle_is_released_without_closing_the_protocol(monkeypatch, capsys):
+    class SilentDongle:
+        closed = False
+
+        def write(self, report):
+            return len(report)
+
+        def read(self, size, timeout_ms):
+            time.sleep(timeout_ms / 1000)
+            return []
+
+        def close(self):
+            self.closed = True
+
+    device = SilentDongle()
+    monkeypatch.setattr(mbot_original_protocol, "open_hid_device", lambda: device)
+    monkeypatch.setattr(mbot_original_protocol, "USB_HANDSHAKE_TIMEOUT", 0.3)
+    with pytest.raises(Exception, match="dongle"):
+        MBotOriginalProtocol("hid")
+    assert device.closed
+    # Solo se suelta el dongle: nada de «Conexión cerrada» a mitad del sondeo
+    assert "Conexión cerrada" not in capsys.readouterr().out
@@ -0,0 +1,34 @@
+from src.protocols import codec
+from src.protocols.connection_cache import store_cached
+from src.protocols.link_setup import VersionProbe, ble_candidate_addresses, ble_link_lost, usb_candidate_ports
+
+
+def test_probe_returns_only_the_reply_to_its_own_index():
+    probe = VersionProbe(7, timeout=1.0, retry=10.0)
+    assert probe.request == codec.encode_version_request(7)
+    assert probe.due() and not probe.due()
+
+    other = codec.encode_reply(3, 12.0)
+    ours = codec.encode_reply(7, "09.01.017", codec.TYPE_STRING)
+    assert probe.feed(other + ours[:4]) is None
+    assert probe.feed(ours[4:]) == "09.01.017"
+
+
+def test_candidates_without_discovery_skip_cache_and_scan():
+    store_cached("usb_port", "/dev/cached")
+    store_cached("ble_address", "AA:BB")
+    assert usb_candidate_ports("/dev/mine", discover=False) == ["/dev/mine"]
+    assert usb_candidate_ports(None, discover=False) == []
+    assert ble_candidate_addresses("CC:DD", discover=False) == ["CC:DD"]
+    assert ble_candidate_addresses("AA:BB") == ["AA:BB"]
+    assert ble_candidate_addresses() == ["AA:BB"]
+
+
+def test_only_the_active_ble_link_fails_pending_reads(capsys):
+    failed = []
+    active = object()
+    assert not ble_link_lost(object(), active, True, lambda: failed.append(1))
+    assert failed == []
+    assert ble_link_lost(active, active, True, lambda: failed.append(1))
+    assert failed == [1]
+    assert "desconectado" in capsys.readouterr().out
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from src.core.mbot_fleet import MBotFleet
+from src.protocols.mbot_original_protocol import SENSOR_RETRIES
+from tools.virtual_mbot import VirtualMBot
+
+
+@pytest.fixture
+def robots():
+    emulators = [VirtualMBot(distance=20.0 + 10 * i, latency=0.002).start() for i in range(3)]
+    yield emulators
+    for emulator in emulators:
+        emulator.stop()
+
+
+def test_fleet_connects_all_robots_on_one_thread(robots, wait_for):
+    threads_before = threading.active_count()
+    specs = [{"name": f"r{i}", "port": emulator.port} for i, emulator in enumerate(robots)]
+    specs.append({"name": "ausente", "port": "/dev/no-existe"})
+
+    with MBotFleet() as fleet:
+        fleet.connect(specs, timeout=2.0)
+        assert sorted(fleet.robots) == ["r0", "r1", "r2"]
+        assert "ausente" in fleet.failed
+        # Un único hilo para toda la flota, sin hilos por robot
+        assert threading.active_count() == threads_before + 1
+
+        for i, emulator in enumerate(robots):
+            fleet[f"r{i}"].drive(40 + i, 50 + i)
+        assert wait_for(lambda: all(
+            (e.left_speed, e.right_speed) == (40 + i, 50 + i) for i, e in enumerate(robots)
+        ))
+
+        distances = fleet.broadcast("read_distance", "front")
+        assert distances == {
+            "r0": pytest.approx(20.0), "r1": pytest.approx(30.0), "r2": pytest.approx(40.0),
+        }
+
+        metrics = fleet.metrics()
+        assert metrics["robots"] == 3 and metrics["failed"] == 1
+        assert metrics["commands_sent"] == 3
+        # Con la máquina cargada alguna respuesta puede llegar tras el plazo y
+        # reintentarse; lo que no puede es pasar del presupuesto de reintentos
+        assert 3 <= metrics["sensor_requests"] <= 3 * (SENSOR_RETRIES + 1)
+        assert metrics["sensor_timeouts"] == metrics["sensor_requests"] - 3
+        assert metrics["rtt_avg_ms"] > 0
+        assert set(metrics["per_robot"]) == {"r0", "r1", "r2"}
+
+    assert all((e.left_speed, e.right_speed) == (0, 0) for e in robots)
+
+
+def test_fleet_rejects_ble_robot_without_address():
+    fleet = MBotFleet()
+    try:
+        with pytest.raises(ValueError):
+            fleet.connect([{"name": "azul", "connection_type": "ble"}])
+    finally:
+        fleet.shutdown()
+
+
+def test_batched_reads_and_clean_shutdown(robots):
+    robots[0].set_distance(55.0, port=2)
+    fleet = MBotFleet()
+    fleet.connect([{"name": "r0", "port": robots[0].port}], timeout=2.0)
+    controller = fleet["r0"]
+    transport = fleet._transports["r0"]
+
+    writes = transport.metrics()["writes"]
+    assert transport.get_ultrasonic_distances([(1, 3), (2, 3)]) == [pytest.approx(20.0), pytest.approx(55.0)]
+    # Las dos peticiones viajan en una sola escritura
+    assert transport.metrics()["writes"] == writes + 1
+
+    controller.drive(60, 60)
+    controller.play_sound_sequence([(440, 500)])
+    fleet.shutdown()
+
+    assert (robots[0].left_speed, robots[0].right_speed) == (0, 0)
+    assert not controller.sounds.playing
+    assert controller.sounds._thread is None or not controller.sounds._thread.is_alive()
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from src.protocols.async_mbot import AsyncMBot
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from src.protocols.metrics import LatencyHistogram
+from tools.virtual_mbot import VirtualMBot
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.record(0.0008)
+    for _ in range(10):
+        histogram.record(0.030)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["p50_ms"] == pytest.approx(1.0)
+    assert snapshot["p99_ms"] == pytest.approx(30.0)  # acotado por el máximo real
+    assert snapshot["max_ms"] == pytest.approx(30.0)
+    assert snapshot["avg_ms"] == pytest.approx(3.72)
+    assert snapshot["buckets"] == [(1.0, 90), (50.0, 10)]
+
+
+def test_protocol_snapshot_counts_rtt_timeouts_and_resync():
+    with VirtualMBot(distance=33.0, noise_rate=1.0, seed=3) as firmware:
+        mbot = MBotOriginalProtocol("usb", port=firmware.port)
+        try:
+            mbot.doMove(50, 50)
+            for _ in range(5):
+                assert mbot.get_ultrasonic_distance(1, 3) == pytest.approx(33.0)
+            # Un sensor sin valor en el emulador no contesta nunca
+            assert mbot.get_ultrasonic_distance(4, 3, timeout=0.05) is None
+            snapshot = mbot.metrics_snapshot()
+        finally:
+            mbot.close()
+
+    assert snapshot["sensor_requests"] == 6
+    assert snapshot["sensor_replies"] == 5
+    assert snapshot["sensor_timeouts"] == 1
+    assert snapshot["sensor_rtt"]["count"] == 5
+    assert snapshot["resync_bytes"] > 0
+    assert snapshot["requests_in_flight"] == 0
+    assert set(snapshot["command_latency"]) == {"move", "request"}
+    assert snapshot["writes"] >= 1 and snapshot["write_time"]["count"] == snapshot["writes"]
+
+
+def test_late_reply_is_counted_as_stale():
+    with VirtualMBot(distance=10.0, latency=0.1) as firmware:
+        mbot = MBotOriginalProtocol("usb", port=firmware.port)
+        try:
+            assert mbot.get_ultrasonic_distance(1, 3, timeout=0.02) is None
+            assert mbot.get_ultrasonic_distance(1, 3, timeout=0.5) == pytest.approx(10.0)
+            snapshot = mbot.metrics_snapshot()
+        finally:
+            mbot.close()
+
+    assert snapshot["sensor_timeouts"] == 1
+    assert snapshot["stale_replies"] == 1
+
+
+def test_async_mbot_snapshot():
+    async def scenario(port):
+        async with await AsyncMBot.connect("usb", port=port) as mbot:
+            await mbot.move(40, 40)
+            await mbot.read_ultrasonic(1, 3)
+            await mbot.read_ultrasonic(5, 3, timeout=0.05)
+            return mbot.metrics_snapshot()
+
+    with VirtualMBot(distance=12.0) as firmware:
+        snapshot = asyncio.run(scenario(firmware.port))
+
+    assert snapshot["sensor_requests"] == 2
+    assert snapshot["sensor_timeouts"] == 1
+    assert snapshot["sensor_rtt"]["count"] == 1
+    assert snapshot["command_latency"]["move"]["count"] == 1
+    assert snapshot["writes"] == 3
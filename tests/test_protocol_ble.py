@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.protocols import codec
+from src.protocols import connection_cache as connection_cache_module
+from src.protocols import mbot_original_protocol as protocol_module
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tests.fakes import FakeBleakClient, FakeBleakScanner
+
+@pytest.fixture(autouse=True)
+def reset_scanner():
+    FakeBleakScanner.scans = 0
+
+
+@pytest.fixture
+def ble_mbot(monkeypatch):
+    FakeBleakClient.instances.clear()
+    monkeypatch.setattr(protocol_module, "BLUETOOTH_AVAILABLE", True)
+    monkeypatch.setattr(protocol_module, "BleakClient", FakeBleakClient, raising=False)
+    monkeypatch.setattr(protocol_module, "BleakScanner", FakeBleakScanner, raising=False)
+    start = time.monotonic()
+    mbot = MBotOriginalProtocol(connection_type="bluetooth")
+    mbot.connect_time = time.monotonic() - start
+    yield mbot
+    mbot.close()
+
+
+def test_connect_reports_as_soon_as_link_is_up(ble_mbot):
+    assert ble_mbot.connection_type == "bluetooth"
+    assert ble_mbot.connect_time < 0.5
+
+
+def test_writes_without_response_and_reads_sensor(ble_mbot):
+    ble_mbot.doMove(80, 80)
+    assert ble_mbot.get_ultrasonic_distance(1, 3, timeout=1.0) == pytest.approx(55.0)
+    client = FakeBleakClient.instances[-1]
+    # El move y la petición viajan en la misma escritura sin respuesta
+    data, response = client.writes[0]
+    assert response is False
+    assert data.startswith(codec.encode_move(80, 80))
+    assert len(data) <= ble_mbot.ble_payload_size
+    stats = ble_mbot.ble_write_stats()
+    assert stats["write_without_response"] is True
+    assert stats["queue_depth"] == 0
+    # Una sola fuente de verdad: las mismas cifras que metrics_snapshot()
+    snapshot = ble_mbot.metrics_snapshot()
+    assert stats["writes"] == snapshot["ble_write"]["count"] == snapshot["writes"] >= 1
+    assert stats["frames"] == snapshot["frames_written"] == 2
+    assert stats["bytes"] == snapshot["bytes_written"]
+
+
+def test_close_is_fast_and_stops_the_ble_thread(ble_mbot):
+    ble_mbot.doMove(0, 0)
+    start = time.monotonic()
+    ble_mbot.close()
+    assert time.monotonic() - start < 0.5
+    assert not ble_mbot.ble_thread.is_alive()
+    client = FakeBleakClient.instances[-1]
+    assert not client.is_connected
+    assert client.writes[-1][0] == codec.encode_move(0, 0)
+
+
+def test_scan_result_is_cached_and_reused(ble_mbot):
+    assert FakeBleakScanner.scans == 1
+    ble_mbot.close()
+    assert connection_cache_module.load_cached("ble_address") == "AA:BB:CC:DD:EE:FF"
+
+    again = MBotOriginalProtocol(connection_type="bluetooth")
+    try:
+        assert again.connection_type == "bluetooth"
+        assert FakeBleakScanner.scans == 1
+    finally:
+        again.close()
+
+
+def test_unreachable_configured_address_falls_back_to_scan(monkeypatch):
+    monkeypatch.setattr(protocol_module, "BLUETOOTH_AVAILABLE", True)
+    monkeypatch.setattr(protocol_module, "BleakClient", FakeBleakClient, raising=False)
+    monkeypatch.setattr(protocol_module, "BleakScanner", FakeBleakScanner, raising=False)
+    mbot = MBotOriginalProtocol(connection_type="bluetooth", ble_address="00:00:00:00:00:00")
+    try:
+        assert mbot.ble_address == "AA:BB:CC:DD:EE:FF"
+        assert FakeBleakScanner.scans == 1
+    finally:
+        mbot.close()
+
+
+def test_write_budget_follows_the_negotiated_mtu(monkeypatch):
+    monkeypatch.setattr(protocol_module, "BLUETOOTH_AVAILABLE", True)
+    monkeypatch.setattr(protocol_module, "BleakClient", FakeBleakClient, raising=False)
+    monkeypatch.setattr(protocol_module, "BleakScanner", FakeBleakScanner, raising=False)
+    monkeypatch.setattr(FakeBleakClient, "mtu_size", 185)
+    mbot = MBotOriginalProtocol(connection_type="bluetooth", ble_connection_interval=0.03,
+                                ble_packets_per_event=1)
+    try:
+        stats = mbot.ble_write_stats()
+        assert stats["payload_size"] == 182
+        assert stats["bytes_per_second"] == pytest.approx(182 / 0.03)
+    finally:
+        mbot.close()
+
+
+def test_ble_is_an_alias_and_unknown_types_are_rejected(monkeypatch):
+    monkeypatch.setattr(protocol_module, "BLUETOOTH_AVAILABLE", True)
+    monkeypatch.setattr(protocol_module, "BleakClient", FakeBleakClient, raising=False)
+    monkeypatch.setattr(protocol_module, "BleakScanner", FakeBleakScanner, raising=False)
+    mbot = MBotOriginalProtocol(connection_type="ble")
+    try:
+        assert mbot.connection_type == "bluetooth"
+    finally:
+        mbot.close()
+
+    with pytest.raises(ValueError):
+        MBotOriginalProtocol(connection_type="wifi")
+
+
+class StuckBleakClient(FakeBleakClient):
+    """Cliente que tarda en conectar mucho más que el plazo que le dan."""
+
+    timeouts = []
+
+    async def connect(self, timeout=10.0):
+        StuckBleakClient.timeouts.append(timeout)
+        await asyncio.sleep(5.0)
+        self.is_connected = True
+
+
+def test_slow_ble_attempt_is_cancelled_and_its_thread_joined(monkeypatch):
+    StuckBleakClient.timeouts = []
+    monkeypatch.setattr(protocol_module, "BLUETOOTH_AVAILABLE", True)
+    monkeypatch.setattr(protocol_module, "BleakClient", StuckBleakClient, raising=False)
+    monkeypatch.setattr(protocol_module, "BleakScanner", FakeBleakScanner, raising=False)
+    monkeypatch.setattr(protocol_module, "BLE_CONNECT_TIMEOUT", 0.3)
+    monkeypatch.setattr(protocol_module, "BLE_SETUP_MARGIN", 0.1)
+
+    threads = set(threading.enumerate())
+    start = time.monotonic()
+    with pytest.raises(Exception, match="Bluetooth"):
+        mbot = MBotOriginalProtocol(connection_type="bluetooth")
+    assert time.monotonic() - start < 0.3 + protocol_module.BLE_SHUTDOWN_TIMEOUT
+
+    # Tras el escaneo la conexión también recibe plazo, dentro del total
+    assert StuckBleakClient.timeouts and all(t is not None and t <= 0.2 for t in StuckBleakClient.timeouts)
+    # El hilo BLE ya no existe: no puede conectar tarde
+    assert set(threading.enumerate()) <= threads
+    assert not StuckBleakClient.instances[-1].is_connected
@@ -0,0 +1,227 @@
+import struct
+import threading
+import time
+
+import pytest
+
+from src.protocols import codec
+from src.protocols import mbot_original_protocol as protocol_module
+from src.protocols.connection_cache import load_cached
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+
+
+class FakeFirmwareSerial:
+    """Puerto serie falso que responde a las peticiones de ultrasonido.
+
+    Acumula las peticiones y las contesta todas juntas (en orden inverso)
+    cuando llegan ``batch`` peticiones, para comprobar que el emparejado
+    es por índice y no por orden de llegada.
+    """
+
+    def __init__(self, *_, batch=1, distances=None, **__):
+        self.batch = batch
+        self.distances = distances or {}
+        self.requests = []
+        self.writes = []
+        self._rx = bytearray()
+        self._cond = threading.Condition()
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return len(self._rx)
+
+    def write(self, data):
+        data = bytes(data)
+        self.writes.append(data)
+        pos = 0
+        while pos + 3 <= len(data):
+            frame = data[pos:pos + data[pos + 2] + 3]
+            if frame[4:6] == b"\x01\x01":
+                self.requests.append((frame[3], frame[6], frame[7]))
+            elif frame[4:6] == b"\x01\x00":
+                self._reply_version(frame[3])
+            pos += len(frame)
+        with self._cond:
+            if len(self.requests) >= self.batch:
+                for idx, port, slot in reversed(self.requests):
+                    value = self.distances.get((port, slot))
+                    if value is None:
+                        continue
+                    payload = bytes([idx, 0x02]) + struct.pack("f", value)
+                    self._rx += bytes([0xff, 0x55, len(payload)]) + payload
+                self.requests.clear()
+                self._cond.notify_all()
+        return len(data)
+
+    def _reply_version(self, idx):
+        version = b"09.01.017"
+        payload = bytes([idx, 0x04, len(version)]) + version
+        with self._cond:
+            self._rx += bytes([0xff, 0x55, len(payload)]) + payload
+            self._cond.notify_all()
+
+    def flush(self):
+        pass
+
+    def read(self, size=1):
+        with self._cond:
+            if not self._rx:
+                self._cond.wait(0.05)
+            if not self.is_open:
+                raise protocol_module.serial.SerialException("cerrado")
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+            return data
+
+    def close(self):
+        with self._cond:
+            self.is_open = False
+            self._cond.notify_all()
+
+
+@pytest.fixture
+def make_mbot(monkeypatch):
+    created = []
+
+    def _make(**serial_kwargs):
+        monkeypatch.setattr(MBotOriginalProtocol, "_usb_candidate_ports", lambda self: ["/dev/fake"])
+        monkeypatch.setattr(
+            protocol_module.serial,
+            "Serial",
+            lambda *args, **kwargs: FakeFirmwareSerial(*args, **serial_kwargs, **kwargs),
+        )
+        mbot = MBotOriginalProtocol(connection_type="usb")
+        created.append(mbot)
+        return mbot
+
+    yield _make
+    for mbot in created:
+        mbot.close()
+
+
+def test_single_read_returns_distance(make_mbot):
+    mbot = make_mbot(distances={(1, 3): 42.5})
+    assert mbot.get_ultrasonic_distance(1, 3) == pytest.approx(42.5)
+    assert len(mbot._pending) == 0
+
+
+def test_batched_reads_are_in_flight_together(make_mbot):
+    distances = {(1, 3): 10.0, (2, 3): 20.0, (3, 3): 30.0}
+    mbot = make_mbot(batch=3, distances=distances)
+    values = mbot.get_ultrasonic_distances([(1, 3), (2, 3), (3, 3)], timeout=1.0)
+    assert values == [pytest.approx(10.0), pytest.approx(20.0), pytest.approx(30.0)]
+
+
+def test_missing_reply_times_out_and_is_forgotten(make_mbot):
+    mbot = make_mbot(distances={})
+    assert mbot.get_ultrasonic_distance(1, 3, timeout=0.05) is None
+    assert len(mbot._pending) == 0
+
+
+def test_stale_motor_commands_are_coalesced(make_mbot):
+    mbot = make_mbot()
+    mbot.serial.writes.clear()  # sin el handshake
+    # Simulamos el bus ocupado para que los comandos se acumulen
+    mbot._next_write_at = time.monotonic() + 0.1
+    for speed in range(10, 60, 10):
+        mbot.doMove(speed, speed)
+    mbot.doRGBLedOnBoard(0, 255, 0, 0)
+    mbot._stop_writer(timeout=1.0)
+
+    assert len(mbot.serial.writes) == 1
+    data = mbot.serial.writes[0]
+    assert data.count(b"\xff\x55\x07\x00\x02\x05") == 1
+    assert struct.pack("h", 50) in data
+    assert mbot.coalesced_commands == 4
+
+
+def test_notification_chunks_complete_requests(make_mbot):
+    mbot = make_mbot()
+    future = mbot.request_ultrasonic_distance(1, 3)
+    payload = bytes([future.request_index, 0x02]) + struct.pack("<f", 33.0)
+    frame = bytes([0xff, 0x55, len(payload)]) + payload
+    # El módulo BLE entrega las respuestas troceadas en notificaciones
+    mbot._on_ble_notify(None, frame[:5])
+    assert not future.done()
+    mbot._on_ble_notify(None, frame[5:])
+    assert future.result(timeout=1.0) == pytest.approx(33.0)
+
+
+def test_ble_frames_are_packed_into_mtu_sized_writes(make_mbot):
+    mbot = make_mbot()
+    mbot.ble_payload_size = 20
+    frames = [codec.encode_move(50, 50), codec.encode_rgb_led_onboard(1, 0, 0, 255), codec.encode_buzzer(523, 180)]
+    chunks = mbot._pack_ble_chunks(frames)
+    # 10 + 12 no cabe en 20: la segunda trama abre escritura nueva
+    assert chunks == [frames[0], frames[1], frames[2]]
+    mbot.ble_payload_size = 244
+    assert mbot._pack_ble_chunks(frames) == [b"".join(frames)]
+
+
+def test_usb_connect_waits_for_firmware_reply(make_mbot):
+    mbot = make_mbot()
+    assert mbot.firmware_version == "09.01.017"
+    assert load_cached("usb_port") == "/dev/fake"
+
+
+class SilentSerial(FakeFirmwareSerial):
+    """Otro adaptador USB-serie que no es un mBot: nunca contesta."""
+
+    def write(self, data):
+        return len(data)
+
+
+def test_usb_probe_picks_the_port_that_answers(monkeypatch):
+    opened = {}
+
+    def fake_serial(port, *args, **kwargs):
+        opened[port] = (SilentSerial if port == "/dev/other" else FakeFirmwareSerial)()
+        return opened[port]
+
+    monkeypatch.setattr(MBotOriginalProtocol, "_usb_candidate_ports", lambda self: ["/dev/other", "/dev/mbot"])
+    monkeypatch.setattr(protocol_module.serial, "Serial", fake_serial)
+    mbot = MBotOriginalProtocol(connection_type="usb")
+    try:
+        assert mbot.port == "/dev/mbot"
+        assert mbot.serial is opened["/dev/mbot"]
+        assert not opened["/dev/other"].is_open
+    finally:
+        mbot.close()
+
+
+class OldFirmwareSerial(FakeFirmwareSerial):
+    """Firmware que contesta a la versión en un formato que no entendemos."""
+
+    def _reply_version(self, idx):
+        with self._cond:
+            self._rx += b"mBot v1\r\n"
+            self._cond.notify_all()
+
+
+def test_usb_falls_back_to_a_port_that_talks_in_another_format(monkeypatch, capsys):
+    opened = {}
+
+    def fake_serial(port, *args, **kwargs):
+        opened[port] = (SilentSerial if port == "/dev/other" else OldFirmwareSerial)()
+        return opened[port]
+
+    monkeypatch.setattr(protocol_module, "USB_HANDSHAKE_TIMEOUT", 0.3)
+    monkeypatch.setattr(MBotOriginalProtocol, "_usb_candidate_ports", lambda self: ["/dev/other", "/dev/mbot"])
+    monkeypatch.setattr(protocol_module.serial, "Serial", fake_serial)
+    mbot = MBotOriginalProtocol(connection_type="usb")
+    try:
+        assert mbot.port == "/dev/mbot"
+        assert mbot.firmware_version is None
+        assert not opened["/dev/other"].is_open
+        assert "sin verificar" in capsys.readouterr().out
+    finally:
+        mbot.close()
+
+
+def test_usb_never_picks_a_silent_port(monkeypatch):
+    monkeypatch.setattr(protocol_module, "USB_HANDSHAKE_TIMEOUT", 0.3)
+    monkeypatch.setattr(MBotOriginalProtocol, "_usb_candidate_ports", lambda self: ["/dev/other"])
+    monkeypatch.setattr(protocol_module.serial, "Serial", SilentSerial)
+    with pytest.raises(Exception, match="USB"):
+        MBotOriginalProtocol(connection_type="usb")
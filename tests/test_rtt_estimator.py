@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from src.protocols.mbot_original_protocol import (
+    BLE_SENSOR_TIMEOUT,
+    USB_SENSOR_TIMEOUT,
+    MBotOriginalProtocol,
+)
+from src.protocols.rtt_estimator import RttEstimator
+from tools.virtual_mbot import VirtualMBot
+
+
+def test_estimator_tracks_rtt_and_backs_off():
+    rtt = RttEstimator(initial=0.5, minimum=0.02, maximum=1.0)
+    assert rtt.timeout == 0.5
+
+    for _ in range(50):
+        rtt.sample(0.004)
+    assert rtt.srtt == pytest.approx(0.004)
+    # Sin variación el plazo cae al mínimo del transporte
+    assert rtt.timeout == pytest.approx(0.02)
+
+    rtt.on_timeout()
+    assert rtt.timeout == pytest.approx(0.04)
+    for _ in range(10):
+        rtt.on_timeout()
+    assert rtt.timeout <= 1.0
+    rtt.sample(0.004)
+    assert rtt.timeout == pytest.approx(0.02, abs=0.01)
+
+
+def test_jitter_widens_the_timeout():
+    rtt = RttEstimator(initial=0.5, minimum=0.001, maximum=1.0)
+    for value in (0.01, 0.05) * 20:
+        rtt.sample(value)
+    assert rtt.timeout > 0.05
+
+
+def test_ble_gets_a_larger_budget_than_usb():
+    usb, ble = RttEstimator(*USB_SENSOR_TIMEOUT), RttEstimator(*BLE_SENSOR_TIMEOUT)
+    assert ble.timeout > usb.timeout
+    assert ble.minimum > usb.minimum
+
+
+def test_lost_reply_costs_tens_of_milliseconds_on_usb():
+    replies = iter([20.0] * 10 + [None] + [21.0] * 10)
+    with VirtualMBot(distance=None) as firmware:
+        firmware.set_distance(lambda: next(replies))
+        mbot = MBotOriginalProtocol("usb", port=firmware.port)
+        try:
+            for _ in range(10):
+                assert mbot.get_ultrasonic_distance(1, 3) == pytest.approx(20.0)
+            assert mbot.rtt.timeout < 0.1
+
+            start = time.perf_counter()
+            # La respuesta se pierde y el reintento trae la siguiente
+            assert mbot.get_ultrasonic_distance(1, 3) == pytest.approx(21.0)
+            elapsed = time.perf_counter() - start
+            snapshot = mbot.metrics_snapshot()
+        finally:
+            mbot.close()
+
+    assert elapsed < 0.15
+    assert snapshot["sensor_timeouts"] == 1
+    assert snapshot["sensor_retries"] == 1
+    assert snapshot["rtt"]["samples"] == 11
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+
+from src.core.mbot_controller import MBotController
+from src.protocols import codec
+from src.protocols.async_mbot import AsyncMBot
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tools.virtual_mbot import VirtualMBot
+
+QUERIES = ["line_follower", "light", "sound", "button", ("ultrasonic", 1, 3)]
+
+
+@pytest.fixture
+def firmware():
+    with VirtualMBot(distance=35.0) as firmware:
+        firmware.set_sensor(codec.DEVICE_LINE_FOLLOWER, 2, 1)
+        firmware.set_sensor(codec.DEVICE_LIGHT, codec.ONBOARD_LIGHT_PORT, 512)
+        firmware.set_sensor(codec.DEVICE_SOUND, 3, 140)
+        firmware.set_sensor(codec.DEVICE_BUTTON_INNER, codec.ONBOARD_BUTTON_PORT, True)
+        yield firmware
+
+
+def test_sensor_request_golden_bytes():
+    assert codec.LINE_FOLLOWER_REQUEST.build(5, 2).hex() == "ff550405011102"
+    assert codec.LIGHT_REQUEST.build(6, 8).hex() == "ff550406010308"
+    assert codec.SOUND_REQUEST.build(7, 3).hex() == "ff550407010703"
+    assert codec.BUTTON_REQUEST.build(8, 7, 0).hex() == "ff550508011f0700"
+    template, args, convert = codec.sensor_request(("ultrasonic", 2))
+    assert template is codec.ULTRASONIC_REQUEST and args == (2, 3) and convert is float
+    with pytest.raises(ValueError):
+        codec.sensor_request("gyro")
+
+
+def test_batch_goes_out_in_one_write_and_returns_typed_values(firmware):
+    mbot = MBotOriginalProtocol("usb", port=firmware.port)
+    try:
+        writes_before = mbot.metrics.writes
+        values = mbot.read_sensors(QUERIES)
+        # El escritor cuenta la escritura al volver de ella: la respuesta puede adelantarse
+        deadline = time.monotonic() + 0.5
+        while mbot.metrics.writes == writes_before and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert mbot.metrics.writes == writes_before + 1
+        assert mbot.metrics.sensor_retries == 0
+
+        assert values == [1, pytest.approx(512.0), pytest.approx(140.0), True, pytest.approx(35.0)]
+        assert isinstance(values[0], int) and isinstance(values[3], bool)
+
+        assert mbot.get_line_follower() == 1
+        assert mbot.get_light() == pytest.approx(512.0)
+        assert mbot.get_sound_level() == pytest.approx(140.0)
+        assert mbot.is_button_pressed() is True
+        firmware.set_sensor(codec.DEVICE_BUTTON_INNER, codec.ONBOARD_BUTTON_PORT, False)
+        assert mbot.is_button_pressed() is False
+    finally:
+        mbot.close()
+
+
+def test_missing_sensor_is_retried_alone(firmware):
+    mbot = MBotOriginalProtocol("usb", port=firmware.port)
+    try:
+        values = mbot.read_sensors(["light", ("line_follower", 4)], retries=1)
+        assert values == [pytest.approx(512.0), None]
+        # Solo el siguelíneas del puerto 4 (que no contesta) se volvió a pedir
+        assert mbot.metrics.sensor_retries == 1
+    finally:
+        mbot.close()
+
+
+def test_controller_typed_reads(firmware):
+    controller = MBotController(mbot=MBotOriginalProtocol("usb", port=firmware.port))
+    try:
+        assert controller.read_line_follower() == 1
+        assert controller.read_light() == pytest.approx(512.0)
+        assert controller.read_sound() == pytest.approx(140.0)
+        assert controller.is_button_pressed() is True
+    finally:
+        controller.mbot.close()
+
+
+def test_async_batch(firmware):
+    async def scenario():
+        async with await AsyncMBot.connect("usb", port=firmware.port) as mbot:
+            writes_before = mbot.metrics.writes
+            values = await mbot.read_sensors(QUERIES)
+            return values, mbot.metrics.writes - writes_before
+
+    values, writes = asyncio.run(scenario())
+    assert values == [1, pytest.approx(512.0), pytest.approx(140.0), True, pytest.approx(35.0)]
+    assert writes == 1
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from src.core.mbot_controller import MBotController
+from src.core.sensor_poller import SensorPoller, SensorRing, SensorSample
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tools.virtual_mbot import VirtualMBot
+
+SENSORS = {"front": {"port": 1, "slot": 3}, "left": {"port": 2, "slot": 3}}
+
+
+@pytest.fixture
+def mbot():
+    with VirtualMBot(distance=None) as firmware:
+        firmware.set_distance(40.0, port=1)
+        firmware.set_distance(15.0, port=2)
+        mbot = MBotOriginalProtocol("usb", port=firmware.port)
+        yield mbot
+        mbot.close()
+
+
+def test_ring_keeps_only_the_newest_samples():
+    ring = SensorRing(3)
+    assert ring.latest() is None
+    for i in range(5):
+        ring.append(SensorSample(float(i), i * 10))
+    assert len(ring) == 3
+    assert ring.latest() == SensorSample(4.0, 40)
+    assert [s.value for s in ring.samples()] == [20, 30, 40]
+
+
+def test_each_sensor_is_sampled_at_its_own_rate(mbot):
+    poller = SensorPoller(mbot, SENSORS, {"front": 50.0, "left": 10.0}, capacity=8).start()
+    try:
+        time.sleep(0.5)
+    finally:
+        poller.stop()
+
+    stats = poller.stats()
+    assert stats["front"]["buffered"] == 8  # el buffer no crece
+    # ~25 lecturas a 50 Hz frente a ~5 a 10 Hz
+    assert stats["front"]["reads"] >= 15
+    assert 3 <= stats["left"]["reads"] <= 7
+    assert poller.history("left")[-1].value == pytest.approx(15.0)
+    assert poller.latest("front").value == pytest.approx(40.0)
+    assert poller.latest("front", max_age=0.0) is None
+
+
+def test_subscribers_and_async_streams_receive_samples(mbot):
+    poller = SensorPoller(mbot, SENSORS, {"front": 50.0}).start()
+    received = []
+    unsubscribe = poller.subscribe("front", lambda name, value, stamp: received.append((name, value)))
+
+    async def take(count):
+        samples = []
+        async for sample in poller.stream("front"):
+            samples.append(sample)
+            if len(samples) == count:
+                return samples
+
+    try:
+        samples = asyncio.run(asyncio.wait_for(take(3), 2.0))
+        unsubscribe()
+        seen = len(received)
+        time.sleep(0.1)
+    finally:
+        poller.stop()
+
+    assert [s.value for s in samples] == [pytest.approx(40.0)] * 3
+    assert received and received[0] == ("front", pytest.approx(40.0))
+    assert len(received) == seen
+
+
+def test_controller_reads_latest_sample_without_blocking(mbot):
+    controller = MBotController(mbot=mbot)
+    controller.sensor_ports = SENSORS
+    controller.start_polling({"front": 50.0, "left": 20.0})
+    try:
+        deadline = time.monotonic() + 1.0
+        while controller.read_distance("front") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        start = time.perf_counter()
+        for _ in range(200):
+            controller.read_distance("front")
+        assert time.perf_counter() - start < 0.05
+
+        time.sleep(0.1)
+        assert controller.read_distances(("front", "left")) == {
+            "front": pytest.approx(40.0), "left": pytest.approx(15.0),
+        }
+    finally:
+        controller.stop_polling()
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.protocols import codec
+from tools.virtual_mbot import VirtualMBot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Desde que arranca el intérprete hasta que el primer comando de motor llega
+# al robot (handshake con el mBot virtual incluido)
+FIRST_COMMAND_BUDGET = 1.0
+# Importar todo lo necesario antes de tocar el hardware
+IMPORT_BUDGET = 0.5
+
+# Proceso nuevo: las importaciones se miden en frío
+STARTUP_SCRIPT = """
+import json, sys
+import config
+config.MBOT_CONNECTION_TYPE = "usb"
+config.MBOT_PORT = sys.argv[1]
+config.MBOT_TRACE_PATH = None
+config.VOICE_ENABLED = False
+from src.protocols import connection_cache
+connection_cache.CACHE_PATH = sys.argv[2]
+
+from main import MBotExplorer
+from src.core.startup_profile import StartupProfiler
+
+profiler = StartupProfiler()
+explorer = MBotExplorer(profiler)
+explorer.controller.drive_forward(120)
+print(json.dumps({
+    "phases": dict(profiler.phases),
+    "loaded": [name for name in ("bleak", "hid", "speech_recognition", "pyaudio") if name in sys.modules],
+}))
+explorer.shutdown()
+"""
+
+
+def test_first_motor_command_within_budget(tmp_path):
+    with VirtualMBot() as firmware:
+        start = time.monotonic()
+        process = subprocess.Popen(
+            [sys.executable, "-c", STARTUP_SCRIPT, firmware.port, str(tmp_path / "cache.json")],
+            cwd=ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        output, errors = process.communicate(timeout=10)
+        # El emulador sella cada comando con time.monotonic() al recibirlo
+        moves = [stamp for stamp, device, _ in firmware.commands if device == codec.DEVICE_JOYSTICK]
+
+    assert process.returncode == 0, errors
+    assert moves
+    first_command = moves[0] - start
+    report = json.loads(next(line for line in output.splitlines() if line.startswith("{")))
+    assert report["loaded"] == []
+    assert report["phases"]["importar controlador"] < IMPORT_BUDGET
+    assert first_command < FIRST_COMMAND_BUDGET, report["phases"]
+
+
+def test_profile_report_lists_each_phase(capsys):
+    from src.core.startup_profile import StartupProfiler
+
+    profiler = StartupProfiler(enabled=True)
+    with profiler.phase("importar controlador"):
+        pass
+    with pytest.raises(RuntimeError):
+        with profiler.phase("conectar mBot"):
+            raise RuntimeError("sin robot")
+    profiler.report()
+
+    assert [name for name, _ in profiler.phases] == ["importar controlador", "conectar mBot"]
+    out = capsys.readouterr().out
+    assert "importar controlador" in out and "conectar mBot" in out and "total" in out
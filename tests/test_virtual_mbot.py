@@ -0,0 +1,50 @@
+import pytest
+
+from src.protocols import codec
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tools.virtual_mbot import VirtualMBot
+
+
+@pytest.fixture
+def virtual():
+    with VirtualMBot(distance=42.0, seed=7) as mbot:
+        yield mbot
+
+
+@pytest.fixture
+def connected(virtual):
+    mbot = MBotOriginalProtocol(connection_type="usb", port=virtual.port)
+    yield mbot
+    mbot.close()
+
+
+def test_connects_through_the_usb_path(virtual, connected):
+    assert connected.connection_type == "usb"
+    assert connected.port == virtual.port
+    assert connected.firmware_version == virtual.firmware_version
+
+
+def test_commands_reach_the_emulated_robot(virtual, connected, wait_for):
+    connected.doMove(90, -90)
+    connected.doRGBLedOnBoard(1, 0, 0, 255)
+    connected.doBuzzer(659, 120)
+    assert wait_for(lambda: virtual.buzzer == (659, 120))
+    assert (virtual.left_speed, virtual.right_speed) == (90, -90)
+    assert virtual.leds[(codec.ONBOARD_LED_PORT, codec.ONBOARD_LED_SLOT, 1)] == (0, 0, 255)
+
+
+def test_sensor_reads_survive_latency_and_noise(virtual, connected):
+    virtual.latency = 0.01
+    virtual.noise_rate = 0.5
+    virtual.set_distance(12.0, port=2)
+    for _ in range(10):
+        assert connected.get_ultrasonic_distances([(1, 3), (2, 3)]) == [
+            pytest.approx(42.0),
+            pytest.approx(12.0),
+        ]
+    assert virtual.noise_bytes_sent > 0
+
+
+def test_dropped_reply_times_out(virtual, connected):
+    virtual.drop_rate = 1.0
+    assert connected.get_ultrasonic_distance(1, 3, timeout=0.05) is None
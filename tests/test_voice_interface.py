@@ -0,0 +1,209 @@
+import threading
+import time
+import types
+
+import pytest
+
+from src.core import voice_interface
+from src.core.command_parser import Command
+from src.core.voice_interface import COMMAND, WAKE, VoiceInterface
+from tests.fakes import FakeController, ScriptedVoice
+
+
+class WaitTimeoutError(Exception):
+    pass
+
+
+class UnknownValueError(Exception):
+    pass
+
+
+class RequestError(Exception):
+    pass
+
+
+class FakeMicrophone:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+class FakeRecognizer:
+    """Cada ``listen`` tarda ``delay`` y «oye» la siguiente frase del guion."""
+
+    phrases = []
+    delay = 0.0
+
+    def __init__(self):
+        self.phrases = list(FakeRecognizer.phrases)
+
+    def adjust_for_ambient_noise(self, source, duration=1):
+        pass
+
+    def listen(self, source, timeout=None, phrase_time_limit=None):
+        time.sleep(self.delay)
+        if not self.phrases:
+            raise WaitTimeoutError()
+        return self.phrases.pop(0)
+
+    def recognize_google(self, audio, language=None):
+        if audio is None:
+            raise UnknownValueError()
+        return audio
+
+
+@pytest.fixture
+def fake_sr(monkeypatch):
+    module = types.SimpleNamespace(
+        Recognizer=FakeRecognizer,
+        Microphone=FakeMicrophone,
+        WaitTimeoutError=WaitTimeoutError,
+        UnknownValueError=UnknownValueError,
+        RequestError=RequestError,
+    )
+    monkeypatch.setattr(voice_interface, "sr", module)
+    monkeypatch.setattr(FakeRecognizer, "phrases", [])
+    monkeypatch.setattr(FakeRecognizer, "delay", 0.0)
+    return FakeRecognizer
+
+
+def make_voice(**kwargs):
+    return VoiceInterface("eme bot", "es-ES", poll_interval=0.0, command_timeout=1.0, **kwargs)
+
+
+def wait_for_events(voice, count, timeout=1.0):
+    events = []
+    deadline = time.monotonic() + timeout
+    while len(events) < count and time.monotonic() < deadline:
+        events += voice.poll_events()
+        time.sleep(0.01)
+    return events
+
+
+def test_wake_then_command_are_published_in_order(fake_sr):
+    fake_sr.phrases = ["hola", "oye eme bot", "explora"]
+    voice = make_voice().start()
+    try:
+        events = wait_for_events(voice, 2)
+    finally:
+        voice.close()
+
+    assert [(event.kind, event.text) for event in events] == [(WAKE, None), (COMMAND, "explora")]
+    assert events[0].timestamp <= events[1].timestamp
+
+
+def test_poll_never_blocks_while_recognising(fake_sr):
+    fake_sr.phrases = ["eme bot"]
+    fake_sr.delay = 0.3
+    voice = make_voice().start()
+    try:
+        start = time.perf_counter()
+        assert voice.poll_events() == []
+        assert time.perf_counter() - start < 0.01
+    finally:
+        voice.close()
+
+
+def test_full_queue_drops_the_oldest_events(fake_sr):
+    voice = make_voice(max_events=2)
+    for text in ("uno", "dos", "tres"):
+        voice._publish(COMMAND, text)
+
+    assert [event.text for event in voice.poll_events()] == ["dos", "tres"]
+    assert voice.events_dropped == 1
+
+
+def test_explorer_keeps_its_tick_while_voice_listens(fake_sr):
+    from main import MBotExplorer
+
+    # Cada escucha tarda 0,2 s, como reconocer por red
+    fake_sr.phrases = ["hola", "eme bot", "para"]
+    fake_sr.delay = 0.2
+    controller = FakeController({"front": 100.0})
+    explorer = MBotExplorer(controller=controller, voice_enabled=False, handle_signals=False)
+    explorer.voice = make_voice()
+    thread = threading.Thread(target=explorer.run, daemon=True)
+    thread.start()
+    time.sleep(1.0)
+    stats = explorer.runtime.stats()["control"]
+    explorer.request_exit()
+    thread.join(timeout=1.0)
+    explorer.voice.close()
+
+    assert stats["overruns"] == 0
+    assert stats["ticks"] >= 15
+    assert ("flash_leds", (0, 0, 255), 0.2) in controller.calls
+    assert explorer.mode == Command.STOP
+
+
+def test_worker_survives_a_failing_microphone(fake_sr, monkeypatch):
+    monkeypatch.setattr(voice_interface, "VOICE_ERROR_BACKOFF", 0.01)
+    fake_sr.phrases = [OSError("micrófono desconectado"), "eme bot", "explora"]
+    original_listen = FakeRecognizer.listen
+
+    def listen(self, source, timeout=None, phrase_time_limit=None):
+        phrase = original_listen(self, source, timeout, phrase_time_limit)
+        if isinstance(phrase, Exception):
+            raise phrase
+        return phrase
+
+    monkeypatch.setattr(FakeRecognizer, "listen", listen)
+    voice = make_voice().start()
+    try:
+        events = wait_for_events(voice, 2)
+    finally:
+        voice.close()
+
+    assert [event.kind for event in events] == [WAKE, COMMAND]
+    assert voice.errors == 1
+
+
+def make_listening_explorer():
+    from main import MBotExplorer
+
+    controller = FakeController({"front": 100.0})
+    explorer = MBotExplorer(controller=controller, voice_enabled=False, handle_signals=False)
+    explorer.voice = ScriptedVoice()
+    return explorer, controller
+
+
+def drives(controller):
+    return [call for call in controller.calls if call[0].startswith(("drive_", "turn_"))]
+
+
+def test_explorer_holds_still_until_the_command_arrives():
+    explorer, controller = make_listening_explorer()
+    explorer.step()
+    assert drives(controller)
+
+    explorer.voice.say(WAKE)
+    controller.calls.clear()
+    for _ in range(5):
+        explorer.step()
+    assert ("stop",) in controller.calls
+    assert drives(controller) == []
+
+    explorer.voice.say(COMMAND, "sígueme")
+    explorer.step()
+    explorer.step()
+    assert explorer.mode == Command.FOLLOW
+
+
+def test_explorer_resumes_when_no_command_arrives(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "COMMAND_TIMEOUT", 0.05)
+    monkeypatch.setattr(main, "COMMAND_WAIT_MARGIN", 0.0)
+    explorer, controller = make_listening_explorer()
+    explorer.voice.say(WAKE)
+    explorer.step()
+    controller.calls.clear()
+    explorer.step()
+    assert drives(controller) == []
+
+    time.sleep(0.06)
+    explorer.step()
+    assert explorer.mode == Command.EXPLORE
+    assert drives(controller)
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from src.protocols import codec
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from src.protocols.wire_trace import (
+    TRACE_QUEUED,
+    TRACE_RECEIVED,
+    TRACE_SENT,
+    WireRecorder,
+    read_trace,
+    replay,
+    replay_into_parser,
+    replay_to_port,
+)
+from tools.virtual_mbot import VirtualMBot
+
+
+def test_recorder_grows_and_roundtrips(tmp_path):
+    path = tmp_path / "trace.bin"
+    payloads = [bytes([i % 256]) * (i % 40 + 1) for i in range(200)]
+    with WireRecorder(path, chunk_size=64) as recorder:
+        for i, payload in enumerate(payloads):
+            recorder.record(TRACE_SENT if i % 2 else TRACE_RECEIVED, payload)
+
+    records = list(read_trace(path))
+    assert [r.data for r in records] == payloads
+    assert [r.direction for r in records[:2]] == [TRACE_RECEIVED, TRACE_SENT]
+    assert all(a.timestamp <= b.timestamp for a, b in zip(records, records[1:]))
+    # Al cerrar se recorta a lo escrito
+    assert path.stat().st_size == recorder.bytes_written
+
+
+def test_unclosed_trace_stops_at_unwritten_tail(tmp_path):
+    path = tmp_path / "trace.bin"
+    recorder = WireRecorder(path)
+    recorder.record(TRACE_RECEIVED, b"\x01\x02")
+    recorder.flush()
+    assert [r.data for r in read_trace(path)] == [b"\x01\x02"]
+    recorder.close()
+
+
+def test_replay_respects_speed(tmp_path):
+    path = tmp_path / "trace.bin"
+    with WireRecorder(path) as recorder:
+        recorder.record(TRACE_RECEIVED, codec.encode_reply(1, 10.0))
+        time.sleep(0.2)
+        recorder.record(TRACE_RECEIVED, codec.encode_reply(2, 20.0))
+
+    start = time.monotonic()
+    assert replay(path, lambda data: None, speed=4.0) == 2
+    assert 0.03 < time.monotonic() - start < 0.15
+    assert replay_into_parser(path) == [(1, 10.0), (2, 20.0)]
+
+
+def test_protocol_trace_replays_into_parser_and_port(tmp_path, wait_for):
+    path = tmp_path / "trace.bin"
+    with VirtualMBot(distance=42.0) as firmware:
+        mbot = MBotOriginalProtocol("usb", port=firmware.port, trace_path=str(path))
+        mbot.doMove(70, 70)
+        assert mbot.get_ultrasonic_distance(1, 3) == pytest.approx(42.0)
+        mbot.doMove(0, 0)
+        mbot.close()
+
+    records = list(read_trace(path))
+    queued = [r.data for r in records if r.direction == TRACE_QUEUED]
+    sent = b"".join(r.data for r in records if r.direction == TRACE_SENT)
+    assert queued[0] == codec.encode_move(70, 70)
+    assert queued[-1] == codec.encode_move(0, 0)
+    assert codec.encode_move(0, 0) in sent
+    assert [value for _, value in replay_into_parser(path)] == [pytest.approx(42.0)]
+
+    # Lo enviado reproduce el mismo estado final en otro robot
+    with VirtualMBot() as other:
+        replay_to_port(path, other.port, speed=0)
+        assert wait_for(lambda: len(other.commands) >= 2)
+        assert [args for _, _, args in other.commands][0] == codec.encode_move(70, 70)[6:]
+        assert (other.left_speed, other.right_speed) == (0, 0)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parser de tramas: versión anterior (pop(0) + copia) frente
+a FrameParser, con flujos sintéticos con ruido.
+
+Uso: python tools/benchmarks/bench_frame_parser.py [--frames N] [--noise R]
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.protocols.frame_parser import FrameParser
+
+
+def legacy_parse(buffer):
+    """Copia del _try_parse_frame original, para comparar."""
+    while len(buffer) >= 3:
+        if buffer[0] != 0xff or buffer[1] != 0x55:
+            buffer.pop(0)
+            continue
+
+        length = buffer[2]
+        total = length + 3
+        if len(buffer) < total:
+            return None
+
+        frame = bytes(buffer[:total])
+        del buffer[:total]
+
+        idx = frame[3]
+        data_type = frame[4]
+        payload = frame[5:]
+        if data_type == 2 and len(payload) >= 4:
+            return idx, struct.unpack('f', payload[:4])[0]
+        return idx, None
+    return None
+
+
+def build_stream(frames, noise_ratio, seed=1234):
+    """Respuestas de ultrasonido intercaladas con ráfagas de bytes basura."""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(frames):
+        if rng.random() < noise_ratio:
+            # Basura sin 0xff para no fabricar cabeceras falsas
+            chunks.append(bytes(rng.randrange(0, 0xff) for _ in range(rng.randint(8, 256))))
+        payload = bytes([i % 254 + 1, 0x02]) + struct.pack("<f", rng.uniform(2.0, 400.0))
+        chunks.append(bytes([0xff, 0x55, len(payload)]) + payload)
+    return b"".join(chunks)
+
+
+def split_reads(stream, chunk_size):
+    return [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+
+def run_legacy(reads):
+    buffer = bytearray()
+    count = 0
+    for data in reads:
+        buffer.extend(data)
+        while legacy_parse(buffer):
+            count += 1
+    return count
+
+
+def run_ring(reads):
+    parser = FrameParser()
+    count = 0
+    for data in reads:
+        parser.feed(data)
+        while parser.next_frame():
+            count += 1
+    return count
+
+
+def measure(func, reads, repeat):
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func(reads)
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--noise", type=float, nargs="*", default=[0.0, 0.1, 0.5])
+    parser.add_argument("--chunk", type=int, default=4096, help="bytes por lectura del puerto")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"📊 Parser de tramas: {args.frames} tramas, lecturas de {args.chunk} bytes")
+    print(f"{'ruido':>6} {'antes (tramas/s)':>18} {'después (tramas/s)':>20} {'mejora':>8}")
+    for noise in args.noise:
+        reads = split_reads(build_stream(args.frames, noise), args.chunk)
+        legacy_count, legacy_time = measure(run_legacy, reads, args.repeat)
+        ring_count, ring_time = measure(run_ring, reads, args.repeat)
+        if legacy_count != ring_count:
+            print(f"❌ Resultados distintos: {legacy_count} vs {ring_count}")
+            return 1
+        legacy_rate = legacy_count / legacy_time
+        ring_rate = ring_count / ring_time
+        print(f"{noise:>6.2f} {legacy_rate:>18,.0f} {ring_rate:>20,.0f} {ring_rate / legacy_rate:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
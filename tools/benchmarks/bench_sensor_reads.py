@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Carga del protocolo contra el mBot virtual: lecturas de tres ultrasonidos
+una tras otra frente a las tres en vuelo a la vez, y un tick completo de
+siguelíneas (cuatro sensores distintos en una tanda), con latencia y ruido.
+
+Uso: python tools/benchmarks/bench_sensor_reads.py [--latency 0.005] [--ticks 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.protocols import codec
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tools.virtual_mbot import VirtualMBot
+
+SENSORS = [(1, 3), (2, 3), (3, 3)]
+# Tick de un siguelíneas: todos los sensores de la placa más el ultrasonido
+LINE_TICK = ["line_follower", "light", "button", ("ultrasonic", 1, 3)]
+
+
+def run_ticks(read_tick, ticks):
+    durations = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        read_tick()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(name, durations):
+    mean = statistics.mean(durations) * 1000
+    p95 = sorted(durations)[int(len(durations) * 0.95) - 1] * 1000
+    print(f"   {name:<12} media {mean:6.2f} ms   p95 {p95:6.2f} ms   {1000 / mean:7.1f} ticks/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lecturas de sensores contra el mBot virtual")
+    parser.add_argument("--latency", type=float, default=0.005, help="retardo de cada respuesta (s)")
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    with VirtualMBot(distance=None, latency=args.latency, noise_rate=args.noise, seed=1) as virtual:
+        for port, _ in SENSORS:
+            virtual.set_distance(20.0 * port, port=port)
+        virtual.set_sensor(codec.DEVICE_LINE_FOLLOWER, 2, 1)
+        virtual.set_sensor(codec.DEVICE_LIGHT, codec.ONBOARD_LIGHT_PORT, 400)
+        virtual.set_sensor(codec.DEVICE_BUTTON_INNER, codec.ONBOARD_BUTTON_PORT, False)
+        mbot = MBotOriginalProtocol(connection_type="usb", port=virtual.port)
+        try:
+            print(f"📊 {args.ticks} ticks de {len(SENSORS)} sensores, latencia {args.latency * 1000:.1f} ms")
+            sequential = run_ticks(lambda: [mbot.get_ultrasonic_distance(p, s) for p, s in SENSORS], args.ticks)
+            pipelined = run_ticks(lambda: mbot.get_ultrasonic_distances(SENSORS), args.ticks)
+            line = run_ticks(lambda: mbot.read_sensors(LINE_TICK), args.ticks)
+            report("secuencial", sequential)
+            report("en vuelo", pipelined)
+            report("siguelíneas", line)
+        finally:
+            mbot.close()
+
+
+if __name__ == "__main__":
+    main()
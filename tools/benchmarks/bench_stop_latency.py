@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Latencia de parada: desde que llega la orden «para» hasta que el mBot
+virtual recibe la última parada de motores. La mitad de las pruebas pillan
+al robot navegando y la otra mitad en plena maniobra de esquiva
+(retrocediendo o girando), que es donde antes se esperaba la maniobra entera.
+
+Uso: python tools/benchmarks/bench_stop_latency.py [--trials 40] [--latency 0.002]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from config import CONTROL_TICK, EXPLORATION_SETTINGS
+from main import MBotExplorer
+from src.core.control_runtime import describe
+from src.core.mbot_controller import MBotController
+from src.protocols import codec
+from src.protocols.mbot_original_protocol import MBotOriginalProtocol
+from tools.virtual_mbot import VirtualMBot
+
+STOPPED = codec.encode_move(0, 0)[6:]
+
+
+def stop_latency(firmware, asked_at):
+    """Instante en que los motores quedan parados para siempre tras ``asked_at``."""
+    moves = [(stamp, args) for stamp, device, args in list(firmware.commands)
+             if device == codec.DEVICE_JOYSTICK and stamp >= asked_at]
+    stopped_at = None
+    for stamp, args in moves:
+        if args == STOPPED:
+            stopped_at = stamp if stopped_at is None else stopped_at
+        else:
+            stopped_at = None
+    return None if stopped_at is None else stopped_at - asked_at
+
+
+def run_trial(explorer, firmware, rng, maneuver):
+    firmware.set_distance(200.0)
+    explorer.submit_command("explora")
+    time.sleep(rng.uniform(0.2, 0.4))
+    if maneuver:
+        firmware.set_distance(10.0)
+        window = EXPLORATION_SETTINGS["reverse_time"] + EXPLORATION_SETTINGS["turn_time"]
+        time.sleep(rng.uniform(0.1, window * 0.9))
+    asked_at = time.monotonic()
+    explorer.submit_command("para")
+    time.sleep(0.3)
+    return stop_latency(firmware, asked_at)
+
+
+def summarize(label, latencies):
+    latencies = sorted(latency * 1000 for latency in latencies if latency is not None)
+    if not latencies:
+        print(f"{label:<24} sin datos")
+        return
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{label:<24} p50 {statistics.median(latencies):6.1f} ms   p95 {p95:6.1f} ms   "
+          f"máx {latencies[-1]:6.1f} ms   ({len(latencies)} pruebas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with VirtualMBot(distance=200.0, latency=args.latency) as firmware:
+        controller = MBotController(mbot=MBotOriginalProtocol("usb", port=firmware.port))
+        explorer = MBotExplorer(controller=controller, voice_enabled=False, handle_signals=False)
+        loop = threading.Thread(target=explorer.run, daemon=True)
+        loop.start()
+        try:
+            cruising, maneuvering = [], []
+            for trial in range(args.trials):
+                maneuver = trial % 2 == 1
+                latency = run_trial(explorer, firmware, rng, maneuver)
+                (maneuvering if maneuver else cruising).append(latency)
+        finally:
+            stats = explorer.runtime.stats()
+            explorer.request_exit()
+            loop.join(timeout=1.0)
+            explorer.shutdown()
+
+    print(f"Tick de control: {CONTROL_TICK * 1000:.0f} ms")
+    for line in describe(stats):
+        print(line)
+    summarize("navegando", cruising)
+    summarize("en maniobra", maneuvering)
+    blocking = EXPLORATION_SETTINGS["reverse_time"] + EXPLORATION_SETTINGS["turn_time"]
+    print(f"(con la maniobra bloqueante el peor caso era ≥ {blocking * 1000:.0f} ms más la melodía)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+mBot virtual sobre un pseudo-terminal (PTY) para probar sin robot.
+
+Habla el protocolo ``0xff 0x55`` como el firmware: decodifica las tramas de
+movimiento, LEDs, buzzer, motores y servos, y contesta a las peticiones de
+sensores con valores configurables. Se puede inyectar latencia, respuestas
+perdidas y bytes de ruido. MBotOriginalProtocol se conecta por el camino USB
+normal usando el puerto que expone (``MBOT_PORT``).
+
+Uso: python tools/virtual_mbot.py [--latency 0.005] [--noise 0.1] [--distance 40]
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+import random
+import select
+import struct
+import sys
+import threading
+import time
+import tty
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.protocols import codec
+
+_TWO_SHORTS = struct.Struct("<hh")
+_MOTOR = struct.Struct("<Bh")
+
+
+class VirtualMBot:
+    """Firmware emulado al otro extremo de un PTY.
+
+    ``sensor_values`` mapea ``(dispositivo, puerto)`` a un número o a una
+    función sin argumentos; si no hay valor la petición no se contesta.
+    """
+
+    def __init__(self, distance=50.0, latency=0.0, noise_rate=0.0, drop_rate=0.0,
+                 firmware_version="09.01.017", boot_delay=0.0, seed=None):
+        self.latency = latency
+        self.noise_rate = noise_rate
+        self.drop_rate = drop_rate
+        self.firmware_version = firmware_version
+        self.boot_delay = boot_delay
+        self.sensor_values = {}
+        if distance is not None:
+            self.set_sensor(codec.DEVICE_ULTRASONIC, 1, distance)
+
+        # Estado visible del robot
+        self.left_speed = 0
+        self.right_speed = 0
+        self.motors = {}
+        self.leds = {}
+        self.servos = {}
+        self.buzzer = None
+        self.commands = []
+        self.requests_received = 0
+        self.replies_sent = 0
+        self.noise_bytes_sent = 0
+
+        self._rng = random.Random(seed)
+        self._rx = bytearray()
+        self._outgoing = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._started_at = 0.0
+        self._running = False
+        self._thread = None
+
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        # Mantenemos el extremo esclavo abierto para que el PTY no se cuelgue
+        # cuando el cliente cierra y vuelve a abrir el puerto
+        self.port = os.ttyname(self._slave)
+
+    # ------------------------------------------------------------------
+    def set_sensor(self, device, port, value):
+        self.sensor_values[(device, port)] = value
+
+    def set_distance(self, value, port=1):
+        self.set_sensor(codec.DEVICE_ULTRASONIC, port, value)
+
+    def start(self):
+        self._running = True
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    def _run(self):
+        while self._running:
+            with self._lock:
+                due = self._outgoing[0][0] if self._outgoing else None
+            timeout = 0.05 if due is None else max(0.0, min(0.05, due - time.monotonic()))
+            try:
+                readable, _, _ = select.select([self.master], [], [], timeout)
+                if readable:
+                    self._rx += os.read(self.master, 4096)
+                    self._handle_frames()
+                self._flush_due()
+            except OSError:
+                return
+
+    def _handle_frames(self):
+        buffer = self._rx
+        while True:
+            start = buffer.find(codec.HEADER)
+            if start < 0:
+                del buffer[:len(buffer) - 1 if buffer.endswith(b"\xff") else len(buffer)]
+                return
+            del buffer[:start]
+            if len(buffer) < 3:
+                return
+            if buffer[2] < 3:
+                del buffer[:1]
+                continue
+            total = buffer[2] + 3
+            if len(buffer) < total:
+                return
+            frame = bytes(buffer[:total])
+            del buffer[:total]
+            self._handle_frame(frame)
+
+    def _handle_frame(self, frame):
+        idx, action, device, args = frame[3], frame[4], frame[5], frame[6:]
+        now = time.monotonic()
+        if action == codec.ACTION_RUN:
+            self._run_command(device, args)
+            self.commands.append((now, device, args))
+        elif action == codec.ACTION_GET:
+            self.requests_received += 1
+            if now - self._started_at < self.boot_delay:
+                # La placa aún está arrancando tras el reset del puerto
+                return
+            self._answer(idx, device, args)
+
+    def _run_command(self, device, args):
+        if device == codec.DEVICE_JOYSTICK and len(args) >= 4:
+            left, right = _TWO_SHORTS.unpack_from(args)
+            self.left_speed, self.right_speed = -left, right
+        elif device == codec.DEVICE_MOTOR and len(args) >= 3:
+            port, speed = _MOTOR.unpack_from(args)
+            self.motors[port] = speed
+        elif device == codec.DEVICE_RGBLED and len(args) >= 6:
+            port, slot, index = args[0], args[1], args[2]
+            color = tuple(args[3:6])
+            if index == 0:
+                # Índice 0 = todos los LEDs de ese puerto
+                for key in [k for k in self.leds if k[:2] == (port, slot)]:
+                    self.leds[key] = color
+            self.leds[(port, slot, index)] = color
+        elif device == codec.DEVICE_TONE and len(args) >= 4:
+            self.buzzer = _TWO_SHORTS.unpack_from(args)
+        elif device == codec.DEVICE_SERVO and len(args) >= 3:
+            self.servos[(args[0], args[1])] = args[2]
+
+    def _answer(self, idx, device, args):
+        if device == codec.DEVICE_VERSION:
+            reply = codec.encode_reply(idx, self.firmware_version, codec.TYPE_STRING)
+        else:
+            port = args[0] if args else 0
+            value = self.sensor_values.get((device, port))
+            if callable(value):
+                value = value()
+            if value is None:
+                return
+            if device == codec.DEVICE_BUTTON_INNER:
+                # El firmware contesta un byte: clave XOR pulsado
+                key = args[1] if len(args) > 1 else 0
+                reply = codec.encode_reply(idx, key ^ int(bool(value)), codec.TYPE_BYTE)
+            else:
+                reply = codec.encode_reply(idx, float(value))
+
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            return
+        if self.noise_rate and self._rng.random() < self.noise_rate:
+            noise = bytes(self._rng.randrange(0, 0xff) for _ in range(self._rng.randint(1, 16)))
+            self.noise_bytes_sent += len(noise)
+            reply = noise + reply
+        with self._lock:
+            heapq.heappush(self._outgoing, (time.monotonic() + self.latency, next(self._sequence), reply))
+
+    def _flush_due(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._outgoing or self._outgoing[0][0] > now:
+                    return
+                _, _, reply = heapq.heappop(self._outgoing)
+            os.write(self.master, reply)
+            self.replies_sent += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mBot virtual sobre un PTY")
+    parser.add_argument("--distance", type=float, default=50.0, help="distancia del ultrasonido (cm)")
+    parser.add_argument("--latency", type=float, default=0.0, help="retardo de cada respuesta (s)")
+    parser.add_argument("--noise", type=float, default=0.0, help="probabilidad de ruido antes de una respuesta")
+    parser.add_argument("--drop", type=float, default=0.0, help="probabilidad de perder una respuesta")
+    args = parser.parse_args()
+
+    with VirtualMBot(args.distance, args.latency, args.noise, args.drop) as mbot:
+        print(f"🤖 mBot virtual escuchando en {mbot.port}")
+        print(f"   Pon MBOT_PORT = \"{mbot.port}\" en config.py y lanza main.py")
+        try:
+            while True:
+                time.sleep(1)
+                print(f"   L:{mbot.left_speed} R:{mbot.right_speed} "
+                      f"peticiones:{mbot.requests_received} respuestas:{mbot.replies_sent}")
+        except KeyboardInterrupt:
+            print("\n🛑 Cerrando mBot virtual")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Inspección y reproducción de registros de tráfico (MBOT_TRACE_PATH).
+
+  dump    lista cada registro con su hora relativa, dirección y bytes
+  parse   reinyecta lo recibido en el parser y muestra las respuestas
+  replay  reenvía lo enviado a un puerto (un robot o tools/virtual_mbot.py)
+
+Uso: python tools/wire_trace.py dump mbot_trace.bin
+     python tools/wire_trace.py replay mbot_trace.bin --port /dev/pts/5 --speed 4
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.protocols.wire_trace import (
+    TRACE_DIRECTIONS,
+    read_trace,
+    replay_into_parser,
+    replay_to_port,
+)
+
+
+def dump(path):
+    counts = {}
+    for record in read_trace(path):
+        name = TRACE_DIRECTIONS.get(record.direction, "?")
+        counts[name] = counts.get(name, 0) + 1
+        print(f"{record.timestamp:10.6f}  {name:<8}  {record.data.hex(' ')}")
+    print(f"📊 {sum(counts.values())} registros: "
+          + ", ".join(f"{name} {count}" for name, count in counts.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registros de tráfico del mBot")
+    parser.add_argument("command", choices=("dump", "parse", "replay"))
+    parser.add_argument("path", help="fichero grabado con MBOT_TRACE_PATH")
+    parser.add_argument("--port", help="puerto destino para replay")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="factor de velocidad (2 = el doble de rápido, 0 = sin esperas)")
+    args = parser.parse_args()
+
+    if args.command == "dump":
+        dump(args.path)
+    elif args.command == "parse":
+        frames = replay_into_parser(args.path, speed=args.speed)
+        for idx, value in frames:
+            print(f"   idx {idx:3d} -> {value}")
+        print(f"📊 {len(frames)} respuestas")
+    else:
+        if not args.port:
+            parser.error("replay necesita --port")
+        sent = replay_to_port(args.path, args.port, speed=args.speed)
+        print(f"✅ {sent} escrituras reenviadas a {args.port}")
+
+
+if __name__ == "__main__":
+    main()